@@ -12,6 +12,17 @@ Usage:
 Or pass the token as an argument:
     python bangumi_api_example.py --token "your_token"
 
+Print per-request timings at exit:
+    python bangumi_api_example.py --profile --trace-out trace.json
+
+Adapt concurrency to the host's responses (see gal-throttle):
+    controller = AIMDController()
+    bgm = BangumiAPI(token, concurrency=controller)
+
+Serve subjects, characters, persons and users from a stale-while-revalidate
+cache (see bangumi_cache.py):
+    bgm = BangumiAPI(token, cache=EntityCache(SQLiteEntityStore("bangumi_cache.db")))
+
 API docs: https://bangumi.github.io/api/
 Token: https://next.bgm.tv/demo/access-token
 """
@@ -19,10 +30,21 @@ Token: https://next.bgm.tv/demo/access-token
 import os
 import sys
 import argparse
-import urllib.request
-import urllib.error
+import hashlib
 import json
-from typing import Optional, Dict, Any, List
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List
+
+if TYPE_CHECKING:
+    from request_trace import Span, Tracer
+    from adaptive_concurrency import AIMDController
+    from bangumi_cache import EntityCache
+
+
+# Request tracing lives in the sibling gal-trace skill (see load_tracer)
+TRACE_SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+                             "gal-trace", "scripts")
 
 
 class BangumiAPI:
@@ -31,16 +53,37 @@ class BangumiAPI:
     BASE_URL = "https://api.bgm.tv"
     CALENDAR_URL = "https://api.bgm.tv/calendar"
 
-    def __init__(self, access_token: str):
+    def __init__(self, access_token: str, tracer: Optional["Tracer"] = None,
+                 concurrency: Optional["AIMDController"] = None,
+                 cache: Optional["EntityCache"] = None):
         """
         Initialize Bangumi API client.
 
         Args:
             access_token: Bangumi access token from https://next.bgm.tv/demo/access-token
+            tracer: Optional request tracer (see gal-trace/scripts/request_trace.py)
+            concurrency: Optional per-host concurrency controller
+                (see gal-throttle/scripts/adaptive_concurrency.py)
+            cache: Optional entity cache for get_subject, get_character,
+                get_person and get_user (see bangumi_cache.py)
         """
         if not access_token:
             raise ValueError("Access token is required. Get one at https://next.bgm.tv/demo/access-token")
         self.access_token = access_token
+        self.tracer = tracer
+        self.concurrency = concurrency
+        self.cache = cache
+        # Results can depend on the token's permissions (e.g. NSFW subjects)
+        self._cache_scope = hashlib.sha256(access_token.encode("utf-8")).hexdigest()[:16]
+
+    def _acquire(self, host: str, span: Optional["Span"] = None):
+        """Wait for a request slot to host (a null context without a controller)."""
+        if self.concurrency is None:
+            return nullcontext()
+        permit = self.concurrency.acquire(host)
+        if span is not None:
+            span.mark("wait")
+        return permit
 
     def _make_request(self, url: str, method: str = "GET", data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
@@ -54,6 +97,9 @@ class BangumiAPI:
         Returns:
             JSON response as dictionary
         """
+        import urllib.request
+        import urllib.error
+
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "User-Agent": "Bangumi-API-Example/1.0"
@@ -67,12 +113,32 @@ class BangumiAPI:
         if data:
             req.data = json.dumps(data).encode("utf-8")
 
-        try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                return json.loads(response.read().decode("utf-8"))
-        except urllib.error.HTTPError as e:
-            print(f"HTTP Error: {e.code} {e.reason}")
-            raise
+        parts = urlsplit(url)
+        span_context = (self.tracer.start_span("bangumi", method, parts.path)
+                        if self.tracer is not None else nullcontext())
+        with span_context as span, self._acquire(parts.netloc, span) as permit:
+            try:
+                with urllib.request.urlopen(req, timeout=30) as response:
+                    if span is not None:
+                        span.mark("server")
+                    body = response.read()
+                    if permit is not None:
+                        permit.report(response.getcode())
+                    if span is not None:
+                        span.mark("transfer")
+                        span.set(status=response.getcode(), bytes_in=len(req.data or b""),
+                                 bytes_out=len(body))
+                    result = json.loads(body.decode("utf-8"))
+                    if span is not None:
+                        span.mark("decode")
+                    return result
+            except urllib.error.HTTPError as e:
+                if permit is not None:
+                    permit.report(e.code)
+                if span is not None:
+                    span.set(status=e.code)
+                print(f"HTTP Error: {e.code} {e.reason}")
+                raise
 
     def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a GET request."""
@@ -82,6 +148,16 @@ class BangumiAPI:
             url += f"?{query}"
         return self._make_request(url)
 
+    def _get_entity(self, entity: str, entity_id: Any, path: str) -> Dict[str, Any]:
+        """Make a GET request for an entity, through the entity cache if one is set."""
+        if self.cache is None:
+            return self._get(path)
+        data, state = self.cache.lookup(entity, entity_id, lambda: self._get(path),
+                                        scope=self._cache_scope)
+        if self.tracer is not None and state != "uncached":
+            self.tracer.event(f"cache_{state}", "bangumi", path)
+        return data
+
     def _post(self, path: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make a POST request."""
         url = f"{self.BASE_URL}{path}"
@@ -94,6 +170,8 @@ class BangumiAPI:
         Returns:
             List of weekday items with anime information
         """
+        import urllib.request
+
         req = urllib.request.Request(
             self.CALENDAR_URL,
             headers={"Accept": "application/json", "User-Agent": "Bangumi-API-Example/1.0"},
@@ -121,7 +199,7 @@ class BangumiAPI:
         Returns:
             User data
         """
-        return self._get(f"/v0/users/{username}")
+        return self._get_entity("user", username, f"/v0/users/{username}")
 
     def search_subjects(self, keyword: str, sort: str = "match",
                         filter: Optional[Dict[str, Any]] = None,
@@ -179,7 +257,7 @@ class BangumiAPI:
         Returns:
             Subject data
         """
-        return self._get(f"/v0/subjects/{subject_id}")
+        return self._get_entity("subject", subject_id, f"/v0/subjects/{subject_id}")
 
     def get_subjects(self, subject_type: int, limit: int = 10, offset: int = 0) -> Dict[str, Any]:
         """
@@ -195,6 +273,26 @@ class BangumiAPI:
         """
         return self._get("/v0/subjects", {"type": subject_type, "limit": limit, "offset": offset})
 
+    def iter_subjects(self, subject_type: int, page_size: int = 50) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every subject of a type, following offset pagination.
+
+        Args:
+            subject_type: Subject type (1=book, 2=anime, 3=music, 4=game, 6=real)
+            page_size: Results per request (max 50)
+
+        Yields:
+            Subject dictionaries
+        """
+        offset = 0
+        while True:
+            page = self.get_subjects(subject_type, limit=page_size, offset=offset)
+            items = page.get("data", [])
+            yield from items
+            offset += len(items)
+            if not items or offset >= page.get("total", 0):
+                break
+
     def get_subject_characters(self, subject_id: int) -> List[Dict[str, Any]]:
         """
         Get characters for a subject.
@@ -253,7 +351,7 @@ class BangumiAPI:
         Returns:
             Person data
         """
-        return self._get(f"/v0/persons/{person_id}")
+        return self._get_entity("person", person_id, f"/v0/persons/{person_id}")
 
     def get_character(self, character_id: int) -> Dict[str, Any]:
         """
@@ -265,7 +363,7 @@ class BangumiAPI:
         Returns:
             Character data
         """
-        return self._get(f"/v0/characters/{character_id}")
+        return self._get_entity("character", character_id, f"/v0/characters/{character_id}")
 
     def get_user_collections(self, username: str, status: Optional[str] = None,
                              limit: int = 10) -> Dict[str, Any]:
@@ -299,11 +397,27 @@ class BangumiAPI:
         return self._get(f"/v0/index/{index_type}", {"limit": limit})
 
 
+def load_tracer(profile: bool, trace_out: Optional[str], sample: bool) -> "Tracer":
+    """Create a CLI request tracer from the sibling gal-trace skill."""
+    if TRACE_SCRIPTS not in sys.path:
+        sys.path.append(TRACE_SCRIPTS)
+    try:
+        from request_trace import cli_tracer
+    except ImportError:
+        print("Error: Tracing requires the gal-trace skill next to bangumi-api")
+        sys.exit(1)
+    return cli_tracer(profile=profile, out_path=trace_out, sample=sample)
+
+
 def main():
     parser = argparse.ArgumentParser(description="Bangumi API Example")
     parser.add_argument("--token", help="Bangumi access token (or set BGM_TOKEN env var)")
     parser.add_argument("--username", help="Username to query", default=None)
     parser.add_argument("--search", help="Search keyword", default="Clannad")
+    parser.add_argument("--profile", action="store_true", help="Print request timings at exit")
+    parser.add_argument("--trace-out", help="Export request timings (JSON, or Prometheus text for .prom)")
+    parser.add_argument("--profile-sample", action="store_true",
+                        help="Also run the sampling profiler")
     args = parser.parse_args()
 
     token = args.token or os.environ.get("BGM_TOKEN")
@@ -318,7 +432,10 @@ def main():
         print("  python bangumi_api_example.py --token 'your_token' --search 'keyword'")
         sys.exit(1)
 
-    bgm = BangumiAPI(token)
+    tracer = None
+    if args.profile or args.trace_out or args.profile_sample:
+        tracer = load_tracer(args.profile, args.trace_out, args.profile_sample)
+    bgm = BangumiAPI(token, tracer=tracer)
 
     print("=" * 50)
     print("Current User")
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Bangumi Entity Cache
+
+Stale-while-revalidate cache for the BangumiAPI entity getters
+(get_subject, get_character, get_person, get_user). An in-process LRU sits
+in front of an optional persistent store (SQLite by default). Each entity
+type has an EntityPolicy:
+
+- younger than `ttl`: fresh, returned as is;
+- younger than `ttl + stale_ttl`: stale, returned at once while one
+  background refresh per entity updates both tiers;
+- older, or not cached: a miss, fetched in the calling thread. Concurrent
+  misses for the same entity share one request.
+
+Entries store when they were fetched rather than when they expire, so
+changing a TTL applies to entries that are already cached.
+
+Usage:
+    from bangumi_api_example import BangumiAPI
+    from bangumi_cache import EntityCache, EntityPolicy, SQLiteEntityStore
+
+    cache = EntityCache(SQLiteEntityStore("bangumi_cache.db"))
+    cache.policies["subject"] = EntityPolicy(ttl=3600, stale_ttl=7 * 86400)
+    bgm = BangumiAPI(token, cache=cache)
+    bgm.get_subject(100228)   # network
+    bgm.get_subject(100228)   # memory hit
+    print(cache.stats())
+
+    python bangumi_cache.py stats bangumi_cache.db
+    python bangumi_cache.py purge bangumi_cache.db --older-than 30
+"""
+
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, Callable, Tuple
+
+
+@dataclass
+class EntityPolicy:
+    """Freshness rule for one entity type."""
+    ttl: float
+    stale_ttl: float = 0.0
+
+
+HOUR = 3600
+DAY = 86400
+DEFAULT_POLICIES: Dict[str, EntityPolicy] = {
+    "subject": EntityPolicy(ttl=DAY, stale_ttl=7 * DAY),
+    "character": EntityPolicy(ttl=7 * DAY, stale_ttl=30 * DAY),
+    "person": EntityPolicy(ttl=7 * DAY, stale_ttl=30 * DAY),
+    "user": EntityPolicy(ttl=HOUR, stale_ttl=DAY),
+}
+
+
+class SQLiteEntityStore:
+    """
+    Persistent entity store backed by SQLite.
+
+    Unlike steam_cache.SQLiteCacheStore, rows record when they were fetched
+    rather than when they expire, so the two stores must not share a file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create a cache database.
+
+        Args:
+            path: SQLite database path
+        """
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS entities "
+                         "(key TEXT PRIMARY KEY, fetched REAL NOT NULL, body TEXT NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        """Return (fetched, body) for a key, or None."""
+        with self._lock:
+            return self._db.execute("SELECT fetched, body FROM entities WHERE key = ?",
+                                    (key,)).fetchone()
+
+    def set(self, key: str, fetched: float, body: str) -> None:
+        """Store a body with the time it was fetched."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entities (key, fetched, body) VALUES (?, ?, ?)",
+                             (key, fetched, body))
+
+    def purge_older_than(self, seconds: float, now: Optional[float] = None) -> int:
+        """Delete entries fetched more than `seconds` ago and return how many were removed."""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM entities WHERE fetched <= ?",
+                                    ((now or time.time()) - seconds,)).rowcount
+
+    def count(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entities").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+
+class EntityCache:
+    """Two-tier stale-while-revalidate cache for Bangumi entities."""
+
+    def __init__(self, store: Optional[SQLiteEntityStore] = None,
+                 policies: Optional[Dict[str, EntityPolicy]] = None,
+                 max_entries: int = 4096, refresh_workers: int = 4):
+        """
+        Initialize the cache.
+
+        Args:
+            store: Persistent store (None for memory only)
+            policies: Per entity type policies; defaults to DEFAULT_POLICIES
+            max_entries: Maximum entries kept in the in-process LRU
+            refresh_workers: Threads running background refreshes
+        """
+        self.store = store
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._executor = ThreadPoolExecutor(refresh_workers, thread_name_prefix="bangumi-refresh")
+        self._stats = {"fresh_hits": 0, "stale_hits": 0, "misses": 0, "memory_hits": 0,
+                       "store_hits": 0, "coalesced": 0, "refreshes": 0, "refresh_errors": 0}
+
+    def policy(self, entity: str) -> Optional[EntityPolicy]:
+        """Return the policy for an entity type, or None if uncached."""
+        return self.policies.get(entity)
+
+    @staticmethod
+    def make_key(entity: str, entity_id: Any, scope: str = "") -> str:
+        """Build a cache key; scope separates callers that may see different data."""
+        return f"{scope}:{entity}/{entity_id}" if scope else f"{entity}/{entity_id}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: str, fetched: float, data: Any) -> None:
+        with self._lock:
+            self._lru[key] = (fetched, data)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[Tuple[float, Any]]:
+        """Find an entry in the LRU, then in the store; return (fetched, data)."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                self._lru.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return entry
+        if self.store is None:
+            return None
+        row = self.store.get(key)
+        if row is None:
+            return None
+        entry = (row[0], json.loads(row[1]))
+        self._remember(key, *entry)
+        self._count("store_hits")
+        return entry
+
+    def _save(self, key: str, data: Any) -> None:
+        fetched = time.time()
+        self._remember(key, fetched, data)
+        if self.store is not None:
+            self.store.set(key, fetched, json.dumps(data, ensure_ascii=False))
+
+    def _refresh(self, key: str, fetch: Callable[[], Any], future: Future,
+                 background: bool = False) -> None:
+        """Fetch and store an entity, settling the in-flight future."""
+        try:
+            data = fetch()
+            self._save(key, data)
+            future.set_result(data)
+        except BaseException as e:
+            if background:
+                # The stale entry stays in place and is retried on a later lookup
+                self._count("refresh_errors")
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _background_refresh(self, key: str, fetch: Callable[[], Any]) -> None:
+        """Start a refresh unless one is already running for the key."""
+        with self._lock:
+            if key in self._inflight:
+                return
+            future: Future = Future()
+            self._inflight[key] = future
+            self._stats["refreshes"] += 1
+        self._executor.submit(self._refresh, key, fetch, future, True)
+
+    def lookup(self, entity: str, entity_id: Any, fetch: Callable[[], Any],
+               scope: str = "") -> Tuple[Any, str]:
+        """
+        Get an entity, fetching or refreshing it as its policy requires.
+
+        Args:
+            entity: Entity type ("subject", "character", "person", "user")
+            entity_id: Entity ID or username
+            fetch: Performs the request and returns the entity
+            scope: Key prefix separating callers that may see different data
+
+        Returns:
+            (entity data, "fresh" | "stale" | "miss"); "uncached" for types
+            without a policy
+
+        Raises:
+            Whatever `fetch` raises, on a miss
+        """
+        policy = self.policy(entity)
+        if policy is None:
+            return fetch(), "uncached"
+        key = self.make_key(entity, entity_id, scope)
+        entry = self._lookup(key)
+        if entry is not None:
+            age = time.time() - entry[0]
+            if age < policy.ttl:
+                self._count("fresh_hits")
+                return entry[1], "fresh"
+            if age < policy.ttl + policy.stale_ttl:
+                self._count("stale_hits")
+                self._background_refresh(key, fetch)
+                return entry[1], "stale"
+
+        self._count("misses")
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+            else:
+                self._stats["coalesced"] += 1
+        if owner:
+            self._refresh(key, fetch, future)
+        return future.result(), "miss"
+
+    def get(self, entity: str, entity_id: Any, fetch: Callable[[], Any], scope: str = "") -> Any:
+        """Like lookup(), returning only the entity data."""
+        return self.lookup(entity, entity_id, fetch, scope)[0]
+
+    def invalidate(self, entity: str, entity_id: Any, scope: str = "") -> None:
+        """Drop an entity from the in-process LRU so the next get re-reads the store."""
+        with self._lock:
+            self._lru.pop(self.make_key(entity, entity_id, scope), None)
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Wait for the background refreshes started so far."""
+        with self._lock:
+            pending = list(self._inflight.values())
+        wait(pending, timeout=timeout)
+
+    def close(self) -> None:
+        """Stop the refresh threads once running refreshes finish."""
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/stale/miss counters.
+
+        Returns:
+            Counters plus the share of lookups answered without waiting
+            and the current LRU size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+            stats["refreshing"] = len(self._inflight)
+        lookups = stats["fresh_hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["fresh_hits"] + stats["stale_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangumi Entity Cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Show cache database size")
+    stats_parser.add_argument("db", help="SQLite cache path")
+    purge_parser = subparsers.add_parser("purge", help="Delete old entries")
+    purge_parser.add_argument("db", help="SQLite cache path")
+    purge_parser.add_argument("--older-than", type=float, default=30,
+                              help="Age in days (default: 30, the longest default stale window)")
+    args = parser.parse_args()
+
+    store = SQLiteEntityStore(args.db)
+    if args.command == "stats":
+        print(f"Entries: {store.count()}")
+    elif args.command == "purge":
+        print(f"Removed {store.purge_older_than(args.older_than * DAY)} entries")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Client Benchmark Suite
+
+Measures VNDBClient, BangumiAPI and SteamAPI against the fixture replay
+server, so performance changes can be judged without the live services.
+
+Each workload runs in its own subprocess (clean imports and a per-workload
+peak RSS) and repeats one operation: a single lookup or search, a bulk
+lookup, or a full paging walk. Reported per workload:
+
+- ops/s and requests/s (requests as counted by the replay server)
+- p50/p99/mean/max latency of one operation
+- request and response body bytes, and the server's status counts
+- tracemalloc peak and retained bytes over a short second pass
+- peak RSS of the worker process
+
+Results are written as JSON; "compare" diffs two result files and exits
+non-zero when a metric regresses past a threshold.
+
+Usage:
+    python bench_clients.py run --out results.json
+    python bench_clients.py run --workloads steam-bulk,vndb-paging --latency-ms 30 \\
+        --throttle-rate 0.02 --out results.json
+    python bench_clients.py compare baseline.json results.json --threshold 10
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import resource
+import tempfile
+import tracemalloc
+import subprocess
+import contextlib
+import urllib.request
+from typing import Dict, Any, Callable, List, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+for _skill in ("vndb-api", "bangumi-api", "steam-api"):
+    _scripts = os.path.join(REPO_DIR, _skill, "scripts")
+    if _scripts not in sys.path:
+        sys.path.append(_scripts)
+
+from fixtures import (BANGUMI_LOOKUP_IDS, STEAM_APP_PAGE, STEAM_BULK_IDS, STEAM_FIRST_ID,
+                      synthetic_fixtures, write_fixtures)
+
+ALLOC_PASS_OPS = 10
+# Metrics where a larger value is a regression
+LOWER_IS_BETTER = ("latency_p50_ms", "latency_p99_ms", "latency_mean_ms", "bytes_out_per_op",
+                   "alloc_peak_bytes", "alloc_retained_bytes", "peak_rss_kb")
+HIGHER_IS_BETTER = ("ops_per_sec", "requests_per_sec")
+
+Operation = Callable[[int], int]
+
+
+def _vndb_client(server: str):
+    from vndb_query import VNDBClient
+    return VNDBClient(base_url=f"{server}/vndb")
+
+
+def _bangumi_client(server: str):
+    from bangumi_api_example import BangumiAPI
+    api = BangumiAPI("bench-token")
+    api.BASE_URL = f"{server}/bangumi"
+    return api
+
+
+def _steam_client(server: str):
+    from steam_api_example import SteamAPI
+    api = SteamAPI("bench-key")
+    api.BASE_URL = f"{server}/steam"
+    return api
+
+
+def _steam_bulk(server: str) -> Operation:
+    api = _steam_client(server)
+    steamids = [str(STEAM_FIRST_ID + i) for i in range(STEAM_BULK_IDS)]
+
+    def op(i: int) -> int:
+        return len(api.get_player_summaries_batch(steamids).failed)
+    return op
+
+
+def _steam_paging(server: str) -> Operation:
+    from steam_catalog import fetch_app_list
+    api = _steam_client(server)
+
+    def op(i: int) -> int:
+        sum(1 for _ in fetch_app_list(api, max_results=STEAM_APP_PAGE))
+        return 0
+    return op
+
+
+def _vndb_lookup(server: str) -> Operation:
+    client = _vndb_client(server)
+
+    def op(i: int) -> int:
+        client.post("vn", {"filters": ["id", "=", f"v{i + 1}"],
+                           "fields": "title,alttitle,released,rating"})
+        return 0
+    return op
+
+
+def _vndb_paging(server: str) -> Operation:
+    from vndb_query import iter_entries
+    client = _vndb_client(server)
+
+    def op(i: int) -> int:
+        sum(1 for _ in iter_entries(client, "vn", "title,alttitle,released,rating"))
+        return 0
+    return op
+
+
+def _vndb_search(server: str) -> Operation:
+    client = _vndb_client(server)
+
+    def op(i: int) -> int:
+        client.post("vn", {"filters": ["search", "=", f"query {i}"],
+                           "fields": "title,released,rating", "sort": "searchrank"})
+        return 0
+    return op
+
+
+def _bangumi_lookup(server: str) -> Operation:
+    api = _bangumi_client(server)
+
+    def op(i: int) -> int:
+        api.get_subject(i % BANGUMI_LOOKUP_IDS + 1)
+        return 0
+    return op
+
+
+def _bangumi_paging(server: str) -> Operation:
+    api = _bangumi_client(server)
+
+    def op(i: int) -> int:
+        sum(1 for _ in api.iter_subjects(4))
+        return 0
+    return op
+
+
+def _bangumi_search(server: str) -> Operation:
+    api = _bangumi_client(server)
+
+    def op(i: int) -> int:
+        api.search_subjects(f"query {i}", filter={"type": [4]})
+        return 0
+    return op
+
+
+# name -> (description, default operation count, operation factory)
+WORKLOADS: Dict[str, Tuple[str, int, Callable[[str], Operation]]] = {
+    "steam-bulk": ("get_player_summaries_batch of 500 IDs", 50, _steam_bulk),
+    "steam-paging": ("full IStoreService/GetAppList walk", 10, _steam_paging),
+    "vndb-lookup": ("single POST /vn by ID", 300, _vndb_lookup),
+    "vndb-paging": ("iter_entries over /vn", 10, _vndb_paging),
+    "vndb-search": ("POST /vn search", 300, _vndb_search),
+    "bangumi-lookup": ("GET /v0/subjects/{id}", 300, _bangumi_lookup),
+    "bangumi-paging": ("iter_subjects(4)", 10, _bangumi_paging),
+    "bangumi-search": ("POST /v0/search/subjects", 300, _bangumi_search),
+}
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _server_call(server: str, path: str, method: str = "GET") -> Dict[str, Any]:
+    request = urllib.request.Request(f"{server}{path}", method=method,
+                                     data=b"" if method == "POST" else None)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def _run_ops(op: Operation, count: int) -> Tuple[List[float], int]:
+    """Run an operation count times; return latencies (s) and error count."""
+    latencies: List[float] = []
+    errors = 0
+    # Clients print errors (and VNDB's exits); keep the harness output clean.
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        for i in range(count):
+            started = time.perf_counter()
+            try:
+                if op(i):
+                    errors += 1
+            except (Exception, SystemExit):
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+    return latencies, errors
+
+
+def run_workload(name: str, server: str, ops: int, alloc: bool = True) -> Dict[str, Any]:
+    """
+    Run one workload in the current process.
+
+    Args:
+        name: Workload name (see WORKLOADS)
+        server: Replay server base URL
+        ops: Number of operations in the timed pass
+        alloc: Also run a short tracemalloc pass
+
+    Returns:
+        Metrics for the workload
+    """
+    description, _, factory = WORKLOADS[name]
+    op = factory(server)
+    _run_ops(op, 1)  # warm-up: lazy imports and connection pools
+
+    _server_call(server, "/_replay/reset", "POST")
+    started = time.perf_counter()
+    latencies, errors = _run_ops(op, ops)
+    elapsed = time.perf_counter() - started
+    served = _server_call(server, "/_replay/stats")
+
+    latencies.sort()
+    result: Dict[str, Any] = {
+        "workload": name,
+        "description": description,
+        "ops": ops,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(ops / elapsed, 2) if elapsed else 0.0,
+        "requests": served["requests"],
+        "requests_per_sec": round(served["requests"] / elapsed, 2) if elapsed else 0.0,
+        "latency_p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "latency_p99_ms": round(_percentile(latencies, 0.99) * 1000, 3),
+        "latency_mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "latency_max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "bytes_in": served["bytes_in"],
+        "bytes_out": served["bytes_out"],
+        "bytes_out_per_op": served["bytes_out"] // ops if ops else 0,
+        "status": served["status"],
+        "unmatched": served["unmatched"],
+    }
+
+    if alloc:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        _run_ops(op, min(ops, ALLOC_PASS_OPS))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["alloc_peak_bytes"] = peak - before
+        result["alloc_retained_bytes"] = current - before
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    result["peak_rss_kb"] = rss // 1024 if sys.platform == "darwin" else rss
+    return result
+
+
+def _start_server(fixtures: str, args: argparse.Namespace) -> Tuple[subprocess.Popen, str]:
+    """Start replay_server.py as a subprocess and return it with its URL."""
+    command = [sys.executable, os.path.join(BENCH_DIR, "replay_server.py"), "serve", fixtures,
+               "--port", "0", "--latency-ms", str(args.latency_ms),
+               "--jitter-ms", str(args.jitter_ms), "--error-rate", str(args.error_rate),
+               "--throttle-rate", str(args.throttle_rate), "--retry-after", str(args.retry_after),
+               "--seed", str(args.seed)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    first_line = process.stdout.readline()
+    if " on " not in first_line:
+        process.kill()
+        raise RuntimeError(f"Replay server failed to start: {first_line!r}")
+    return process, first_line.rsplit(" on ", 1)[1].strip()
+
+
+def run_suite(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the selected workloads, each in a worker subprocess."""
+    names = args.workloads.split(",") if args.workloads else list(WORKLOADS)
+    unknown = [name for name in names if name not in WORKLOADS]
+    if unknown:
+        raise ValueError(f"Unknown workloads: {', '.join(unknown)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = args.fixtures
+        if not fixtures:
+            fixtures = os.path.join(tmp, "fixtures.ndjson")
+            write_fixtures(fixtures, synthetic_fixtures(args.seed, args.scale))
+        process, server = (None, args.server) if args.server else _start_server(fixtures, args)
+        results = []
+        try:
+            for name in names:
+                result_path = os.path.join(tmp, f"{name}.json")
+                ops = max(1, int(WORKLOADS[name][1] * args.ops_factor))
+                command = [sys.executable, os.path.abspath(__file__), "worker", name,
+                           "--server", server, "--ops", str(ops), "--result-file", result_path]
+                if args.no_alloc:
+                    command.append("--no-alloc")
+                subprocess.run(command, check=True)
+                with open(result_path, encoding="utf-8") as f:
+                    result = json.load(f)
+                results.append(result)
+                print(f"{name:16} {result['ops_per_sec']:9.1f} ops/s {result['requests_per_sec']:9.1f} req/s "
+                      f"p50 {result['latency_p50_ms']:8.2f} ms  p99 {result['latency_p99_ms']:8.2f} ms  "
+                      f"errors {result['errors']}", flush=True)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fixtures": args.fixtures or f"synthetic(seed={args.seed}, scale={args.scale})",
+            "faults": {"latency_ms": args.latency_ms, "jitter_ms": args.jitter_ms,
+                       "error_rate": args.error_rate, "throttle_rate": args.throttle_rate,
+                       "retry_after": args.retry_after, "seed": args.seed},
+        },
+        "results": results,
+    }
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any],
+                    threshold: float) -> Tuple[List[str], List[str]]:
+    """
+    Diff two result files.
+
+    Args:
+        baseline: Earlier results
+        current: New results
+        threshold: Percent change counted as a regression
+
+    Returns:
+        (report lines, regression lines)
+    """
+    before = {result["workload"]: result for result in baseline["results"]}
+    lines: List[str] = []
+    regressions: List[str] = []
+    for result in current["results"]:
+        old = before.get(result["workload"])
+        if old is None:
+            continue
+        for metric in HIGHER_IS_BETTER + LOWER_IS_BETTER:
+            if metric not in result or not old.get(metric):
+                continue
+            change = (result[metric] - old[metric]) / old[metric] * 100
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            line = (f"{result['workload']:16} {metric:22} {old[metric]:>14} -> "
+                    f"{result[metric]:>14} ({change:+.1f}%)")
+            lines.append(line)
+            if worse > threshold:
+                regressions.append(line)
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Client Benchmark Suite")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run workloads against a replay server")
+    run_parser.add_argument("--out", help="Write JSON results to this path")
+    run_parser.add_argument("--workloads", help=f"Comma-separated subset of: {', '.join(WORKLOADS)}")
+    run_parser.add_argument("--fixtures", help="Fixture NDJSON (default: synthetic fixtures)")
+    run_parser.add_argument("--server", help="Use a running replay server instead of starting one")
+    run_parser.add_argument("--scale", type=int, default=1, help="Synthetic catalog size multiplier")
+    run_parser.add_argument("--ops-factor", type=float, default=1.0,
+                            help="Multiplier for each workload's operation count")
+    run_parser.add_argument("--latency-ms", type=float, default=0.0)
+    run_parser.add_argument("--jitter-ms", type=float, default=0.0)
+    run_parser.add_argument("--error-rate", type=float, default=0.0)
+    run_parser.add_argument("--throttle-rate", type=float, default=0.0)
+    run_parser.add_argument("--retry-after", type=int, default=1)
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--no-alloc", action="store_true", help="Skip the tracemalloc pass")
+
+    compare_parser = subparsers.add_parser("compare", help="Diff two result files")
+    compare_parser.add_argument("baseline", help="Earlier results JSON")
+    compare_parser.add_argument("current", help="New results JSON")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Percent change reported as a regression")
+
+    worker_parser = subparsers.add_parser("worker", help=argparse.SUPPRESS)
+    worker_parser.add_argument("workload", choices=list(WORKLOADS))
+    worker_parser.add_argument("--server", required=True)
+    worker_parser.add_argument("--ops", type=int, required=True)
+    worker_parser.add_argument("--result-file", required=True)
+    worker_parser.add_argument("--no-alloc", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "worker":
+        result = run_workload(args.workload, args.server, args.ops, alloc=not args.no_alloc)
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    if args.command == "compare":
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        with open(args.current, encoding="utf-8") as f:
+            current = json.load(f)
+        lines, regressions = compare_results(baseline, current, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold}%:")
+            print("\n".join(regressions))
+            sys.exit(1)
+        return
+
+    try:
+        report = run_suite(args)
+    except (ValueError, RuntimeError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Benchmark
+
+Times cold runs of the galskills CLI (gal-cli) and the per-skill scripts as
+fresh subprocesses: "--help" and queries answered from a pre-warmed cache.
+Interpreter startup differs a lot between hosts (site-packages hooks alone
+can cost tens of milliseconds), so every case is also reported as overhead
+over a bare "python -c pass" measured in the same run.
+
+Cached cases are warmed once against an in-process replay server (see
+replay_server.py); the timed runs never reach the network. Bytecode is
+cached under a temporary PYTHONPYCACHEPREFIX, so module compilation is not
+timed and the source tree stays clean.
+
+Usage:
+    python bench_startup.py
+    python bench_startup.py --repeat 50 --out startup.json
+    python bench_startup.py --cases galskills-help,bgm-cached --budget-ms 50
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from typing import Dict, Any, List
+
+from fixtures import STEAM_FIRST_ID, synthetic_fixtures, write_fixtures
+from replay_server import start_server
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+GALSKILLS = os.path.join(REPO_DIR, "gal-cli", "scripts", "galskills")
+
+BASELINE = "python"
+# name -> (arguments after the interpreter, needs a warm cache)
+CASES: Dict[str, Any] = {
+    BASELINE: (["-c", "pass"], False),
+    "galskills-help": ([GALSKILLS, "--help"], False),
+    "galskills-steam-help": ([GALSKILLS, "steam", "--help"], False),
+    "galskills-py-help": ([GALSKILLS + ".py", "--help"], False),
+    "steam-example-help": ([os.path.join(REPO_DIR, "steam-api", "scripts", "steam_api_example.py"),
+                            "--help"], False),
+    "vndb-query-help": ([os.path.join(REPO_DIR, "vndb-api", "scripts", "vndb_query.py"), "help"], False),
+    "vndb-cached": ([GALSKILLS, "vndb", "stats"], True),
+    "bgm-cached": ([GALSKILLS, "bgm", "subject", "1"], True),
+    "steam-cached": ([GALSKILLS, "steam", "summary", str(STEAM_FIRST_ID)], True),
+}
+
+
+def _run(args: List[str], env: Dict[str, str]) -> float:
+    """Run one case and return its wall time in milliseconds."""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable] + args, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    elapsed = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with {result.returncode}: "
+                           f"{result.stderr.decode(errors='replace').strip()}")
+    return elapsed
+
+
+def run_benchmark(names: List[str], repeat: int) -> Dict[str, Any]:
+    """
+    Time the selected cases.
+
+    Runs are interleaved across cases so that host noise affects all of them
+    alike. The baseline is always included.
+
+    Args:
+        names: Case names
+        repeat: Timed runs per case
+
+    Returns:
+        Report with per-case median/min/p90 and overhead over the baseline
+    """
+    if BASELINE not in names:
+        names = [BASELINE] + names
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = os.path.join(tmp, "fixtures.ndjson")
+        write_fixtures(fixtures, synthetic_fixtures())
+        server = start_server(fixtures)
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        env = dict(os.environ, GALSKILLS_CACHE=os.path.join(tmp, "cache.db"),
+                   GALSKILLS_VNDB_URL=f"{base}/vndb", GALSKILLS_BANGUMI_URL=f"{base}/bangumi",
+                   GALSKILLS_STEAM_URL=f"{base}/steam", BGM_TOKEN="bench-token",
+                   STEAM_API_KEY="bench-key", PYTHONPYCACHEPREFIX=os.path.join(tmp, "pycache"))
+        # Measure with bytecode caching, as an installed tool would run
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        try:
+            # Warm the cache and the bytecode caches, then stop the server so
+            # a cache miss fails loudly instead of being timed.
+            for name in names:
+                _run(CASES[name][0], env)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        samples: Dict[str, List[float]] = {name: [] for name in names}
+        for _ in range(repeat):
+            for name in names:
+                samples[name].append(_run(CASES[name][0], env))
+
+    baseline = statistics.median(samples[BASELINE])
+    results = []
+    for name in names:
+        values = sorted(samples[name])
+        median = statistics.median(values)
+        results.append({
+            "case": name,
+            "cached": CASES[name][1],
+            "median_ms": round(median, 2),
+            "min_ms": round(values[0], 2),
+            "p90_ms": round(values[min(len(values) - 1, int(len(values) * 0.9))], 2),
+            "overhead_ms": round(median - baseline, 2),
+        })
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI Startup Benchmark")
+    parser.add_argument("--cases", help=f"Comma-separated subset of: {', '.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per case")
+    parser.add_argument("--out", help="Write JSON results to this path")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Exit 1 if any case's overhead over the baseline exceeds this")
+    args = parser.parse_args()
+
+    names = args.cases.split(",") if args.cases else list(CASES)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        print(f"Error: Unknown cases: {', '.join(unknown)}")
+        sys.exit(1)
+
+    try:
+        report = run_benchmark(names, args.repeat)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print(f"{'case':24} {'median ms':>10} {'min ms':>8} {'p90 ms':>8} {'overhead':>9}")
+    for result in report["results"]:
+        print(f"{result['case']:24} {result['median_ms']:10.1f} {result['min_ms']:8.1f} "
+              f"{result['p90_ms']:8.1f} {result['overhead_ms']:+9.1f}")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Results written to {args.out}")
+
+    if args.budget_ms is not None:
+        over = [r["case"] for r in report["results"] if r["overhead_ms"] > args.budget_ms]
+        if over:
+            print(f"\nOver the {args.budget_ms} ms budget: {', '.join(over)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Replay Fixtures
+
+Fixture files are NDJSON, one recorded exchange per line:
+
+    {"service": "steam", "method": "GET",
+     "path": "/ISteamUser/GetPlayerSummaries/v2/",
+     "query": {"steamids": "7656..."}, "body": null,
+     "status": 200, "headers": {}, "response": {...}}
+
+"query" and "body" are match conditions: every listed key must be present
+in the request with an equal value, and a key listed as null must be
+absent. A missing or null "query"/"body" matches any request. When several
+exchanges match, the one with the most conditions wins, then the earliest.
+
+This module also generates a deterministic synthetic fixture set with the
+shapes of the VNDB, Bangumi and Steam endpoints used by the benchmarks, for
+when no recording is at hand.
+
+Usage:
+    python fixtures.py synthetic fixtures.ndjson --seed 1 --scale 1
+"""
+
+import json
+import random
+import argparse
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+
+SERVICES = ("vndb", "bangumi", "steam")
+
+# Entry counts per paged catalog at scale 1
+VNDB_ENTRIES = 1000
+BANGUMI_SUBJECTS = 1000
+BANGUMI_LOOKUP_IDS = 200
+STEAM_APPS = 20000
+STEAM_APP_PAGE = 5000
+STEAM_PLAYERS_PER_PAGE = 100
+STEAM_BULK_IDS = 500
+STEAM_FIRST_ID = 76561197960265728
+
+_SYLLABLES = ["ka", "ki", "no", "shi", "ra", "ma", "ne", "ko", "to", "ri", "sa", "yu",
+              "mi", "ha", "ru", "na", "tsu", "hi", "o", "sora", "hoshi", "yume"]
+_KANA = "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわ恋夜空花君僕星月雪"
+
+
+def load_fixtures(path: str) -> List[Dict[str, Any]]:
+    """Read a fixture NDJSON file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_fixtures(path: str, exchanges: Iterable[Dict[str, Any]]) -> int:
+    """
+    Write exchanges to a fixture NDJSON file.
+
+    Args:
+        path: Output path
+        exchanges: Fixture exchanges
+
+    Returns:
+        Number of exchanges written
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for exchange in exchanges:
+            f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def exchange(service: str, method: str, path: str, response: Any,
+             query: Optional[Dict[str, Any]] = None, body: Optional[Dict[str, Any]] = None,
+             status: int = 200) -> Dict[str, Any]:
+    """Build one fixture exchange."""
+    return {"service": service, "method": method, "path": path,
+            "query": query, "body": body, "status": status, "headers": {},
+            "response": response}
+
+
+def _title(rng: random.Random) -> str:
+    words = ["".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4)))
+             for _ in range(rng.randint(1, 4))]
+    return " ".join(words).title()
+
+
+def _jtitle(rng: random.Random) -> str:
+    return "".join(rng.choice(_KANA) for _ in range(rng.randint(3, 12)))
+
+
+def _vndb(rng: random.Random, scale: int) -> Iterator[Dict[str, Any]]:
+    total = VNDB_ENTRIES * scale
+    vns = [{"id": f"v{i}", "title": _title(rng), "alttitle": _jtitle(rng),
+            "released": f"{rng.randint(1995, 2025)}-{rng.randint(1, 12):02d}-01",
+            "rating": round(rng.uniform(40, 90), 2), "votecount": rng.randint(0, 20000),
+            "length_minutes": rng.randint(60, 6000)}
+           for i in range(1, total + 1)]
+
+    # iter_entries(client, "vn", ...) pages: first page has no filter,
+    # later pages filter on the last ID seen.
+    for start in range(0, total, 100):
+        page = vns[start:start + 100]
+        more = start + 100 < total
+        condition = {"sort": "id", "filters": None if start == 0 else ["id", ">", vns[start - 1]["id"]]}
+        yield exchange("vndb", "POST", "/vn", {"results": page, "more": more}, body=condition)
+
+    # Searches and single lookups: any other /vn query
+    yield exchange("vndb", "POST", "/vn", {"results": vns[:10], "more": True})
+    yield exchange("vndb", "GET", "/stats", {"chars": 110000, "producers": 15000, "releases": 100000,
+                                             "staff": 30000, "tags": 3000, "traits": 3000,
+                                             "vn": 50000})
+
+
+def _bangumi(rng: random.Random, scale: int) -> Iterator[Dict[str, Any]]:
+    total = BANGUMI_SUBJECTS * scale
+    subjects = [{"id": i, "type": 4, "name": _jtitle(rng), "name_cn": _jtitle(rng),
+                 "summary": _jtitle(rng) * 8, "date": f"{rng.randint(1995, 2025)}-01-01",
+                 "platform": "PC", "images": {"large": f"https://lain.bgm.tv/pic/cover/l/{i}.jpg"},
+                 "infobox": [{"key": "别名", "value": [{"v": _title(rng)}]}],
+                 "rating": {"score": round(rng.uniform(4, 9), 1), "total": rng.randint(0, 5000)},
+                 "tags": [{"name": _jtitle(rng), "count": rng.randint(1, 500)} for _ in range(5)]}
+                for i in range(1, total + 1)]
+
+    # iter_subjects(4, page_size=50) pages
+    for offset in range(0, total, 50):
+        yield exchange("bangumi", "GET", "/v0/subjects",
+                       {"total": total, "limit": 50, "offset": offset,
+                        "data": subjects[offset:offset + 50]},
+                       query={"type": "4", "limit": "50", "offset": str(offset)})
+
+    for subject in subjects[:BANGUMI_LOOKUP_IDS]:
+        yield exchange("bangumi", "GET", f"/v0/subjects/{subject['id']}", subject)
+    yield exchange("bangumi", "POST", "/v0/search/subjects",
+                   {"total": 10, "limit": 10, "offset": 0, "data": subjects[:10]})
+
+
+def _steam(rng: random.Random, scale: int) -> Iterator[Dict[str, Any]]:
+    players = [{"steamid": str(STEAM_FIRST_ID + i), "communityvisibilitystate": 3,
+                "profilestate": 1, "personaname": _title(rng),
+                "profileurl": f"https://steamcommunity.com/profiles/{STEAM_FIRST_ID + i}/",
+                "avatar": "https://avatars.steamstatic.com/0.jpg", "personastate": rng.randint(0, 6),
+                "lastlogoff": rng.randint(1600000000, 1700000000), "timecreated": 1300000000}
+               for i in range(STEAM_BULK_IDS)]
+    # One exchange per 100-ID chunk of the bulk lookup, plus a catch-all
+    for start in range(0, STEAM_BULK_IDS, STEAM_PLAYERS_PER_PAGE):
+        chunk = players[start:start + STEAM_PLAYERS_PER_PAGE]
+        yield exchange("steam", "GET", "/ISteamUser/GetPlayerSummaries/v2/",
+                       {"response": {"players": chunk}},
+                       query={"steamids": ",".join(p["steamid"] for p in chunk)})
+    yield exchange("steam", "GET", "/ISteamUser/GetPlayerSummaries/v2/",
+                   {"response": {"players": players[:STEAM_PLAYERS_PER_PAGE]}})
+
+    total = STEAM_APPS * scale
+    apps = [{"appid": 10 * i, "name": _title(rng), "last_modified": rng.randint(1500000000, 1700000000),
+             "price_change_number": rng.randint(0, 30000000)} for i in range(1, total + 1)]
+    last_appid = 0
+    for start in range(0, total, STEAM_APP_PAGE):
+        page = apps[start:start + STEAM_APP_PAGE]
+        response = {"apps": page}
+        if start + STEAM_APP_PAGE < total:
+            response.update(have_more_results=True, last_appid=page[-1]["appid"])
+        yield exchange("steam", "GET", "/IStoreService/GetAppList/v1/", {"response": response},
+                       query={"last_appid": str(last_appid), "max_results": str(STEAM_APP_PAGE)})
+        last_appid = page[-1]["appid"]
+
+    yield exchange("steam", "GET", "/ISteamUserStats/GetNumberOfCurrentPlayers/v1/",
+                   {"response": {"player_count": 12345, "result": 1}})
+
+
+def synthetic_fixtures(seed: int = 1, scale: int = 1) -> List[Dict[str, Any]]:
+    """
+    Generate a deterministic fixture set for the benchmark workloads.
+
+    Args:
+        seed: Random seed
+        scale: Multiplier for the size of paged catalogs
+
+    Returns:
+        Fixture exchanges for all three services
+    """
+    rng = random.Random(seed)
+    return [*_vndb(rng, scale), *_bangumi(rng, scale), *_steam(rng, scale)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Fixtures")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    synthetic_parser = subparsers.add_parser("synthetic", help="Write a synthetic fixture set")
+    synthetic_parser.add_argument("out", help="Output NDJSON path")
+    synthetic_parser.add_argument("--seed", type=int, default=1)
+    synthetic_parser.add_argument("--scale", type=int, default=1, help="Catalog size multiplier")
+    args = parser.parse_args()
+
+    count = write_fixtures(args.out, synthetic_fixtures(args.seed, args.scale))
+    print(f"Wrote {count} exchanges to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Fixture Replay Server
+
+Local HTTP stand-in for the VNDB Kana, Bangumi v0 and Steam Web API
+endpoints used by the skill scripts. Each service is served under its own
+prefix, so clients only need their base URL changed:
+
+    VNDBClient(base_url="http://127.0.0.1:8765/vndb")
+    bangumi.BASE_URL = "http://127.0.0.1:8765/bangumi"
+    steam.BASE_URL = "http://127.0.0.1:8765/steam"
+
+Responses come from a fixture file (see fixtures.py). Latency, 5xx errors
+and 429 throttling can be injected at configurable rates. Counters are
+served at /_replay/stats and cleared with POST /_replay/reset.
+
+In record mode the server instead forwards every request to the live
+service and appends the exchange to a fixture file. API keys and
+Authorization headers are forwarded but never recorded.
+
+Usage:
+    python replay_server.py serve fixtures.ndjson --port 8765 --latency-ms 40 \\
+        --jitter-ms 10 --error-rate 0.01 --throttle-rate 0.02
+    python replay_server.py record recorded.ndjson --port 8765
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from dataclasses import dataclass
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl
+from typing import Optional, Dict, Any, List, Tuple
+
+from fixtures import SERVICES, load_fixtures
+
+UPSTREAMS = {
+    "vndb": "https://api.vndb.org/kana",
+    "bangumi": "https://api.bgm.tv",
+    "steam": "https://api.steampowered.com",
+}
+# Never matched on or recorded
+SECRET_PARAMS = ("key",)
+
+
+@dataclass
+class FaultConfig:
+    """Injected latency and failure rates."""
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    retry_after: int = 1
+    seed: Optional[int] = None
+
+
+def _conditions_match(conditions: Optional[Dict[str, Any]], actual: Dict[str, Any]) -> Optional[int]:
+    """Return how many conditions hold, or None if any fails."""
+    if not conditions:
+        return 0
+    for key, expected in conditions.items():
+        if expected is None:
+            if key in actual:
+                return None
+        elif actual.get(key) != expected:
+            return None
+    return len(conditions)
+
+
+class FixtureTable:
+    """Fixture exchanges indexed by (service, method, path)."""
+
+    def __init__(self, exchanges: List[Dict[str, Any]]):
+        """
+        Index fixture exchanges.
+
+        Args:
+            exchanges: Exchanges as read by fixtures.load_fixtures()
+        """
+        self._routes: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for exchange in exchanges:
+            query = exchange.get("query")
+            if query:
+                # Query strings arrive as text; compare them as text.
+                exchange = dict(exchange, query={k: None if v is None else str(v)
+                                                 for k, v in query.items()})
+            key = (exchange["service"], exchange["method"].upper(), exchange["path"])
+            self._routes.setdefault(key, []).append(exchange)
+
+    def __len__(self) -> int:
+        return sum(len(candidates) for candidates in self._routes.values())
+
+    def find(self, service: str, method: str, path: str, query: Dict[str, str],
+             body: Any) -> Optional[Dict[str, Any]]:
+        """
+        Find the most specific exchange matching a request.
+
+        Args:
+            service: Service prefix
+            method: HTTP method
+            path: Path below the service prefix
+            query: Query parameters without secrets
+            body: Decoded JSON body (None if absent)
+
+        Returns:
+            Matching exchange, or None
+        """
+        best, best_score = None, -1
+        body_fields = body if isinstance(body, dict) else {}
+        for exchange in self._routes.get((service, method, path), []):
+            query_score = _conditions_match(exchange.get("query"), query)
+            if query_score is None:
+                continue
+            body_score = _conditions_match(exchange.get("body"), body_fields)
+            if body_score is None:
+                continue
+            if query_score + body_score > best_score:
+                best, best_score = exchange, query_score + body_score
+        return best
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding fixtures, fault settings and counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], fixtures: Optional[FixtureTable] = None,
+                 faults: Optional[FaultConfig] = None, record_path: Optional[str] = None):
+        """
+        Create the server.
+
+        Args:
+            address: (host, port) to bind; port 0 picks a free port
+            fixtures: Fixtures to replay (replay mode)
+            faults: Injected latency and failures (replay mode)
+            record_path: Fixture file to append to (record mode)
+        """
+        super().__init__(address, ReplayHandler)
+        self.fixtures = fixtures or FixtureTable([])
+        self.faults = faults or FaultConfig()
+        self.record_path = record_path
+        self._rng = random.Random(self.faults.seed)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Any] = {}
+        self.reset_stats()
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self) -> None:
+        """Clear the request counters."""
+        with self._lock:
+            self._stats = {"requests": 0, "bytes_in": 0, "bytes_out": 0,
+                           "unmatched": 0, "status": {}, "services": {}}
+
+    def stats(self) -> Dict[str, Any]:
+        """Return a copy of the request counters."""
+        with self._lock:
+            return json.loads(json.dumps(self._stats))
+
+    def count(self, service: str, status: int, bytes_in: int, bytes_out: int,
+              unmatched: bool = False) -> None:
+        """Record one served request."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["bytes_in"] += bytes_in
+            self._stats["bytes_out"] += bytes_out
+            self._stats["unmatched"] += int(unmatched)
+            status_counts = self._stats["status"]
+            status_counts[str(status)] = status_counts.get(str(status), 0) + 1
+            self._stats["services"][service] = self._stats["services"].get(service, 0) + 1
+
+    def draw_fault(self) -> Tuple[float, Optional[int]]:
+        """Draw (delay in seconds, injected status or None) for one request."""
+        faults = self.faults
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(faults.latency_ms, faults.jitter_ms)
+                        if faults.jitter_ms else faults.latency_ms) / 1000
+            roll = self._rng.random()
+        if roll < faults.throttle_rate:
+            return delay, 429
+        if roll < faults.throttle_rate + faults.error_rate:
+            return delay, 503
+        return delay, None
+
+    def record(self, exchange: Dict[str, Any]) -> None:
+        """Append an exchange to the record file."""
+        with self._lock, open(self.record_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(exchange, ensure_ascii=False) + "\n")
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves fixtures, or proxies and records in record mode."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY
+    # keep-alive clients stall on delayed ACKs.
+    disable_nagle_algorithm = True
+    server: ReplayServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send_json(self, status: int, payload: Any,
+                   headers: Optional[Dict[str, str]] = None) -> int:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return len(body)
+
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _control(self, path: str) -> None:
+        if path == "/_replay/stats":
+            self._send_json(200, self.server.stats())
+        elif path == "/_replay/reset" and self.command == "POST":
+            self.server.reset_stats()
+            self._send_json(200, {"ok": True})
+        else:
+            self._send_json(404, {"error": f"Unknown control path {path}"})
+
+    def _handle(self) -> None:
+        raw_body = self._read_body()
+        parts = urlsplit(self.path)
+        if parts.path.startswith("/_replay/"):
+            self._control(parts.path)
+            return
+
+        service, _, rest = parts.path.lstrip("/").partition("/")
+        path = "/" + rest
+        if service not in SERVICES:
+            self._send_json(404, {"error": f"Unknown service prefix /{service}"})
+            return
+        query = {k: v for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                 if k not in SECRET_PARAMS}
+        try:
+            body = json.loads(raw_body) if raw_body else None
+        except ValueError:
+            body = None
+
+        if self.server.record_path:
+            self._proxy(service, path, parts.query, raw_body, query, body)
+            return
+
+        delay, injected = self.server.draw_fault()
+        if delay:
+            time.sleep(delay)
+        if injected == 429:
+            sent = self._send_json(429, {"error": "Too Many Requests (injected)"},
+                                   {"Retry-After": str(self.server.faults.retry_after)})
+            self.server.count(service, 429, len(raw_body), sent)
+            return
+        if injected:
+            sent = self._send_json(injected, {"error": "Service Unavailable (injected)"})
+            self.server.count(service, injected, len(raw_body), sent)
+            return
+
+        exchange = self.server.fixtures.find(service, self.command, path, query, body)
+        if exchange is None:
+            sent = self._send_json(404, {"error": f"No fixture for {self.command} /{service}{path}"})
+            self.server.count(service, 404, len(raw_body), sent, unmatched=True)
+            return
+        sent = self._send_json(exchange.get("status", 200), exchange.get("response"),
+                               exchange.get("headers"))
+        self.server.count(service, exchange.get("status", 200), len(raw_body), sent)
+
+    def _proxy(self, service: str, path: str, raw_query: str, raw_body: bytes,
+               query: Dict[str, str], body: Any) -> None:
+        url = UPSTREAMS[service] + path + (f"?{raw_query}" if raw_query else "")
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() in ("authorization", "content-type", "accept", "user-agent")}
+        request = urllib.request.Request(url, data=raw_body or None, headers=headers,
+                                         method=self.command)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                status, payload = response.getcode(), response.read()
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+        except urllib.error.URLError as e:
+            sent = self._send_json(502, {"error": f"Upstream error: {e.reason}"})
+            self.server.count(service, 502, len(raw_body), sent)
+            return
+        try:
+            response_data = json.loads(payload) if payload else None
+        except ValueError:
+            response_data = payload.decode("utf-8", "replace")
+
+        self.server.record({"service": service, "method": self.command, "path": path,
+                            "query": query or None, "body": body, "status": status,
+                            "headers": {}, "response": response_data})
+        sent = self._send_json(status, response_data)
+        self.server.count(service, status, len(raw_body), sent)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
+
+
+def start_server(fixtures_path: Optional[str], host: str = "127.0.0.1", port: int = 0,
+                 faults: Optional[FaultConfig] = None,
+                 record_path: Optional[str] = None) -> ReplayServer:
+    """
+    Start a replay server on a background thread.
+
+    Args:
+        fixtures_path: Fixture NDJSON to replay (None in record mode)
+        host: Interface to bind
+        port: Port to bind (0 picks a free port)
+        faults: Injected latency and failures
+        record_path: Record to this file instead of replaying
+
+    Returns:
+        Running server; call shutdown() to stop it
+    """
+    fixtures = FixtureTable(load_fixtures(fixtures_path)) if fixtures_path else None
+    server = ReplayServer((host, port), fixtures, faults, record_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fixture Replay Server")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = subparsers.add_parser("serve", help="Replay recorded responses")
+    serve_parser.add_argument("fixtures", help="Fixture NDJSON path")
+    serve_parser.add_argument("--latency-ms", type=float, default=0.0, help="Mean added latency")
+    serve_parser.add_argument("--jitter-ms", type=float, default=0.0,
+                              help="Standard deviation of added latency")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0,
+                              help="Fraction of requests answered with 503")
+    serve_parser.add_argument("--throttle-rate", type=float, default=0.0,
+                              help="Fraction of requests answered with 429")
+    serve_parser.add_argument("--retry-after", type=int, default=1,
+                              help="Retry-After seconds sent with 429 responses")
+    serve_parser.add_argument("--seed", type=int, help="Random seed for injected faults")
+
+    record_parser = subparsers.add_parser("record", help="Proxy to the live APIs and record")
+    record_parser.add_argument("out", help="Fixture NDJSON path to append to")
+
+    for sub in (serve_parser, record_parser):
+        sub.add_argument("--host", default="127.0.0.1")
+        sub.add_argument("--port", type=int, default=8765, help="Port (0 picks a free port)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        faults = FaultConfig(args.latency_ms, args.jitter_ms, args.error_rate,
+                             args.throttle_rate, args.retry_after, args.seed)
+        server = start_server(args.fixtures, args.host, args.port, faults)
+        print(f"Replaying {len(server.fixtures)} exchanges on {server.url}", flush=True)
+    else:
+        server = start_server(None, args.host, args.port, record_path=args.out)
+        print(f"Recording to {args.out} via {server.url}", flush=True)
+    for service in SERVICES:
+        print(f"  {service}: {server.url}/{service}", flush=True)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
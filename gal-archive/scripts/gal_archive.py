@@ -0,0 +1,647 @@
+#!/usr/bin/env python3
+"""
+Seekable Compressed Record Archive
+
+Stores exported VNDB, Bangumi and Steam records in one file of
+independently compressed blocks (zlib or lzma), followed by an index:
+
+    header    magic, codec, byte order
+    blocks    each block is the compressed NDJSON of consecutive records
+    index     block offsets and record counts, then the record IDs in
+              sorted order with the block and row of each record
+    trailer   index offset and array sizes
+
+The index is read through a memory map and binary-searched, so looking up
+one ID reads the index pages it touches and decompresses a single block.
+Because blocks do not depend on each other, full scans decode them in
+parallel worker processes, and the writer compresses them on threads
+(zlib and lzma release the GIL).
+
+Usage:
+    from gal_archive import ArchiveReader, ArchiveWriter
+
+    with ArchiveWriter("vn.galz", codec="lzma") as writer:
+        for vn in iter_entries(client, "vn", "title,rating"):
+            writer.write(vn)
+
+    with ArchiveReader("vn.galz") as archive:
+        print(archive.get("v17"))
+        for vn in archive.iter_records(workers=4):
+            ...
+
+    python gal_archive.py pack vn.galz vn.ndjson --codec lzma
+    python gal_archive.py pack subjects.galz subjects.json --path data
+    python gal_archive.py get vn.galz v17 v11
+    python gal_archive.py cat vn.galz --workers 4 > vn.ndjson
+    python gal_archive.py info vn.galz
+"""
+
+import os
+import sys
+import json
+import lzma
+import mmap
+import zlib
+import array
+import struct
+import argparse
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Callable, IO, Iterable, Iterator, List, Tuple
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MAGIC = b"GALARC01"
+# magic, codec, byte order
+HEADER = struct.Struct("<8sBB6x")
+# index offset, block count, record count, key count, key strings size, magic
+TRAILER = struct.Struct("<QQQQQ8s")
+CODECS = {"zlib": 1, "lzma": 2}
+DEFAULT_LEVELS = {"zlib": 6, "lzma": 6}
+DEFAULT_BLOCK_SIZE = 128 * 1024
+# Fields tried in order for a record's ID: VNDB and Bangumi entries,
+# Steam player summaries, Steam apps, Steam bans
+DEFAULT_ID_FIELDS = ("id", "steamid", "appid", "SteamId")
+ARCHIVE_SUFFIX = ".galz"
+
+
+def record_id(record: Any, fields: Iterable[str] = DEFAULT_ID_FIELDS) -> Optional[str]:
+    """
+    Get the ID a record is indexed under.
+
+    Args:
+        record: Exported record
+        fields: Fields to try in order
+
+    Returns:
+        The first present field as a string, or None
+    """
+    if isinstance(record, dict):
+        for field in fields:
+            value = record.get(field)
+            if value is not None:
+                return str(value)
+    return None
+
+
+def _compress(codec: str, level: int, data: bytes) -> bytes:
+    """Compress one block."""
+    if codec == "lzma":
+        return lzma.compress(data, preset=level)
+    return zlib.compress(data, level)
+
+
+def _decompress(codec_id: int, data: bytes) -> bytes:
+    """Decompress one block."""
+    if codec_id == CODECS["lzma"]:
+        return lzma.decompress(data)
+    return zlib.decompress(data)
+
+
+def _decode_block(path: str, codec_id: int, offset: int, size: int,
+                  func: Optional[Callable[[List[Any]], Any]] = None) -> Any:
+    """Read, decompress and parse one block in a worker process."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = _decompress(codec_id, f.read(size))
+    records = [json.loads(line) for line in data.split(b"\n")]
+    return func(records) if func is not None else records
+
+
+def _bounded_map(executor: Executor, fn: Callable[..., Any], tasks: Iterable[Tuple[Any, ...]],
+                 window: int) -> Iterator[Any]:
+    """Like executor.map, but with at most `window` results pending."""
+    pending: deque = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class ArchiveWriter:
+    """Write records to a seekable compressed archive."""
+
+    def __init__(self, path: str, codec: str = "zlib", level: Optional[int] = None,
+                 block_size: int = DEFAULT_BLOCK_SIZE, id_field: Optional[str] = None,
+                 workers: int = 1):
+        """
+        Start an archive. It appears at `path` only once closed.
+
+        Args:
+            path: Output archive path
+            codec: "zlib" (fast) or "lzma" (smaller)
+            level: Compression level (zlib 0-9, lzma preset 0-9; default 6)
+            block_size: Uncompressed bytes per block. Larger blocks compress
+                better, smaller blocks make lookups cheaper.
+            id_field: Field holding the record ID (default: DEFAULT_ID_FIELDS)
+            workers: Threads compressing blocks
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec: {codec} (use {' or '.join(CODECS)})")
+        self.path = path
+        self.codec = codec
+        self.level = DEFAULT_LEVELS[codec] if level is None else level
+        self.block_size = block_size
+        self.id_fields = (id_field,) if id_field else DEFAULT_ID_FIELDS
+        self.records = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(HEADER.pack(MAGIC, CODECS[codec], sys.byteorder == "little"))
+        self._block: List[bytes] = []
+        self._block_bytes = 0
+        self._block_offsets = array.array("Q")
+        self._block_records = array.array("I")
+        self._keys: List[str] = []
+        self._key_blocks = array.array("I")
+        self._key_rows = array.array("I")
+        self._executor = ThreadPoolExecutor(workers) if workers > 1 else None
+        self._window = 2 * workers
+        self._pending: deque = deque()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, record: Any) -> None:
+        """
+        Append one record.
+
+        Args:
+            record: JSON-serializable record; dicts with an ID field are indexed
+        """
+        key = record_id(record, self.id_fields)
+        if key is not None:
+            self._keys.append(key)
+            self._key_blocks.append(len(self._block_records))
+            self._key_rows.append(len(self._block))
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._block.append(line)
+        self._block_bytes += len(line) + 1
+        self.records += 1
+        if self._block_bytes >= self.block_size:
+            self._flush_block()
+
+    def write_many(self, records: Iterable[Any]) -> int:
+        """Append records; return how many were written."""
+        count = 0
+        for record in records:
+            self.write(record)
+            count += 1
+        return count
+
+    def _flush_block(self) -> None:
+        """Hand the current block to compression and write finished blocks in order."""
+        if not self._block:
+            return
+        data = b"\n".join(self._block)
+        self._block_records.append(len(self._block))
+        self._block = []
+        self._block_bytes = 0
+        if self._executor is None:
+            self._write_block(_compress(self.codec, self.level, data))
+            return
+        self._pending.append(self._executor.submit(_compress, self.codec, self.level, data))
+        while len(self._pending) >= self._window:
+            self._write_block(self._pending.popleft().result())
+
+    def _write_block(self, compressed: bytes) -> None:
+        self._block_offsets.append(self._file.tell())
+        self._file.write(compressed)
+
+    def close(self) -> None:
+        """Write the last block and the index, then move the archive into place."""
+        if self._file.closed:
+            return
+        self._flush_block()
+        while self._pending:
+            self._write_block(self._pending.popleft().result())
+        if self._executor is not None:
+            self._executor.shutdown()
+
+        f = self._file
+        self._block_offsets.append(f.tell())
+        f.write(b"\0" * (-f.tell() % 8))
+        index_offset = f.tell()
+
+        # Sort IDs (code point order equals UTF-8 byte order); a repeated ID keeps its last record
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        keep = [i for n, i in enumerate(order)
+                if n + 1 == len(order) or self._keys[order[n + 1]] != self._keys[i]]
+        key_offsets = array.array("I", [0])
+        strings = bytearray()
+        for i in keep:
+            strings += self._keys[i].encode("utf-8")
+            if len(strings) > 0xFFFFFFFF:
+                self.abort()
+                raise ValueError("Record IDs exceed 4 GiB; split the export")
+            key_offsets.append(len(strings))
+
+        self._block_offsets.tofile(f)
+        key_offsets.tofile(f)
+        self._block_records.tofile(f)
+        array.array("I", (self._key_blocks[i] for i in keep)).tofile(f)
+        array.array("I", (self._key_rows[i] for i in keep)).tofile(f)
+        f.write(strings)
+        f.write(TRAILER.pack(index_offset, len(self._block_records), self.records, len(keep),
+                             len(strings), MAGIC))
+        f.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self) -> None:
+        """Discard the archive."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+class ArchiveReader:
+    """Random and sequential access to an archive written by ArchiveWriter."""
+
+    def __init__(self, path: str, cache_blocks: int = 8):
+        """
+        Open an archive.
+
+        Args:
+            path: Archive path
+            cache_blocks: Number of decoded blocks kept for repeated lookups
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size + TRAILER.size:
+            raise ValueError(f"Not an archive: {path}")
+        magic, self.codec_id, little = HEADER.unpack_from(self._mmap)
+        (index_offset, self.block_count, self.record_count, self.key_count, strings_size,
+         trailer_magic) = TRAILER.unpack_from(self._mmap, len(self._mmap) - TRAILER.size)
+        if magic != MAGIC or trailer_magic != MAGIC:
+            raise ValueError(f"Not an archive: {path}")
+        if bool(little) != (sys.byteorder == "little"):
+            raise ValueError("Archive was written on a host with different byte order")
+        self.codec = next(name for name, codec_id in CODECS.items() if codec_id == self.codec_id)
+
+        view = memoryview(self._mmap)
+        blocks, keys = self.block_count, self.key_count
+        block_offsets_end = index_offset + 8 * (blocks + 1)
+        key_offsets_end = block_offsets_end + 4 * (keys + 1)
+        key_blocks_offset = key_offsets_end + 4 * blocks
+        key_rows_offset = key_blocks_offset + 4 * keys
+        strings_offset = key_rows_offset + 4 * keys
+        self._block_offsets = view[index_offset:block_offsets_end].cast("Q")
+        self._key_offsets = view[block_offsets_end:key_offsets_end].cast("I")
+        self._block_records = view[key_offsets_end:key_blocks_offset].cast("I")
+        self._key_blocks = view[key_blocks_offset:key_rows_offset].cast("I")
+        self._key_rows = view[key_rows_offset:strings_offset].cast("I")
+        self._strings = view[strings_offset:strings_offset + strings_size]
+        self._cache: "OrderedDict[int, List[bytes]]" = OrderedDict()
+        self._cache_blocks = cache_blocks
+
+    def __len__(self) -> int:
+        return self.record_count
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map."""
+        for view in (self._block_offsets, self._key_offsets, self._block_records,
+                     self._key_blocks, self._key_rows, self._strings):
+            view.release()
+        self._cache.clear()
+        self._mmap.close()
+
+    def _key_at(self, pos: int) -> bytes:
+        return self._strings[self._key_offsets[pos]:self._key_offsets[pos + 1]].tobytes()
+
+    def _find(self, key: Any) -> int:
+        """Binary-search the sorted IDs; return -1 if absent."""
+        target = str(key).encode("utf-8")
+        lo, hi = 0, self.key_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.key_count and self._key_at(lo) == target else -1
+
+    def __contains__(self, key: Any) -> bool:
+        return self._find(key) >= 0
+
+    def _read_block(self, block: int) -> bytes:
+        start, end = self._block_offsets[block], self._block_offsets[block + 1]
+        return _decompress(self.codec_id, self._mmap[start:end])
+
+    def _lines(self, block: int) -> List[bytes]:
+        """Decoded lines of a block, through the block cache."""
+        lines = self._cache.get(block)
+        if lines is not None:
+            self._cache.move_to_end(block)
+            return lines
+        lines = self._read_block(block).split(b"\n")
+        self._cache[block] = lines
+        if len(self._cache) > self._cache_blocks:
+            self._cache.popitem(last=False)
+        return lines
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Look up a record by ID.
+
+        Args:
+            key: Record ID (e.g. "v17", 100228, "76561197960287930")
+            default: Returned when the ID is not in the archive
+
+        Returns:
+            The record, or default
+        """
+        pos = self._find(key)
+        if pos < 0:
+            return default
+        return json.loads(self._lines(self._key_blocks[pos])[self._key_rows[pos]])
+
+    def get_many(self, keys: Iterable[Any]) -> Dict[str, Any]:
+        """
+        Look up several records, decompressing each needed block once.
+
+        Args:
+            keys: Record IDs
+
+        Returns:
+            ID -> record for the IDs found
+        """
+        by_block: Dict[int, List[Tuple[str, int]]] = {}
+        for key in keys:
+            pos = self._find(key)
+            if pos >= 0:
+                by_block.setdefault(self._key_blocks[pos], []).append((str(key), self._key_rows[pos]))
+        found = {}
+        for block in sorted(by_block):
+            lines = self._lines(block)
+            for key, row in by_block[block]:
+                found[key] = json.loads(lines[row])
+        return found
+
+    def keys(self) -> Iterator[str]:
+        """Yield all indexed IDs in sorted order."""
+        for pos in range(self.key_count):
+            yield self._key_at(pos).decode("utf-8")
+
+    def map_blocks(self, func: Optional[Callable[[List[Any]], Any]] = None,
+                   workers: int = 1) -> Iterator[Any]:
+        """
+        Decode every block and apply a function to its records.
+
+        With workers > 1, blocks are read, decompressed, parsed and passed to
+        `func` in worker processes; only the results come back. `func` must
+        then be picklable (a module-level function).
+
+        Args:
+            func: Called with the list of records of each block (None returns the list)
+            workers: Worker processes
+
+        Yields:
+            One result per block, in block order
+        """
+        if workers <= 1:
+            for block in range(self.block_count):
+                records = [json.loads(line) for line in self._read_block(block).split(b"\n")]
+                yield func(records) if func is not None else records
+            return
+        tasks = ((self.path, self.codec_id, self._block_offsets[block],
+                  self._block_offsets[block + 1] - self._block_offsets[block], func)
+                 for block in range(self.block_count))
+        with ProcessPoolExecutor(workers) as pool:
+            yield from _bounded_map(pool, _decode_block, tasks, 2 * workers)
+
+    def iter_records(self, workers: int = 1) -> Iterator[Any]:
+        """
+        Yield all records in write order.
+
+        Args:
+            workers: Worker processes decoding blocks in parallel
+
+        Yields:
+            Records
+        """
+        for records in self.map_blocks(workers=workers):
+            yield from records
+
+    def info(self) -> Dict[str, Any]:
+        """Return archive statistics."""
+        compressed = self._block_offsets[self.block_count] - self._block_offsets[0]
+        return {
+            "path": self.path,
+            "codec": self.codec,
+            "records": self.record_count,
+            "indexed_ids": self.key_count,
+            "blocks": self.block_count,
+            "file_bytes": len(self._mmap),
+            "compressed_block_bytes": compressed,
+            "index_bytes": len(self._mmap) - self._block_offsets[self.block_count],
+            "average_block_records": self.record_count / self.block_count if self.block_count else 0,
+        }
+
+
+class NDJSONWriter:
+    """Plain NDJSON counterpart of ArchiveWriter."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._file = open(path, "w", encoding="utf-8")
+
+    def __enter__(self) -> "NDJSONWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, record: Any) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self.records += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def open_writer(path: str, **options) -> Any:
+    """
+    Open a record writer: an archive for *.galz paths, NDJSON otherwise.
+
+    Args:
+        path: Output path
+        **options: ArchiveWriter options (ignored for NDJSON)
+
+    Returns:
+        ArchiveWriter or NDJSONWriter
+    """
+    if path.endswith(ARCHIVE_SUFFIX):
+        return ArchiveWriter(path, **options)
+    return NDJSONWriter(path)
+
+
+def is_archive(path: str) -> bool:
+    """Check whether a file starts with the archive magic."""
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_records(path: str, workers: int = 1) -> Iterator[Any]:
+    """
+    Yield the records of an archive or an NDJSON file.
+
+    Args:
+        path: Archive or NDJSON path
+        workers: Worker processes for archives
+
+    Yields:
+        Records
+    """
+    if is_archive(path):
+        with ArchiveReader(path) as archive:
+            yield from archive.iter_records(workers)
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_input(f: IO[bytes], path: Optional[str] = None) -> Iterator[Any]:
+    """
+    Yield records from a JSON or NDJSON stream without loading it whole.
+
+    A document starting with "[" (or any document when `path` is given) is
+    streamed as a JSON array with json_stream.py from steam-api; anything
+    else is read as NDJSON.
+
+    Args:
+        f: Binary input stream
+        path: Dotted path to the array in a JSON document (e.g. "data",
+            "response.players")
+
+    Yields:
+        Records
+    """
+    head = f.read(64 * 1024)
+    if path is not None or head.lstrip()[:1] == b"[":
+        scripts = os.path.join(SKILLS_DIR, "steam-api", "scripts")
+        if scripts not in sys.path:
+            sys.path.append(scripts)
+        from json_stream import iter_json_items
+
+        chunks = iter(lambda: f.read(64 * 1024), b"")
+        yield from iter_json_items(_prepend(head, chunks), path or "")
+        return
+    for line in _lines(_prepend(head, iter(lambda: f.read(64 * 1024), b""))):
+        if line.strip():
+            yield json.loads(line)
+
+
+def _prepend(first: bytes, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    yield first
+    yield from chunks
+
+
+def _lines(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Split byte chunks into lines."""
+    rest = b""
+    for chunk in chunks:
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seekable Compressed Record Archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = subparsers.add_parser("pack", help="Pack JSON or NDJSON records into an archive")
+    pack_parser.add_argument("archive", help="Output archive path")
+    pack_parser.add_argument("inputs", nargs="+", help="JSON/NDJSON files (- for stdin)")
+    pack_parser.add_argument("--path", help="Dotted path to the record array in JSON input (e.g. data)")
+    pack_parser.add_argument("--codec", choices=sorted(CODECS), default="zlib", help="Block compression")
+    pack_parser.add_argument("--level", type=int, help="Compression level (default 6)")
+    pack_parser.add_argument("--block-size", type=int, default=DEFAULT_BLOCK_SIZE // 1024,
+                             help="Uncompressed KiB per block")
+    pack_parser.add_argument("--id-field", help=f"ID field (default: first of {', '.join(DEFAULT_ID_FIELDS)})")
+    pack_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                             help="Compression threads")
+
+    get_parser = subparsers.add_parser("get", help="Print records by ID")
+    get_parser.add_argument("archive")
+    get_parser.add_argument("ids", nargs="+")
+
+    cat_parser = subparsers.add_parser("cat", help="Print all records as NDJSON")
+    cat_parser.add_argument("archive")
+    cat_parser.add_argument("--workers", type=int, default=1, help="Decoding processes")
+
+    info_parser = subparsers.add_parser("info", help="Show archive statistics")
+    info_parser.add_argument("archive")
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        for name in args.inputs:
+            if name != "-" and not os.path.exists(name):
+                print(f"Error: {name} not found")
+                sys.exit(1)
+        source_bytes = 0
+        with ArchiveWriter(args.archive, codec=args.codec, level=args.level,
+                           block_size=args.block_size * 1024, id_field=args.id_field,
+                           workers=args.workers) as writer:
+            for name in args.inputs:
+                if name == "-":
+                    writer.write_many(iter_input(sys.stdin.buffer, args.path))
+                    continue
+                source_bytes += os.path.getsize(name)
+                with open(name, "rb") as f:
+                    writer.write_many(iter_input(f, args.path))
+        size = os.path.getsize(args.archive)
+        ratio = f", {source_bytes / size:.1f}x compression" if source_bytes and size else ""
+        print(f"Packed {writer.records} records into {args.archive} ({size} bytes{ratio})")
+        return
+
+    try:
+        archive = ArchiveReader(args.archive)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    with archive:
+        if args.command == "get":
+            missing = False
+            for key in args.ids:
+                record = archive.get(key)
+                if record is None:
+                    print(f"Error: {key} not found", file=sys.stderr)
+                    missing = True
+                else:
+                    print(json.dumps(record, ensure_ascii=False))
+            if missing:
+                sys.exit(1)
+        elif args.command == "cat":
+            try:
+                for record in archive.iter_records(workers=args.workers):
+                    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            except BrokenPipeError:
+                pass
+        else:
+            print(json.dumps(archive.info(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
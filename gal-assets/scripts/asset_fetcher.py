@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Image Fetcher
+
+Downloads covers, character images, screenshots and avatars referenced by
+VNDB, Bangumi and Steam results into one store:
+
+- Files are named by the SHA-256 of their content, so an image reachable
+  from several URLs (or re-uploaded unchanged) is stored once. A SQLite
+  manifest maps every URL to its content hash.
+- Thumbnails are preferred where the service offers them.
+- Downloads run concurrently over pooled keep-alive connections, with a cap
+  on parallel requests per host (or an adaptive one, see gal-throttle).
+- On re-runs, URLs checked within --max-age are skipped; older ones are
+  revalidated with If-None-Match / If-Modified-Since, so only new or
+  changed images are transferred.
+
+Usage:
+    from asset_fetcher import AssetFetcher, AssetStore, image_urls
+
+    response = vndb.post("vn", {"filters": ["rating", ">", 80], "results": 100,
+                                "fields": "title,image.url,image.thumbnail"})
+    urls = image_urls("vndb", response.data) + image_urls("bangumi", bgm.get_subject(100228))
+    fetcher = AssetFetcher(AssetStore("assets"), per_host=4)
+    stats, failed = fetcher.fetch_all(urls)
+    print(fetcher.store.path_for(urls[0]))
+
+    python ../../gal-cli/scripts/galskills steam summary 76561197960361544 > players.json
+    python asset_fetcher.py fetch assets/ --steam players.json --bangumi subjects.json --per-host 4
+    python asset_fetcher.py path assets/ https://t.vndb.org/st/12/34512.jpg
+    python asset_fetcher.py stats assets/
+    python asset_fetcher.py prune assets/
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterable, Iterator, List, Tuple
+
+if TYPE_CHECKING:
+    import requests
+    from adaptive_concurrency import AIMDController
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DAY = 86400
+SOURCES = ("vndb", "bangumi", "steam")
+# Sizes in order of preference: thumbnails first, or full size first
+VNDB_IMAGE_KEYS = {True: ("thumbnail", "url"), False: ("url", "thumbnail")}
+BANGUMI_IMAGE_KEYS = {True: ("medium", "common", "small", "grid", "large"),
+                      False: ("large", "common", "medium", "small", "grid")}
+STEAM_AVATAR_KEYS = {True: ("avatarmedium", "avatar", "avatarfull"),
+                     False: ("avatarfull", "avatarmedium", "avatar")}
+STEAM_ICON_URL = "https://media.steampowered.com/steamcommunity/public/images/apps/{appid}/{icon}.jpg"
+CONTENT_EXTENSIONS = {"image/jpeg": ".jpg", "image/png": ".png", "image/webp": ".webp",
+                      "image/gif": ".gif", "image/avif": ".avif"}
+CHUNK_SIZE = 64 * 1024
+
+
+def _pick_url(source: str, key: Optional[str], node: Dict[str, Any],
+              prefer_thumbnails: bool) -> Optional[str]:
+    """Return the preferred image URL of one result object, if it is an image."""
+    if source == "vndb":
+        # Covers, character images and screenshots share one image object
+        if key in ("image", "screenshots"):
+            candidates = VNDB_IMAGE_KEYS[prefer_thumbnails]
+        else:
+            return None
+    elif source == "bangumi":
+        if key in ("images", "avatar"):
+            candidates = BANGUMI_IMAGE_KEYS[prefer_thumbnails]
+        else:
+            return None
+    elif "img_icon_url" in node and "appid" in node:
+        icon = node.get("img_icon_url")
+        return STEAM_ICON_URL.format(appid=node["appid"], icon=icon) if icon else None
+    else:
+        candidates = STEAM_AVATAR_KEYS[prefer_thumbnails]
+    for candidate in candidates:
+        url = node.get(candidate)
+        if isinstance(url, str) and url.startswith(("http://", "https://")):
+            return url
+    return None
+
+
+def image_urls(source: str, data: Any, prefer_thumbnails: bool = True) -> List[str]:
+    """
+    Collect image URLs from a client result.
+
+    Accepts anything the clients return: a VNDB response or entry, a Bangumi
+    subject, search page or character list, Steam player summaries or owned
+    games. One URL is taken per image, in the preferred size.
+
+    Args:
+        source: "vndb", "bangumi" or "steam"
+        data: Decoded JSON result
+        prefer_thumbnails: Prefer thumbnail sizes over full size
+
+    Returns:
+        Unique URLs in the order they appear
+    """
+    if source not in SOURCES:
+        raise ValueError(f"Unknown source: {source}")
+    found: Dict[str, None] = {}
+
+    def walk(node: Any, key: Optional[str]) -> None:
+        if isinstance(node, list):
+            for item in node:
+                walk(item, key)
+        elif isinstance(node, dict):
+            url = _pick_url(source, key, node, prefer_thumbnails)
+            if url:
+                found.setdefault(url, None)
+            for child_key, value in node.items():
+                if isinstance(value, (dict, list)):
+                    walk(value, child_key)
+
+    walk(data, None)
+    return list(found)
+
+
+def load_results(path: str) -> Iterator[Any]:
+    """Yield the JSON document in a file, or each line of an NDJSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        yield json.loads(text)
+    except json.JSONDecodeError:
+        for line in text.splitlines():
+            if line.strip():
+                yield json.loads(line)
+
+
+class AssetStore:
+    """Content-addressed image files plus a URL -> content hash manifest."""
+
+    def __init__(self, root: str):
+        """
+        Open or create a store.
+
+        Args:
+            root: Store directory (objects/, tmp/ and manifest.db inside)
+        """
+        self.root = root
+        self.tmp_dir = os.path.join(root, "tmp")
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(root, "manifest.db"), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS objects (hash TEXT PRIMARY KEY, path TEXT NOT NULL, "
+                         "size INTEGER NOT NULL, content_type TEXT)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT NOT NULL, "
+                         "etag TEXT, last_modified TEXT, checked REAL NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the manifest entry of a URL.
+
+        Args:
+            url: Image URL
+
+        Returns:
+            Dictionary with hash, path, size, etag, last_modified and checked, or None
+        """
+        with self._lock:
+            row = self._db.execute(
+                "SELECT u.hash, o.path, o.size, u.etag, u.last_modified, u.checked "
+                "FROM urls u JOIN objects o ON o.hash = u.hash WHERE u.url = ?", (url,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("hash", "path", "size", "etag", "last_modified", "checked"), row))
+
+    def path_for(self, url: str) -> Optional[str]:
+        """Return the local file of a URL, or None if it was never fetched."""
+        entry = self.lookup(url)
+        return os.path.join(self.root, entry["path"]) if entry else None
+
+    def add_object(self, tmp_path: str, digest: str, size: int,
+                   content_type: Optional[str], url: str) -> bool:
+        """
+        Move a downloaded file into the store unless its content is already there.
+
+        Args:
+            tmp_path: Downloaded file (under tmp_dir); consumed
+            digest: SHA-256 hex digest of the content
+            size: Content size in bytes
+            content_type: Response Content-Type
+            url: Source URL, for the file extension when the type is unknown
+
+        Returns:
+            True if the content was new
+        """
+        with self._lock:
+            row = self._db.execute("SELECT path FROM objects WHERE hash = ?", (digest,)).fetchone()
+            if row is not None and os.path.exists(os.path.join(self.root, row[0])):
+                os.remove(tmp_path)
+                return False
+            media_type = (content_type or "").split(";")[0].strip().lower()
+            extension = CONTENT_EXTENSIONS.get(media_type) or os.path.splitext(urlsplit(url).path)[1][:5]
+            path = os.path.join("objects", digest[:2], digest + extension)
+            os.makedirs(os.path.join(self.root, "objects", digest[:2]), exist_ok=True)
+            os.replace(tmp_path, os.path.join(self.root, path))
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO objects (hash, path, size, content_type) "
+                                 "VALUES (?, ?, ?, ?)", (digest, path, size, media_type or None))
+            return True
+
+    def record_url(self, url: str, digest: str, etag: Optional[str], last_modified: Optional[str],
+                   checked: float) -> None:
+        """Point a URL at a content hash, with the validators of its last response."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO urls (url, hash, etag, last_modified, checked) "
+                             "VALUES (?, ?, ?, ?, ?)", (url, digest, etag, last_modified, checked))
+
+    def touch(self, url: str, checked: float) -> None:
+        """Mark a URL as revalidated without changes."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE urls SET checked = ? WHERE url = ?", (checked, url))
+
+    def prune(self) -> int:
+        """Delete files no URL points to and return how many were removed."""
+        with self._lock:
+            rows = self._db.execute("SELECT hash, path FROM objects WHERE hash NOT IN "
+                                    "(SELECT hash FROM urls)").fetchall()
+            with self._db:
+                for digest, path in rows:
+                    try:
+                        os.remove(os.path.join(self.root, path))
+                    except FileNotFoundError:
+                        pass
+                    self._db.execute("DELETE FROM objects WHERE hash = ?", (digest,))
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """Return URL, object and byte counts."""
+        with self._lock:
+            urls = self._db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+            objects, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM objects").fetchone()
+        return {"urls": urls, "objects": objects, "bytes": size}
+
+    def close(self) -> None:
+        """Close the manifest."""
+        self._db.close()
+
+
+class AssetFetcher:
+    """Concurrent, conditional image downloader into an AssetStore."""
+
+    DEFAULT_PER_HOST = 4
+    DEFAULT_MAX_WORKERS = 16
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+    def __init__(self, store: AssetStore, per_host: int = DEFAULT_PER_HOST,
+                 max_workers: int = DEFAULT_MAX_WORKERS, max_age: float = 7 * DAY,
+                 max_retries: int = 3, backoff_factor: float = 0.5, timeout: float = 30,
+                 concurrency: Optional["AIMDController"] = None):
+        """
+        Initialize the fetcher.
+
+        Args:
+            store: Store to download into
+            per_host: Maximum parallel requests per host (ignored with a controller)
+            max_workers: Download threads
+            max_age: Seconds after which a stored URL is revalidated
+            max_retries: Retries on connection errors, 429 and 5xx responses
+            backoff_factor: Base delay in seconds for exponential backoff
+            timeout: Request timeout in seconds
+            concurrency: Optional per-host concurrency controller
+                (see gal-throttle/scripts/adaptive_concurrency.py)
+        """
+        self.store = store
+        self.per_host = per_host
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._session_options = (max_retries, backoff_factor)
+        self._session: Optional["requests.Session"] = None
+        self._lock = threading.Lock()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled HTTP session, created on first use."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session(*self._session_options)
+        return self._session
+
+    def _build_session(self, max_retries: int, backoff_factor: float) -> "requests.Session":
+        """Build a session keeping per_host connections alive to each host."""
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(total=max_retries, backoff_factor=backoff_factor,
+                      status_forcelist=self.RETRY_STATUS_CODES, allowed_methods=frozenset(["GET"]),
+                      respect_retry_after_header=True, raise_on_status=False)
+        pool_size = self.max_workers if self.concurrency is not None else self.per_host
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    @contextmanager
+    def _host_slot(self, host: str):
+        """Hold one of a host's request slots; yields the controller permit, if any."""
+        if self.concurrency is not None:
+            with self.concurrency.acquire(host) as permit:
+                yield permit
+            return
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+        with slot:
+            yield None
+
+    def _download(self, url: str, entry: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Fetch one URL, conditionally if it was fetched before.
+
+        Args:
+            url: Image URL
+            entry: Manifest entry from a previous run
+
+        Returns:
+            {"status": "not_modified"}, or the downloaded file with its digest and validators
+        """
+        headers = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        with self._host_slot(urlsplit(url).netloc) as permit:
+            response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+            try:
+                if permit is not None:
+                    # A retried 429/5xx is congestion even if the last attempt succeeded
+                    retries = getattr(response.raw, "retries", None)
+                    permit.report(response.status_code,
+                                  [attempt.status for attempt in retries.history] if retries is not None else ())
+                if response.status_code == 304:
+                    return {"status": "not_modified"}
+                response.raise_for_status()
+                digest = hashlib.sha256()
+                size = 0
+                fd, tmp_path = tempfile.mkstemp(dir=self.store.tmp_dir)
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                            digest.update(chunk)
+                            f.write(chunk)
+                            size += len(chunk)
+                except BaseException:
+                    os.remove(tmp_path)
+                    raise
+            finally:
+                response.close()
+        return {"status": "downloaded", "tmp_path": tmp_path, "hash": digest.hexdigest(),
+                "size": size, "content_type": response.headers.get("Content-Type"),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified")}
+
+    def fetch_all(self, urls: Iterable[str], force: bool = False) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """
+        Bring the store up to date for a set of URLs.
+
+        Args:
+            urls: Image URLs (duplicates are fetched once)
+            force: Revalidate every URL regardless of max_age
+
+        Returns:
+            (counters, {url: error message} for failed URLs)
+        """
+        from requests.exceptions import RequestException
+
+        stats = {"urls": 0, "fresh": 0, "not_modified": 0, "unchanged": 0, "downloaded": 0,
+                 "deduplicated": 0, "failed": 0, "bytes": 0}
+        failed: Dict[str, str] = {}
+        now = time.time()
+        pending: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        for url in dict.fromkeys(urls):
+            stats["urls"] += 1
+            entry = self.store.lookup(url)
+            if entry is not None and not os.path.exists(os.path.join(self.store.root, entry["path"])):
+                entry = None
+            if entry is not None and not force and now - entry["checked"] < self.max_age:
+                stats["fresh"] += 1
+            else:
+                pending.append((url, entry))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._download, url, entry): (url, entry) for url, entry in pending}
+            for future in as_completed(futures):
+                url, entry = futures[future]
+                try:
+                    result = future.result()
+                except (RequestException, OSError) as e:
+                    stats["failed"] += 1
+                    failed[url] = str(e)
+                    continue
+                checked = time.time()
+                if result["status"] == "not_modified":
+                    self.store.touch(url, checked)
+                    stats["not_modified"] += 1
+                    continue
+                stats["bytes"] += result["size"]
+                if self.store.add_object(result["tmp_path"], result["hash"], result["size"],
+                                         result["content_type"], url):
+                    stats["downloaded"] += 1
+                elif entry is not None and entry["hash"] == result["hash"]:
+                    stats["unchanged"] += 1
+                else:
+                    stats["deduplicated"] += 1
+                self.store.record_url(url, result["hash"], result["etag"], result["last_modified"], checked)
+        return stats, failed
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+
+def load_controller() -> "AIMDController":
+    """Create an adaptive concurrency controller from the sibling gal-throttle skill."""
+    throttle_dir = os.path.join(SKILLS_DIR, "gal-throttle", "scripts")
+    if throttle_dir not in sys.path:
+        sys.path.append(throttle_dir)
+    from adaptive_concurrency import AIMDController
+    return AIMDController()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-Addressed Image Fetcher")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="Download images referenced by client results")
+    fetch_parser.add_argument("store", help="Store directory")
+    for source in SOURCES:
+        fetch_parser.add_argument(f"--{source}", action="append", default=[], metavar="FILE",
+                                  help=f"{source} result (JSON or NDJSON); repeatable")
+    fetch_parser.add_argument("--urls", action="append", default=[], metavar="FILE",
+                              help="File with one image URL per line; repeatable")
+    fetch_parser.add_argument("--full-size", action="store_true", help="Prefer full-size images over thumbnails")
+    fetch_parser.add_argument("--per-host", type=int, default=AssetFetcher.DEFAULT_PER_HOST,
+                              help="Parallel requests per host")
+    fetch_parser.add_argument("--adaptive", action="store_true",
+                              help="Tune parallel requests per host from responses (needs gal-throttle)")
+    fetch_parser.add_argument("--workers", type=int, default=AssetFetcher.DEFAULT_MAX_WORKERS,
+                              help="Download threads")
+    fetch_parser.add_argument("--max-age", type=float, default=7 * DAY,
+                              help="Seconds before a stored URL is revalidated")
+    fetch_parser.add_argument("--force", action="store_true", help="Revalidate every URL")
+
+    path_parser = subparsers.add_parser("path", help="Print the local file of a URL")
+    path_parser.add_argument("store", help="Store directory")
+    path_parser.add_argument("url")
+
+    stats_parser = subparsers.add_parser("stats", help="Show store counters")
+    stats_parser.add_argument("store", help="Store directory")
+
+    prune_parser = subparsers.add_parser("prune", help="Delete files no URL points to")
+    prune_parser.add_argument("store", help="Store directory")
+    args = parser.parse_args()
+
+    store = AssetStore(args.store)
+    try:
+        if args.command == "path":
+            path = store.path_for(args.url)
+            if path is None:
+                print(f"Error: Not in store: {args.url}")
+                sys.exit(1)
+            print(path)
+        elif args.command == "stats":
+            print(json.dumps(store.stats(), indent=2))
+        elif args.command == "prune":
+            print(f"Removed {store.prune()} unreferenced files")
+        else:
+            urls: List[str] = []
+            try:
+                for source in SOURCES:
+                    for path in getattr(args, source):
+                        for data in load_results(path):
+                            urls.extend(image_urls(source, data, not args.full_size))
+                for path in args.urls:
+                    with open(path, "r", encoding="utf-8") as f:
+                        urls.extend(line.strip() for line in f if line.strip())
+            except (OSError, ValueError) as e:
+                print(f"Error: {e}")
+                sys.exit(1)
+
+            fetcher = AssetFetcher(store, per_host=args.per_host, max_workers=args.workers,
+                                   max_age=args.max_age,
+                                   concurrency=load_controller() if args.adaptive else None)
+            started = time.monotonic()
+            stats, failed = fetcher.fetch_all(urls, force=args.force)
+            fetcher.close()
+            for url, message in failed.items():
+                print(f"Error: {url}: {message}", file=sys.stderr)
+            print(json.dumps(dict(stats, seconds=round(time.monotonic() - started, 2)), indent=2))
+            if failed:
+                sys.exit(1)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
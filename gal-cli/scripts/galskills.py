@@ -0,0 +1,498 @@
+#!/usr/bin/env python3
+"""
+galskills - Unified Command Line for the VNDB, Bangumi and Steam Skills
+
+One entry point over VNDBClient (vndb-api), BangumiAPI (bangumi-api) and
+SteamAPI (steam-api). Only the client a command needs is imported, and only
+when the command actually has to reach the network:
+
+- "--help" builds the parser for the requested service only and never loads
+  an HTTP stack.
+- Command output is cached in one SQLite file shared by all three services.
+  A cache hit is answered before any client module is imported.
+- "run" executes many commands in one process, sharing clients, the cache
+  and (for Steam) pooled connections.
+
+The "galskills" launcher next to this file is the faster way to start it:
+the launcher is compiled on every run, this module only once.
+
+Usage:
+    ./galskills vndb vn "Steins;Gate"
+    python galskills.py vndb vn "Steins;Gate"
+    python galskills.py vndb vn_id v17
+    python galskills.py bgm subject 100228
+    python galskills.py bgm search "CLANNAD" --type 4
+    python galskills.py steam summary 76561197960361544
+    python galskills.py steam players 730
+
+    # Cache options (default: ~/.cache/galskills/cache.db, 1 hour)
+    python galskills.py --cache-ttl 86400 bgm subject 100228
+    python galskills.py --no-cache steam players 730
+
+    # Many commands in one process, one per line (no file or "-": stdin)
+    python galskills.py run commands.txt
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, List, Tuple
+
+if TYPE_CHECKING:
+    from request_trace import Tracer
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "galskills", "cache.db")
+DEFAULT_CACHE_TTL = 3600
+# Commands returning live values are never cached for longer than this
+LIVE_TTL = 60
+LIVE_COMMANDS = {("steam", "players")}
+# Random samples must differ per run; local facet queries are already fast
+# and their output follows the index file
+UNCACHED_COMMANDS = {("vndb", "help"), ("vndb", "--help"), ("vndb", "-h"), ("vndb", "sample"),
+                     ("vndb", "facet"), ("vndb", "facet_index")}
+
+SERVICES = {
+    "vndb": "VNDB queries (commands of vndb_query.py)",
+    "bgm": "Bangumi queries",
+    "steam": "Steam Web API queries",
+    "run": "Run one command per line from a file or stdin",
+}
+BASE_URL_VARIABLES = {"vndb": "GALSKILLS_VNDB_URL", "bgm": "GALSKILLS_BANGUMI_URL",
+                      "steam": "GALSKILLS_STEAM_URL"}
+# Global options that take a value, skipped when looking for the service name
+VALUE_OPTIONS = ("--cache", "--cache-ttl", "--trace-out")
+# Options that never change a command's output
+NON_KEY_OPTIONS = ("cache", "cache_ttl", "no_cache", "profile", "trace_out", "profile_sample",
+                   "key", "token")
+
+
+def use_skill(skill: str) -> None:
+    """Make a sibling skill's scripts importable."""
+    scripts = os.path.join(SKILLS_DIR, skill, "scripts")
+    if scripts not in sys.path:
+        sys.path.append(scripts)
+
+
+def emit(data: Any) -> None:
+    """Print a response as indented JSON."""
+    import json
+    print(json.dumps(data, indent=2, ensure_ascii=False))
+
+
+class OutputCache:
+    """
+    Command output cache in SQLite.
+
+    Uses the table layout of steam_cache.SQLiteCacheStore, so
+    "steam_cache.py stats/purge" work on the same file, but needs neither
+    steam-api nor its imports.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create a cache database.
+
+        Args:
+            path: SQLite database path
+        """
+        import sqlite3
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache "
+                         "(key TEXT PRIMARY KEY, expires REAL NOT NULL, body TEXT NOT NULL)")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached output for a key, or None if missing or expired."""
+        row = self._db.execute("SELECT body FROM cache WHERE key = ? AND expires > ?",
+                               (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, ttl: float, body: str) -> None:
+        """Store output for ttl seconds."""
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO cache (key, expires, body) VALUES (?, ?, ?)",
+                             (key, time.time() + ttl, body))
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+
+class CLIContext:
+    """Clients, cache store and tracer shared by every command in one process."""
+
+    def __init__(self, cache_path: Optional[str], cache_ttl: float,
+                 tracer: Optional["Tracer"] = None):
+        """
+        Initialize the context. Nothing is opened until a command needs it.
+
+        Args:
+            cache_path: SQLite cache path (None disables caching)
+            cache_ttl: Seconds cached output stays fresh
+            tracer: Optional request tracer shared by all clients
+        """
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self.tracer = tracer
+        self._store: Optional[OutputCache] = None
+        self._clients: Dict[Tuple[str, str], Any] = {}
+
+    @property
+    def store(self) -> Optional[OutputCache]:
+        """Shared output cache, opened on first use."""
+        if self._store is None and self.cache_path:
+            self._store = OutputCache(self.cache_path)
+        return self._store
+
+    def vndb(self):
+        """Return the VNDB client."""
+        client = self._clients.get(("vndb", ""))
+        if client is None:
+            use_skill("vndb-api")
+            from vndb_query import API_BASE_URL, VNDBClient
+            client = VNDBClient(base_url=os.environ.get("GALSKILLS_VNDB_URL", API_BASE_URL),
+                                tracer=self.tracer)
+            self._clients[("vndb", "")] = client
+        return client
+
+    def bangumi(self, token: str):
+        """Return the Bangumi client for an access token."""
+        client = self._clients.get(("bgm", token))
+        if client is None:
+            use_skill("bangumi-api")
+            from bangumi_api_example import BangumiAPI
+            client = BangumiAPI(token, tracer=self.tracer)
+            base_url = os.environ.get("GALSKILLS_BANGUMI_URL")
+            if base_url:
+                client.BASE_URL = base_url.rstrip("/")
+                client.CALENDAR_URL = f"{client.BASE_URL}/calendar"
+            self._clients[("bgm", token)] = client
+        return client
+
+    def steam(self, api_key: str):
+        """Return the Steam client for an API key."""
+        client = self._clients.get(("steam", api_key))
+        if client is None:
+            use_skill("steam-api")
+            from steam_api_example import SteamAPI
+            client = SteamAPI(api_key, tracer=self.tracer)
+            base_url = os.environ.get("GALSKILLS_STEAM_URL")
+            if base_url:
+                client.BASE_URL = base_url.rstrip("/")
+            self._clients[("steam", api_key)] = client
+        return client
+
+    def close(self) -> None:
+        """Close pooled Steam sessions and the cache store."""
+        for (service, _), client in self._clients.items():
+            if service == "steam":
+                client.close()
+        self._clients.clear()
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+def cache_key(args: argparse.Namespace, credential: Optional[str] = None) -> str:
+    """
+    Build the output cache key for a parsed command.
+
+    The key covers the service, command, arguments and base URL override.
+    Bangumi results can depend on the token's permissions, so a digest of
+    it is included; the Steam key never changes a response and is left out.
+
+    Args:
+        args: Parsed command line
+        credential: Access token to fingerprint, if any
+
+    Returns:
+        Cache key
+    """
+    import json
+    fields = {name: value for name, value in vars(args).items() if name not in NON_KEY_OPTIONS}
+    base_url = os.environ.get(BASE_URL_VARIABLES[args.service])
+    if base_url:
+        fields["base_url"] = base_url
+    if credential:
+        import hashlib
+        fields["credential"] = hashlib.sha256(credential.encode("utf-8")).hexdigest()[:16]
+    return "galskills " + json.dumps(fields, sort_keys=True, ensure_ascii=False)
+
+
+def run_cached(ctx: CLIContext, args: argparse.Namespace, run: Callable[[], None],
+               credential: Optional[str] = None) -> None:
+    """
+    Run a command, answering from the output cache when possible.
+
+    Output is captured and stored only if the command completes; failed
+    commands print as usual and are never cached.
+
+    Args:
+        ctx: Shared context
+        args: Parsed command line
+        run: Runs the command, printing its output
+        credential: Access token that may affect the output
+    """
+    store = ctx.store
+    if store is None or (args.service, args.command) in UNCACHED_COMMANDS:
+        run()
+        return
+    key = cache_key(args, credential)
+    output = store.get(key)
+    if output is not None:
+        sys.stdout.write(output)
+        return
+
+    import io
+    from contextlib import redirect_stdout
+    buffer = io.StringIO()
+    try:
+        with redirect_stdout(buffer):
+            run()
+    finally:
+        sys.stdout.write(buffer.getvalue())
+    ttl = ctx.cache_ttl
+    if (args.service, args.command) in LIVE_COMMANDS:
+        ttl = min(ttl, LIVE_TTL)
+    if ttl > 0:
+        store.set(key, ttl, buffer.getvalue())
+
+
+def run_vndb(ctx: CLIContext, args: argparse.Namespace) -> None:
+    """Run one "vndb" command."""
+    def run() -> None:
+        use_skill("vndb-api")
+        from vndb_query import run_command
+        run_command(ctx.vndb(), args.command, args.args)
+    run_cached(ctx, args, run)
+
+
+def run_bangumi(ctx: CLIContext, args: argparse.Namespace) -> None:
+    """Run one "bgm" command."""
+    token = args.token or os.environ.get("BGM_TOKEN")
+    if not token:
+        print("Error: Bangumi access token is required (--token or BGM_TOKEN).", file=sys.stderr)
+        print("Get one at: https://next.bgm.tv/demo/access-token", file=sys.stderr)
+        sys.exit(1)
+
+    def run() -> None:
+        bgm = ctx.bangumi(token)
+        if args.command == "subject":
+            emit(bgm.get_subject(args.id))
+        elif args.command == "search":
+            subject_filter = {"type": [args.type]} if args.type else None
+            emit(bgm.search_subjects(args.keyword, sort=args.sort, filter=subject_filter,
+                                     limit=args.limit))
+        elif args.command == "characters":
+            emit(bgm.get_subject_characters(args.id))
+        elif args.command == "persons":
+            emit(bgm.get_subject_persons(args.id))
+        elif args.command == "calendar":
+            emit(bgm.get_calendar())
+        elif args.command == "user":
+            emit(bgm.get_user(args.username))
+        elif args.command == "collections":
+            emit(bgm.get_user_collections(args.username, status=args.status, limit=args.limit))
+    run_cached(ctx, args, run, credential=token)
+
+
+def run_steam(ctx: CLIContext, args: argparse.Namespace) -> None:
+    """Run one "steam" command."""
+    api_key = args.key or os.environ.get("STEAM_API_KEY")
+    if not api_key:
+        print("Error: Steam API key is required (--key or STEAM_API_KEY).", file=sys.stderr)
+        print("Get one at: https://steamcommunity.com/dev/apikey", file=sys.stderr)
+        sys.exit(1)
+
+    def run() -> None:
+        steam = ctx.steam(api_key)
+        if args.command == "summary":
+            emit(steam.get_player_summaries(",".join(args.steamids)))
+        elif args.command == "owned":
+            emit(steam.get_owned_games(args.steamid))
+        elif args.command == "level":
+            emit(steam.get_steam_level(args.steamid))
+        elif args.command == "players":
+            emit(steam.get_number_of_current_players(args.appid))
+        elif args.command == "news":
+            emit(steam.get_news_for_app(args.appid, count=args.count))
+        elif args.command == "resolve":
+            emit(steam.resolve_vanity_url(args.vanityurl))
+        elif args.command == "achievements":
+            emit(steam.get_global_achievement_percentages(args.appid))
+    run_cached(ctx, args, run)
+
+
+def run_batch(ctx: CLIContext, path: Optional[str]) -> int:
+    """
+    Run one command per line in a single process.
+
+    Blank lines and lines starting with "#" are skipped. Cache and tracing
+    options come from the "run" invocation; options on a line are ignored.
+
+    Args:
+        ctx: Shared context
+        path: Command file ("-" or None for stdin)
+
+    Returns:
+        Number of failed lines
+    """
+    import shlex
+
+    parser = build_parser()
+    stream = sys.stdin if path in (None, "-") else open(path, encoding="utf-8")
+    failures = 0
+    try:
+        for line_no, line in enumerate(stream, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                args = parser.parse_args(shlex.split(line))
+                if args.service == "run":
+                    raise ValueError("run cannot be nested")
+                dispatch(ctx, args)
+            except SystemExit as e:
+                if e.code:
+                    failures += 1
+                    print(f"Error: line {line_no} failed: {line}", file=sys.stderr)
+            except Exception as e:
+                failures += 1
+                print(f"Error: line {line_no}: {e}", file=sys.stderr)
+            sys.stdout.flush()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    return failures
+
+
+def dispatch(ctx: CLIContext, args: argparse.Namespace) -> None:
+    """Route parsed arguments to their service."""
+    if args.service == "vndb":
+        run_vndb(ctx, args)
+    elif args.service == "bgm":
+        run_bangumi(ctx, args)
+    elif args.service == "steam":
+        run_steam(ctx, args)
+    elif args.service == "run":
+        if run_batch(ctx, args.file):
+            sys.exit(1)
+
+
+def requested_service(argv: List[str]) -> Optional[str]:
+    """Return the service named on the command line, skipping global option values."""
+    skip = False
+    for arg in argv:
+        if skip:
+            skip = False
+        elif arg in VALUE_OPTIONS:
+            skip = True
+        elif not arg.startswith("-"):
+            return arg if arg in SERVICES else None
+    return None
+
+
+def _add_vndb_commands(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("command", help="character, vn, vn_id, latest, stats, user, schema, query, "
+                                         "sample, facet_index, facet or help")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Command arguments")
+
+
+def _add_bangumi_commands(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--token", help="Bangumi access token (or set BGM_TOKEN env var)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("subject", "Subject details"), ("characters", "Subject characters"),
+                            ("persons", "Subject staff")):
+        commands.add_parser(name, help=help_text).add_argument("id", type=int, help="Subject ID")
+    search = commands.add_parser("search", help="Search subjects")
+    search.add_argument("keyword")
+    search.add_argument("--type", type=int, help="Subject type (1 book, 2 anime, 3 music, 4 game, 6 real)")
+    search.add_argument("--sort", default="match", choices=["match", "heat", "rank", "score"])
+    search.add_argument("--limit", type=int, default=10)
+    commands.add_parser("calendar", help="Broadcast calendar")
+    commands.add_parser("user", help="User profile").add_argument("username")
+    collections = commands.add_parser("collections", help="User collections")
+    collections.add_argument("username")
+    collections.add_argument("--status", help="collect, wish, doing, on_hold or dropped")
+    collections.add_argument("--limit", type=int, default=10)
+
+
+def _add_steam_commands(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("summary", help="Player summaries").add_argument(
+        "steamids", nargs="+", help="Up to 100 Steam IDs")
+    commands.add_parser("owned", help="Owned games").add_argument("steamid")
+    commands.add_parser("level", help="Steam level").add_argument("steamid")
+    commands.add_parser("players", help="Current player count").add_argument("appid", type=int)
+    news = commands.add_parser("news", help="App news")
+    news.add_argument("appid", type=int)
+    news.add_argument("--count", type=int, default=5)
+    commands.add_parser("resolve", help="Resolve a vanity URL").add_argument("vanityurl")
+    commands.add_parser("achievements", help="Global achievement percentages").add_argument(
+        "appid", type=int)
+
+
+def _add_run_commands(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("file", nargs="?", help="Command file (default: stdin)")
+
+
+def build_parser(service: Optional[str] = None) -> argparse.ArgumentParser:
+    """
+    Build the argument parser.
+
+    Building every subcommand parser costs several milliseconds, so when a
+    service is given only its commands are added; the other services are
+    still listed in the top-level help.
+
+    Args:
+        service: Service to build commands for (None for all)
+
+    Returns:
+        Argument parser
+    """
+    parser = argparse.ArgumentParser(prog="galskills",
+                                     description="Unified CLI for the VNDB, Bangumi and Steam skills")
+    parser.add_argument("--cache", default=os.environ.get("GALSKILLS_CACHE", DEFAULT_CACHE_PATH),
+                        help="Shared SQLite output cache (or set GALSKILLS_CACHE)")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+                        help="Seconds cached output stays fresh")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the output cache")
+    parser.add_argument("--profile", action="store_true", help="Print request timings at exit")
+    parser.add_argument("--trace-out", help="Export request timings (JSON, or Prometheus text for .prom)")
+    parser.add_argument("--profile-sample", action="store_true",
+                        help="Also run the sampling profiler")
+    services = parser.add_subparsers(dest="service", required=True)
+    builders = {"vndb": _add_vndb_commands, "bgm": _add_bangumi_commands,
+                "steam": _add_steam_commands, "run": _add_run_commands}
+    for name, help_text in SERVICES.items():
+        subparser = services.add_parser(name, help=help_text)
+        if service is None or service == name:
+            builders[name](subparser)
+    return parser
+
+
+def main():
+    argv = sys.argv[1:]
+    args = build_parser(requested_service(argv)).parse_args(argv)
+
+    tracer = None
+    if args.profile or args.trace_out or args.profile_sample:
+        use_skill("gal-trace")
+        from request_trace import cli_tracer
+        tracer = cli_tracer(profile=args.profile, out_path=args.trace_out, sample=args.profile_sample)
+    ctx = CLIContext(None if args.no_cache else args.cache, args.cache_ttl, tracer=tracer)
+    try:
+        dispatch(ctx, args)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        ctx.close()
+
+
+if __name__ == "__main__":
+    main()
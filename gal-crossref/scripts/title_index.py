@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+"""
+Cross-Source Title Index
+
+Offline matching of visual novel entries across VNDB, Bangumi and Steam.
+
+Each source is exported once to NDJSON records of the form
+{"source": ..., "id": ..., "titles": [...], "steam": [...]}. The index
+normalizes every title variant (NFKC, case-folded, punctuation removed),
+splits it into character bigrams, and keeps an inverted bigram -> variant
+index. This works for Japanese, Chinese and romaji titles alike. Queries are
+scored with the Dice coefficient of their bigram sets. VNDB entries are also
+joined to Steam exactly through the Steam links on their releases.
+
+Usage:
+    python title_index.py export-vndb vndb.ndjson
+    BGM_TOKEN=... python title_index.py export-bangumi bangumi.ndjson --type 4
+    python title_index.py export-steam steam.ndjson --catalog catalog.idx
+    python title_index.py match titles.txt --vndb vndb.ndjson --bangumi bangumi.ndjson
+    python title_index.py join mapping.ndjson --vndb vndb.ndjson --bangumi bangumi.ndjson \\
+        --steam steam.ndjson
+"""
+
+import os
+import sys
+import json
+import math
+import array
+import argparse
+import unicodedata
+from collections import Counter
+from typing import Optional, Dict, Any, FrozenSet, Iterable, Iterator, List, Tuple
+
+SKILLS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for _skill in ("vndb-api", "bangumi-api", "steam-api", "gal-archive"):
+    _scripts = os.path.join(SKILLS_DIR, _skill, "scripts")
+    if _scripts not in sys.path:
+        sys.path.append(_scripts)
+
+SOURCES = ("vndb", "bangumi", "steam")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize a title for matching.
+
+    Applies NFKC (folding full-width forms), case-folds, and keeps only
+    letters and digits, so "Fate/stay night" and "ＦＡＴＥ／ＳＴＡＹ ＮＩＧＨＴ"
+    normalize identically.
+
+    Args:
+        title: Title in any script
+
+    Returns:
+        Normalized title
+    """
+    text = unicodedata.normalize("NFKC", title).casefold()
+    return "".join(ch for ch in text if ch.isalnum())
+
+
+def bigrams(normalized: str) -> List[str]:
+    """Return the distinct character bigrams of a normalized title."""
+    if len(normalized) < 2:
+        return [normalized] if normalized else []
+    return list(dict.fromkeys(normalized[i:i + 2] for i in range(len(normalized) - 1)))
+
+
+class TitleIndex:
+    """Inverted bigram index over title variants of many entries."""
+
+    MAX_CANDIDATES = 200
+
+    def __init__(self):
+        """Create an empty index."""
+        self.entries: List[Tuple[str, str, str]] = []        # (source, id, display title)
+        self.steam_links: Dict[int, List[int]] = {}          # entry -> Steam appids
+        self._variant_entry = array.array("I")
+        self._variant_text: List[str] = []
+        self._variant_grams: List[FrozenSet[str]] = []
+        self._postings: Dict[str, array.array] = {}
+        self._exact: Dict[str, List[int]] = {}               # normalized title -> variants
+        self._by_key: Dict[Tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        """
+        Add one exported record.
+
+        Args:
+            record: Record with "source", "id", "titles" and optional "steam"
+        """
+        titles = [t for t in record.get("titles", []) if t]
+        if not titles:
+            return
+        entry = len(self.entries)
+        self.entries.append((record["source"], str(record["id"]), titles[0]))
+        self._by_key[(record["source"], str(record["id"]))] = entry
+        if record.get("steam"):
+            self.steam_links[entry] = [int(a) for a in record["steam"]]
+
+        for normalized in dict.fromkeys(normalize_title(t) for t in titles):
+            grams = bigrams(normalized)
+            if not grams:
+                continue
+            variant = len(self._variant_entry)
+            self._variant_entry.append(entry)
+            self._variant_text.append(normalized)
+            self._variant_grams.append(frozenset(grams))
+            self._exact.setdefault(normalized, []).append(variant)
+            for gram in grams:
+                postings = self._postings.get(gram)
+                if postings is None:
+                    postings = self._postings[gram] = array.array("I")
+                postings.append(variant)
+
+    def add_records(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Add many exported records."""
+        for record in records:
+            self.add(record)
+
+    def lookup(self, source: str, entry_id: str) -> Optional[int]:
+        """Return the entry number of a source ID, or None."""
+        return self._by_key.get((source, str(entry_id)))
+
+    def match(self, title: str, sources: Optional[Iterable[str]] = None,
+              limit: int = 5, min_score: float = 0.5) -> List[Dict[str, Any]]:
+        """
+        Rank entries whose titles resemble a query title.
+
+        Args:
+            title: Query title in any script
+            sources: Only return entries from these sources (None for all)
+            limit: Maximum candidates per query
+            min_score: Minimum Dice similarity (0-1)
+
+        Returns:
+            Candidates with "source", "id", "title" and "score", best first
+        """
+        normalized = normalize_title(title)
+        grams = bigrams(normalized)
+        if not grams:
+            return []
+        wanted = set(sources) if sources is not None else None
+
+        best: Dict[int, float] = {}
+        for variant in self._exact.get(normalized, []):
+            best[self._variant_entry[variant]] = 1.0
+
+        # Prefix filtering: any variant scoring >= min_score shares at least
+        # min_overlap of the query's bigrams, so it must contain one of the
+        # (len - min_overlap + 1) rarest ones. Only those postings are scanned.
+        postings = sorted((self._postings[g] for g in grams if g in self._postings), key=len)
+        min_overlap = max(1, math.ceil(min_score * len(grams) / (2 - min_score)))
+        shared: Counter = Counter()
+        for variants in postings[:len(grams) - min_overlap + 1]:
+            shared.update(variants)
+        query = set(grams)
+        # Dice >= min_score also bounds the candidate's bigram count.
+        shortest = min_score * len(query) / (2 - min_score)
+        longest = len(query) * (2 - min_score) / min_score if min_score > 0 else math.inf
+        for variant, _ in shared.most_common(self.MAX_CANDIDATES):
+            other = self._variant_grams[variant]
+            if not shortest <= len(other) <= longest:
+                continue
+            score = 2 * len(query & other) / (len(query) + len(other))
+            entry = self._variant_entry[variant]
+            if score >= min_score and score > best.get(entry, 0.0):
+                best[entry] = score
+
+        ranked = sorted(((score, entry) for entry, score in best.items()
+                         if wanted is None or self.entries[entry][0] in wanted),
+                        key=lambda item: (-item[0], item[1]))[:limit]
+        return [{"source": self.entries[entry][0], "id": self.entries[entry][1],
+                 "title": self.entries[entry][2], "score": round(score, 4)}
+                for score, entry in ranked]
+
+    def match_batch(self, titles: Iterable[str], sources: Optional[Iterable[str]] = None,
+                    limit: int = 5, min_score: float = 0.5) -> List[List[Dict[str, Any]]]:
+        """
+        Rank candidates for many titles.
+
+        Args:
+            titles: Query titles
+            sources: Only return entries from these sources (None for all)
+            limit: Maximum candidates per query
+            min_score: Minimum Dice similarity (0-1)
+
+        Returns:
+            One candidate list per query title
+        """
+        sources = list(sources) if sources is not None else None
+        return [self.match(title, sources, limit, min_score) for title in titles]
+
+
+def load_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Read exported records from NDJSON or a gal-archive file."""
+    from gal_archive import read_records
+
+    return read_records(path)
+
+
+def join_vndb(index: TitleIndex, records: Iterable[Dict[str, Any]],
+              limit: int = 3, min_score: float = 0.6) -> Iterator[Dict[str, Any]]:
+    """
+    Map VNDB entries to Bangumi and Steam.
+
+    Steam mappings come from VNDB release links (score 1.0) and are topped
+    up by title matches; Bangumi mappings come from title matches over all
+    of an entry's title variants.
+
+    Args:
+        index: Index containing Bangumi and/or Steam records
+        records: Exported VNDB records
+        limit: Maximum candidates per source
+        min_score: Minimum Dice similarity (0-1)
+
+    Yields:
+        {"vndb": id, "title": ..., "bangumi": [...], "steam": [...]}
+    """
+    for record in records:
+        titles = [t for t in record.get("titles", []) if t]
+        candidates: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = {"bangumi": {}, "steam": {}}
+        for appid in record.get("steam", []):
+            entry = index.lookup("steam", str(appid))
+            title = index.entries[entry][2] if entry is not None else ""
+            candidates["steam"][("steam", str(appid))] = {
+                "source": "steam", "id": str(appid), "title": title, "score": 1.0, "exact": True}
+        for title in titles:
+            for match in index.match(title, ("bangumi", "steam"), limit, min_score):
+                key = (match["source"], match["id"])
+                current = candidates[match["source"]].get(key)
+                if current is None or match["score"] > current["score"]:
+                    candidates[match["source"]][key] = match
+        yield {
+            "vndb": record["id"],
+            "title": titles[0] if titles else "",
+            **{source: sorted(found.values(), key=lambda m: -m["score"])[:limit]
+               for source, found in candidates.items()}
+        }
+
+
+def export_vndb(out_path: str) -> int:
+    """
+    Export VNDB VN titles and Steam release links to NDJSON.
+
+    Args:
+        out_path: Output path (NDJSON, or a gal-archive file if it ends in .galz)
+
+    Returns:
+        Number of records written
+    """
+    from vndb_query import VNDBClient, iter_entries
+    from gal_archive import open_writer
+
+    client = VNDBClient()
+    steam: Dict[str, List[str]] = {}
+    for release in iter_entries(client, "release", "vns.id,extlinks.name,extlinks.id",
+                                ["extlink", "=", "steam"]):
+        appids = [str(link["id"]) for link in release.get("extlinks", [])
+                  if link.get("name") == "steam"]
+        for vn in release.get("vns", []):
+            steam.setdefault(vn["id"], []).extend(appids)
+
+    with open_writer(out_path) as writer:
+        for vn in iter_entries(client, "vn", "title,alttitle,titles.title,titles.latin,aliases"):
+            titles = [vn.get("title"), vn.get("alttitle")]
+            for variant in vn.get("titles", []):
+                titles += [variant.get("title"), variant.get("latin")]
+            titles += vn.get("aliases", [])
+            record = {"source": "vndb", "id": vn["id"],
+                      "titles": list(dict.fromkeys(t for t in titles if t)),
+                      "steam": list(dict.fromkeys(steam.get(vn["id"], [])))}
+            writer.write(record)
+    return writer.records
+
+
+def export_bangumi(out_path: str, token: str, subject_type: int = 4) -> int:
+    """
+    Export Bangumi subject titles to NDJSON.
+
+    Args:
+        out_path: Output path (NDJSON, or a gal-archive file if it ends in .galz)
+        token: Bangumi access token
+        subject_type: Subject type (4=game)
+
+    Returns:
+        Number of records written
+    """
+    from bangumi_api_example import BangumiAPI
+    from gal_archive import open_writer
+
+    with open_writer(out_path) as writer:
+        for subject in BangumiAPI(token).iter_subjects(subject_type):
+            titles = [subject.get("name"), subject.get("name_cn")]
+            for item in subject.get("infobox") or []:
+                if item.get("key") == "别名" and isinstance(item.get("value"), list):
+                    titles += [alias.get("v") for alias in item["value"]]
+            record = {"source": "bangumi", "id": subject["id"],
+                      "titles": list(dict.fromkeys(t for t in titles if t))}
+            writer.write(record)
+    return writer.records
+
+
+def export_steam(out_path: str, catalog_path: str) -> int:
+    """
+    Export Steam app names from a steam_catalog.py index to NDJSON.
+
+    Args:
+        out_path: Output path (NDJSON, or a gal-archive file if it ends in .galz)
+        catalog_path: Catalog index built by steam_catalog.py
+
+    Returns:
+        Number of records written
+    """
+    from steam_catalog import CatalogIndex
+    from gal_archive import open_writer
+
+    with CatalogIndex(catalog_path) as catalog, open_writer(out_path) as writer:
+        for appid, name in catalog.items():
+            writer.write({"source": "steam", "id": appid, "titles": [name]})
+    return writer.records
+
+
+def build_index(paths: Dict[str, Optional[str]]) -> TitleIndex:
+    """Build an index from the given per-source export files."""
+    index = TitleIndex()
+    for source in SOURCES:
+        if paths.get(source):
+            index.add_records(load_records(paths[source]))
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-Source Title Index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    vndb_parser = subparsers.add_parser("export-vndb", help="Export VNDB titles and Steam links")
+    vndb_parser.add_argument("out", help="Output NDJSON path")
+
+    bgm_parser = subparsers.add_parser("export-bangumi", help="Export Bangumi subject titles")
+    bgm_parser.add_argument("out", help="Output NDJSON path")
+    bgm_parser.add_argument("--token", help="Bangumi access token (or set BGM_TOKEN env var)")
+    bgm_parser.add_argument("--type", type=int, default=4, help="Subject type (4=game)")
+
+    steam_parser = subparsers.add_parser("export-steam", help="Export Steam app names")
+    steam_parser.add_argument("out", help="Output NDJSON path")
+    steam_parser.add_argument("--catalog", required=True, help="steam_catalog.py index file")
+
+    for name, help_text in (("match", "Rank candidates for titles (one per line)"),
+                            ("join", "Map every VNDB entry to Bangumi and Steam")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("input" if name == "match" else "out",
+                         help="Titles file" if name == "match" else "Output NDJSON path")
+        for source in SOURCES:
+            sub.add_argument(f"--{source}", help=f"{source} export (NDJSON or .galz)")
+        sub.add_argument("--limit", type=int, default=3, help="Candidates per source")
+        sub.add_argument("--min-score", type=float, default=0.6, help="Minimum similarity")
+    args = parser.parse_args()
+
+    if args.command == "export-vndb":
+        print(f"Exported {export_vndb(args.out)} VNDB entries")
+    elif args.command == "export-bangumi":
+        token = args.token or os.environ.get("BGM_TOKEN")
+        if not token:
+            print("Error: Bangumi access token is required.")
+            print("Get one at: https://next.bgm.tv/demo/access-token")
+            sys.exit(1)
+        print(f"Exported {export_bangumi(args.out, token, args.type)} Bangumi subjects")
+    elif args.command == "export-steam":
+        print(f"Exported {export_steam(args.out, args.catalog)} Steam apps")
+
+    elif args.command == "match":
+        index = build_index({source: getattr(args, source) for source in SOURCES})
+        with open(args.input, encoding="utf-8") as f:
+            titles = [line.strip() for line in f if line.strip()]
+        for title, candidates in zip(titles, index.match_batch(titles, limit=args.limit,
+                                                                min_score=args.min_score)):
+            print(json.dumps({"query": title, "candidates": candidates}, ensure_ascii=False))
+
+    elif args.command == "join":
+        if not args.vndb:
+            parser.error("join requires --vndb")
+        index = build_index({"bangumi": args.bangumi, "steam": args.steam})
+        count = 0
+        with open(args.out, "w", encoding="utf-8") as f:
+            for mapping in join_vndb(index, load_records(args.vndb), args.limit, args.min_score):
+                f.write(json.dumps(mapping, ensure_ascii=False) + "\n")
+                count += 1
+        print(f"Mapped {count} VNDB entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Adaptive Per-Host Concurrency Control (AIMD)
+
+Limits how many requests may be in flight to each host and tunes that limit
+from the responses, in the manner of TCP congestion control:
+
+- Additive increase: while the window is in use and responses are healthy,
+  the limit grows by about one request per window of completed requests.
+- Multiplicative decrease: a 429, a 5xx, a connection error or smoothed
+  latency well above the host's baseline cuts the limit (by half by
+  default). Only requests started after the previous cut can cut again, so
+  one burst of failures counts once.
+
+BangumiAPI (bangumi-api) and SteamAPI (steam-api) accept a controller as
+their "concurrency" argument. Threads beyond the current window block until
+a slot frees up, so bulk jobs can simply use many workers.
+
+Usage:
+    from adaptive_concurrency import AIMDController
+    from steam_api_example import SteamAPI
+
+    controller = AIMDController(initial=2, max_limit=16)
+    steam = SteamAPI(api_key, concurrency=controller)
+    steam.get_player_summaries_batch(steamids)
+    print(controller.window("api.steampowered.com"))
+    print(controller.snapshot())
+
+    # Watch the window settle against a simulated host
+    python adaptive_concurrency.py simulate --capacity 12 --latency-ms 40 --requests 2000
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from typing import Optional, Dict, Any, Iterable, List
+
+
+def is_congestion_status(status: Optional[int]) -> bool:
+    """Return True for statuses that mean the host is overloaded."""
+    return status is not None and (status == 429 or status >= 500)
+
+
+class _HostWindow:
+    """Concurrency window and latency estimates for one host."""
+
+    def __init__(self, limit: float):
+        self.limit = limit
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.baseline: Optional[float] = None
+        self.last_decrease = float("-inf")
+        self.stats = {"completed": 0, "increases": 0, "decreases": 0, "throttled": 0,
+                      "errors": 0, "slow": 0, "wait_seconds": 0.0}
+
+
+class Permit:
+    """One in-flight request slot; release it by leaving the with block."""
+
+    def __init__(self, controller: "AIMDController", host: str, window: _HostWindow,
+                 saturated: bool):
+        self.controller = controller
+        self.host = host
+        self.started = time.monotonic()
+        self.status: Optional[int] = None
+        self.latency: Optional[float] = None
+        self._window = window
+        self._saturated = saturated
+        self._congested = False
+        self._released = False
+
+    def report(self, status: int, retried: Iterable[Optional[int]] = ()) -> None:
+        """
+        Record the response status; latency is measured up to this call.
+
+        Args:
+            status: Final HTTP status
+            retried: Statuses of attempts retried by the transport
+        """
+        self.status = status
+        self.latency = time.monotonic() - self.started
+        self._congested = is_congestion_status(status) or any(
+            is_congestion_status(code) for code in retried)
+
+    def release(self, error: bool = False) -> None:
+        """Free the slot and feed the outcome back to the controller."""
+        if not self._released:
+            self._released = True
+            self.controller._release(self, self._window, error, self._congested, self._saturated)
+
+    def __enter__(self) -> "Permit":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # A streaming generator closed early is not a failed request
+        self.release(error=exc_type is not None and exc_type is not GeneratorExit
+                     and self.status is None)
+
+
+class AIMDController:
+    """Per-host AIMD concurrency limiter, shared by any number of threads and clients."""
+
+    def __init__(self, initial: float = 2, min_limit: float = 1, max_limit: float = 32,
+                 increase: float = 1.0, decrease: float = 0.5, latency_tolerance: float = 1.5,
+                 latency_slack: float = 0.02, smoothing: float = 0.2):
+        """
+        Initialize the controller.
+
+        Args:
+            initial: Starting window for a new host
+            min_limit: Lowest window
+            max_limit: Highest window
+            increase: Window growth per window of healthy responses
+            decrease: Factor applied to the window on congestion
+            latency_tolerance: Smoothed latency above baseline times this counts as congestion
+            latency_slack: Seconds added to the latency threshold, so that jitter on
+                very fast hosts is not mistaken for congestion
+            smoothing: Weight of a new sample in the latency moving average
+        """
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        if not 1 <= min_limit <= initial <= max_limit:
+            raise ValueError("Expected 1 <= min_limit <= initial <= max_limit")
+        self.initial = initial
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack = latency_slack
+        self.smoothing = smoothing
+        self._windows: Dict[str, _HostWindow] = {}
+        self._cond = threading.Condition()
+
+    def _window(self, host: str) -> _HostWindow:
+        window = self._windows.get(host)
+        if window is None:
+            window = self._windows[host] = _HostWindow(self.initial)
+        return window
+
+    def acquire(self, host: str) -> Permit:
+        """
+        Block until a request to host may start.
+
+        Args:
+            host: Host name (and port, if any)
+
+        Returns:
+            Permit to report the response on and release
+        """
+        started = time.monotonic()
+        with self._cond:
+            window = self._window(host)
+            while window.in_flight >= int(window.limit):
+                self._cond.wait()
+            window.in_flight += 1
+            window.stats["wait_seconds"] += time.monotonic() - started
+            # Only grow the window when the request actually needed all of it
+            saturated = window.in_flight >= int(window.limit)
+        return Permit(self, host, window, saturated)
+
+    def _release(self, permit: Permit, window: _HostWindow, error: bool,
+                 congested: bool, saturated: bool) -> None:
+        now = time.monotonic()
+        latency = permit.latency if permit.latency is not None else now - permit.started
+        with self._cond:
+            window.in_flight -= 1
+            window.stats["completed"] += 1
+            slow = False
+            if error:
+                window.stats["errors"] += 1
+            elif congested:
+                window.stats["throttled"] += 1
+            else:
+                if window.latency is None:
+                    window.latency = latency
+                else:
+                    window.latency += self.smoothing * (latency - window.latency)
+                if window.baseline is None or latency < window.baseline:
+                    window.baseline = latency
+                else:
+                    # Let the baseline follow a lasting change in path latency
+                    window.baseline += 0.01 * (window.latency - window.baseline)
+                slow = window.latency > window.baseline * self.latency_tolerance + self.latency_slack
+                if slow:
+                    window.stats["slow"] += 1
+
+            if error or congested or slow:
+                if permit.started >= window.last_decrease:
+                    window.limit = max(self.min_limit, window.limit * self.decrease)
+                    window.last_decrease = now
+                    window.stats["decreases"] += 1
+            elif saturated and window.limit < self.max_limit:
+                window.limit = min(self.max_limit, window.limit + self.increase / window.limit)
+                window.stats["increases"] += 1
+            self._cond.notify_all()
+
+    def window(self, host: str) -> float:
+        """Return the current window (allowed in-flight requests) for a host."""
+        with self._cond:
+            window = self._windows.get(host)
+            return window.limit if window is not None else self.initial
+
+    def in_flight(self, host: str) -> int:
+        """Return the number of requests currently in flight to a host."""
+        with self._cond:
+            window = self._windows.get(host)
+            return window.in_flight if window is not None else 0
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the state of every host seen so far.
+
+        Returns:
+            Host -> window, in-flight count, latency estimates and counters
+        """
+        with self._cond:
+            return {
+                host: dict(window.stats,
+                           window=round(window.limit, 3),
+                           in_flight=window.in_flight,
+                           latency_ms=None if window.latency is None else round(window.latency * 1000, 2),
+                           baseline_ms=None if window.baseline is None else round(window.baseline * 1000, 2))
+                for host, window in self._windows.items()
+            }
+
+
+def simulate(controller: AIMDController, capacity: int, latency_ms: float, requests: int,
+             workers: int, seed: int = 1) -> List[Dict[str, Any]]:
+    """
+    Run the controller against a simulated host.
+
+    The host serves up to capacity requests at once at latency_ms each.
+    Beyond that, latency grows with the queue, and requests beyond twice
+    the capacity are answered with 429.
+
+    Args:
+        controller: Controller under test
+        capacity: Requests the host serves in parallel without slowing down
+        latency_ms: Service time of one request
+        requests: Total requests to send
+        workers: Client threads
+        seed: Random seed for latency jitter
+
+    Returns:
+        Window samples (one per 5% of the requests)
+    """
+    host = "simulated"
+    lock = threading.Lock()
+    state = {"active": 0, "sent": 0}
+    samples: List[Dict[str, Any]] = []
+    rng = random.Random(seed)
+    started = time.monotonic()
+
+    def worker() -> None:
+        while True:
+            with lock:
+                if state["sent"] >= requests:
+                    return
+                state["sent"] += 1
+                sent = state["sent"]
+            with controller.acquire(host) as permit:
+                with lock:
+                    state["active"] += 1
+                    active = state["active"]
+                    jitter = rng.uniform(0.9, 1.1)
+                if active > 2 * capacity:
+                    time.sleep(latency_ms / 4000)
+                    status = 429
+                else:
+                    time.sleep(latency_ms / 1000 * jitter * max(1.0, active / capacity))
+                    status = 200
+                with lock:
+                    state["active"] -= 1
+                permit.report(status)
+            if sent % max(1, requests // 20) == 0:
+                snapshot = controller.snapshot()[host]
+                samples.append({"requests": sent, "elapsed_s": round(time.monotonic() - started, 2),
+                                "window": snapshot["window"], "latency_ms": snapshot["latency_ms"],
+                                "throttled": snapshot["throttled"]})
+
+    threads = [threading.Thread(target=worker) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Adaptive Per-Host Concurrency Control (AIMD)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sim_parser = subparsers.add_parser("simulate", help="Run the controller against a simulated host")
+    sim_parser.add_argument("--capacity", type=int, default=12,
+                            help="Parallel requests the simulated host serves without slowing down")
+    sim_parser.add_argument("--latency-ms", type=float, default=40.0, help="Service time per request")
+    sim_parser.add_argument("--requests", type=int, default=2000, help="Requests to send")
+    sim_parser.add_argument("--workers", type=int, default=64, help="Client threads")
+    sim_parser.add_argument("--initial", type=float, default=2)
+    sim_parser.add_argument("--max-limit", type=float, default=64)
+    sim_parser.add_argument("--json", action="store_true", help="Print samples as JSON")
+    args = parser.parse_args()
+
+    controller = AIMDController(initial=args.initial, max_limit=args.max_limit)
+    started = time.monotonic()
+    samples = simulate(controller, args.capacity, args.latency_ms, args.requests, args.workers)
+    elapsed = time.monotonic() - started
+
+    if args.json:
+        print(json.dumps({"samples": samples, "final": controller.snapshot()["simulated"]}, indent=2))
+        return
+    print(f"{'requests':>9} {'elapsed s':>10} {'window':>8} {'latency ms':>11} {'429s':>6}")
+    for sample in samples:
+        print(f"{sample['requests']:9} {sample['elapsed_s']:10.2f} {sample['window']:8.2f} "
+              f"{sample['latency_ms'] or 0:11.2f} {sample['throttled']:6}")
+    print(f"\n{args.requests / elapsed:.1f} requests/s; ideal at capacity "
+          f"{args.capacity / (args.latency_ms / 1000):.1f} requests/s")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
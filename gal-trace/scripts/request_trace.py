@@ -0,0 +1,623 @@
+#!/usr/bin/env python3
+"""
+Request Tracing for the Gal Skills API Clients
+
+A common instrumentation hook for VNDBClient, BangumiAPI and SteamAPI. Pass
+a Tracer to a client and every request becomes a span whose time is split
+into phases:
+
+    wait      time spent in the client's own throttling before sending
+    dns       name resolution            (new connections only)
+    connect   TCP connect                (new connections only)
+    tls       TLS handshake              (new connections only)
+    server    request sent until response headers arrive
+    transfer  reading the response body
+    decode    JSON decoding
+
+dns/connect/tls are measured by wrapping socket.getaddrinfo,
+socket.socket.connect and ssl.SSLContext.wrap_socket. The wrappers are
+opt-in (network_hooks=True, always on for the CLI options), only time
+calls made while a span is active on the calling thread, and are removed
+again when the last tracer using them is closed. Spans are
+aggregated into per-endpoint counters and latency histograms, alongside
+events such as cache hits, retries and new vs reused connections. An
+optional sampling profiler records folded stacks of all threads.
+
+Results export to JSON or Prometheus text format, and summary() renders
+the table printed by the clients' --profile option.
+
+Usage:
+    from request_trace import Tracer
+    from vndb_query import VNDBClient
+
+    tracer = Tracer(network_hooks=True)
+    client = VNDBClient(tracer=tracer)
+    client.post("vn", {"filters": ["search", "=", "Clannad"], "fields": "title"})
+    tracer.close()
+    print(tracer.summary())
+    tracer.export("trace.prom")
+
+    python vndb_query.py --profile --trace-out trace.json vn "Clannad"
+    python request_trace.py show trace.json
+"""
+
+import re
+import sys
+import json
+import time
+import random
+import socket
+import ssl
+import atexit
+import argparse
+import threading
+from collections import Counter
+from typing import Optional, Dict, Any, List, Tuple
+
+PHASES = ("wait", "dns", "connect", "tls", "server", "transfer", "decode")
+NETWORK_PHASES = ("dns", "connect", "tls")
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRIC_PREFIX = "galskills"
+
+# Numeric path segments (subject, person, character IDs) become {id}
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+_local = threading.local()
+
+
+def current_span() -> Optional["Span"]:
+    """Return the span active on this thread, or None."""
+    return getattr(_local, "span", None)
+
+
+def normalize_endpoint(path: str) -> str:
+    """Replace ID path segments with {id} to keep endpoint labels bounded."""
+    return "/".join("{id}" if _ID_SEGMENT.match(part) else part for part in path.split("/"))
+
+
+class Span:
+    """Timing of one request, split into phases."""
+
+    def __init__(self, tracer: "Tracer", service: str, method: str, endpoint: str):
+        self.tracer = tracer
+        self.service = service
+        self.method = method
+        self.endpoint = normalize_endpoint(endpoint)
+        self.phases: Dict[str, float] = {}
+        self.events: Dict[str, int] = {}
+        self.status: Optional[int] = None
+        self.error: Optional[str] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.duration = 0.0
+        self.started = time.perf_counter()
+        self._last = self.started
+        self._network = 0.0
+        self._finished = False
+        self._previous = current_span()
+        _local.span = self
+
+    def __enter__(self) -> "Span":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # A streaming generator closed early is not a failed request
+        if exc_type is not None and exc_type is not GeneratorExit and self.error is None:
+            self.error = exc_type.__name__
+        self.finish()
+
+    def add_phase(self, phase: str, seconds: float) -> None:
+        """Add time to a phase measured outside mark() (e.g. by network hooks)."""
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+        if phase in NETWORK_PHASES:
+            self._network += seconds
+
+    def mark(self, phase: str, seconds: Optional[float] = None) -> None:
+        """
+        Close a phase: attribute the time since the previous mark to it.
+
+        Network phases timed by the hooks in the meantime are subtracted.
+
+        Args:
+            phase: Phase name (see PHASES)
+            seconds: Attribute this much instead of the time since the
+                previous mark (for timings reported by a library)
+        """
+        now = time.perf_counter()
+        if seconds is not None:
+            now = min(now, self._last + seconds)
+        self.phases[phase] = self.phases.get(phase, 0.0) + max(0.0, now - self._last - self._network)
+        self._last = now
+        self._network = 0.0
+
+    def event(self, name: str, count: int = 1) -> None:
+        """Count an event on this request (retry, ...)."""
+        if count:
+            self.events[name] = self.events.get(name, 0) + count
+
+    def set(self, status: Optional[int] = None, bytes_in: Optional[int] = None,
+            bytes_out: Optional[int] = None, error: Optional[str] = None) -> None:
+        """Record the outcome of the request."""
+        if status is not None:
+            self.status = status
+        if bytes_in is not None:
+            self.bytes_in = bytes_in
+        if bytes_out is not None:
+            self.bytes_out = bytes_out
+        if error is not None:
+            self.error = error
+
+    def finish(self) -> None:
+        """End the span and hand it to the tracer (idempotent)."""
+        if self._finished:
+            return
+        self._finished = True
+        self.duration = time.perf_counter() - self.started
+        if current_span() is self:
+            _local.span = self._previous
+        if self.tracer._hooked:
+            self.event("new_connection" if "connect" in self.phases else "reused_connection")
+        if self.status is not None and self.status >= 400 and self.error is None:
+            self.error = f"HTTP {self.status}"
+        self.tracer._record(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span as a JSON-serializable dictionary."""
+        return {"service": self.service, "method": self.method, "endpoint": self.endpoint,
+                "status": self.status, "error": self.error,
+                "duration": round(self.duration, 6),
+                "phases": {k: round(v, 6) for k, v in self.phases.items()},
+                "events": self.events, "bytes_in": self.bytes_in, "bytes_out": self.bytes_out}
+
+
+class _EndpointStats:
+    """Aggregated counters and histogram for one endpoint."""
+
+    RESERVOIR_SIZE = 2048
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.count = 0
+        self.errors = 0
+        self.status: Counter = Counter()
+        self.bucket_counts = [0] * len(buckets)
+        self.duration_sum = 0.0
+        self.phase_sums: Dict[str, float] = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.samples: List[float] = []
+
+    def add(self, span: Span, buckets: Tuple[float, ...], rng: random.Random) -> None:
+        self.count += 1
+        self.errors += int(span.error is not None)
+        self.status[str(span.status) if span.status is not None else "none"] += 1
+        for i, bound in enumerate(buckets):
+            if span.duration <= bound:
+                self.bucket_counts[i] += 1
+        self.duration_sum += span.duration
+        for phase, seconds in span.phases.items():
+            self.phase_sums[phase] = self.phase_sums.get(phase, 0.0) + seconds
+        self.bytes_in += span.bytes_in
+        self.bytes_out += span.bytes_out
+        # Reservoir sample of durations for percentiles
+        if len(self.samples) < self.RESERVOIR_SIZE:
+            self.samples.append(span.duration)
+        else:
+            slot = rng.randrange(self.count)
+            if slot < self.RESERVOIR_SIZE:
+                self.samples[slot] = span.duration
+
+    def percentile(self, fraction: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class SamplingProfiler:
+    """Periodically samples the stacks of all threads."""
+
+    MAX_DEPTH = 64
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Initialize the profiler.
+
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start sampling on a daemon thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="request-trace-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                names = []
+                while frame is not None and len(names) < self.MAX_DEPTH:
+                    code = frame.f_code
+                    names.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+
+_hooks_lock = threading.Lock()
+_hooks_users = 0
+_hooks_originals: List[Tuple[Any, str, Any]] = []
+
+
+def install_network_hooks() -> None:
+    """
+    Wrap DNS, TCP connect and TLS handshake calls to time them per span.
+
+    Calls are counted; the wrappers stay in place until
+    uninstall_network_hooks() has been called as often.
+    """
+    global _hooks_users
+    with _hooks_lock:
+        _hooks_users += 1
+        if _hooks_users > 1:
+            return
+
+        def timed(phase, original):
+            def wrapper(*args, **kwargs):
+                span = current_span()
+                if span is None:
+                    return original(*args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    span.add_phase(phase, time.perf_counter() - started)
+            wrapper.__wrapped__ = original
+            return wrapper
+
+        for owner, name, phase in ((socket, "getaddrinfo", "dns"),
+                                   (socket.socket, "connect", "connect"),
+                                   (ssl.SSLContext, "wrap_socket", "tls")):
+            original = getattr(owner, name)
+            _hooks_originals.append((owner, name, original))
+            setattr(owner, name, timed(phase, original))
+
+
+def uninstall_network_hooks() -> None:
+    """Undo one install_network_hooks() call, restoring the originals after the last."""
+    global _hooks_users
+    with _hooks_lock:
+        if _hooks_users == 0:
+            return
+        _hooks_users -= 1
+        if _hooks_users == 0:
+            while _hooks_originals:
+                owner, name, original = _hooks_originals.pop()
+                setattr(owner, name, original)
+
+
+class Tracer:
+    """Collects request spans and events from the API clients."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, keep_spans: int = 1000,
+                 network_hooks: bool = False):
+        """
+        Initialize the tracer.
+
+        Args:
+            buckets: Latency histogram bucket bounds in seconds
+            keep_spans: Number of most recent spans kept for export
+            network_hooks: Time DNS/connect/TLS via process-wide socket and
+                ssl wrappers until close() is called
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.keep_spans = keep_spans
+        self.network_hooks = network_hooks
+        self.profiler: Optional[SamplingProfiler] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._endpoints: Dict[Tuple[str, str, str], _EndpointStats] = {}
+        self._events: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(0)
+        self.started = time.time()
+        self._hooked = False
+        if network_hooks:
+            install_network_hooks()
+            self._hooked = True
+
+    def close(self) -> None:
+        """Stop the profiler and remove this tracer's network hooks (idempotent)."""
+        self.stop_profiler()
+        if self._hooked:
+            self._hooked = False
+            uninstall_network_hooks()
+
+    def start_span(self, service: str, method: str, endpoint: str) -> Span:
+        """
+        Start a request span on the current thread.
+
+        Args:
+            service: Client name ("vndb", "bangumi", "steam")
+            method: HTTP method
+            endpoint: Request path (IDs are normalized to {id})
+
+        Returns:
+            Span; use as a context manager or call finish()
+        """
+        return Span(self, service, method, endpoint)
+
+    def event(self, name: str, service: str, endpoint: str = "", count: int = 1) -> None:
+        """
+        Count an event outside a request span (e.g. a cache hit).
+
+        Args:
+            name: Event name
+            service: Client name
+            endpoint: Request path
+            count: Amount to add
+        """
+        with self._lock:
+            self._events[(service, normalize_endpoint(endpoint), name)] += count
+
+    def record_wait(self, service: str, endpoint: str, seconds: float) -> None:
+        """Add client-side waiting to the current span, or count it as an event."""
+        span = current_span()
+        if span is not None:
+            span.add_phase("wait", seconds)
+        else:
+            with self._lock:
+                self._events[(service, normalize_endpoint(endpoint), "wait_seconds")] += seconds
+
+    def _record(self, span: Span) -> None:
+        key = (span.service, span.method, span.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = _EndpointStats(self.buckets)
+            stats.add(span, self.buckets, self._rng)
+            for name, count in span.events.items():
+                self._events[(span.service, span.endpoint, name)] += count
+            if self.keep_spans:
+                self.spans.append(span.to_dict())
+                if len(self.spans) > self.keep_spans:
+                    del self.spans[:len(self.spans) - self.keep_spans]
+
+    def start_profiler(self, interval: float = 0.005) -> None:
+        """Start the sampling profiler."""
+        if self.profiler is None:
+            self.profiler = SamplingProfiler(interval)
+        self.profiler.start()
+
+    def stop_profiler(self) -> None:
+        """Stop the sampling profiler, keeping its samples."""
+        if self.profiler is not None:
+            self.profiler.stop()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get all collected data.
+
+        Returns:
+            JSON-serializable dictionary of endpoints, events, recent spans
+            and profiler stacks
+        """
+        with self._lock:
+            endpoints = []
+            for (service, method, endpoint), stats in sorted(self._endpoints.items()):
+                endpoints.append({
+                    "service": service, "method": method, "endpoint": endpoint,
+                    "count": stats.count, "errors": stats.errors, "status": dict(stats.status),
+                    "duration_sum": round(stats.duration_sum, 6),
+                    "p50": round(stats.percentile(0.50), 6), "p99": round(stats.percentile(0.99), 6),
+                    "buckets": dict(zip([str(b) for b in self.buckets], stats.bucket_counts)),
+                    "phase_sums": {k: round(v, 6) for k, v in stats.phase_sums.items()},
+                    "bytes_in": stats.bytes_in, "bytes_out": stats.bytes_out,
+                })
+            events = [{"service": service, "endpoint": endpoint, "event": name, "count": count}
+                      for (service, endpoint, name), count in sorted(self._events.items())]
+            spans = list(self.spans)
+        data: Dict[str, Any] = {"started": self.started, "endpoints": endpoints,
+                                "events": events, "spans": spans}
+        if self.profiler is not None:
+            data["profile"] = {"interval": self.profiler.interval, "samples": self.profiler.samples,
+                               "stacks": dict(self.profiler.stacks.most_common())}
+        return data
+
+    def export_json(self, path: str) -> None:
+        """Write snapshot() as JSON."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+    def export_prometheus(self, path: str) -> None:
+        """Write the counters and histograms in Prometheus text format."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render_prometheus(self.snapshot()))
+
+    def export(self, path: str) -> None:
+        """Export to Prometheus text if path ends in .prom or .txt, else JSON."""
+        if path.endswith((".prom", ".txt")):
+            self.export_prometheus(path)
+        else:
+            self.export_json(path)
+
+    def summary(self) -> str:
+        """Render the per-endpoint summary table."""
+        return render_summary(self.snapshot())
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: Any) -> str:
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def render_prometheus(data: Dict[str, Any]) -> str:
+    """
+    Render a snapshot in Prometheus text exposition format.
+
+    Args:
+        data: Tracer.snapshot() output
+
+    Returns:
+        Exposition text
+    """
+    p = METRIC_PREFIX
+    lines = [f"# HELP {p}_requests_total Requests by endpoint and status.",
+             f"# TYPE {p}_requests_total counter"]
+    for ep in data["endpoints"]:
+        for status, count in sorted(ep["status"].items()):
+            lines.append(f"{p}_requests_total"
+                         f"{_labels(service=ep['service'], method=ep['method'], endpoint=ep['endpoint'], status=status)}"
+                         f" {count}")
+
+    lines += [f"# HELP {p}_request_duration_seconds Request duration.",
+              f"# TYPE {p}_request_duration_seconds histogram"]
+    for ep in data["endpoints"]:
+        base = dict(service=ep["service"], method=ep["method"], endpoint=ep["endpoint"])
+        for bound, count in ep["buckets"].items():
+            lines.append(f"{p}_request_duration_seconds_bucket{_labels(**base, le=bound)} {count}")
+        lines.append(f"{p}_request_duration_seconds_bucket{_labels(**base, le='+Inf')} {ep['count']}")
+        lines.append(f"{p}_request_duration_seconds_sum{_labels(**base)} {ep['duration_sum']}")
+        lines.append(f"{p}_request_duration_seconds_count{_labels(**base)} {ep['count']}")
+
+    lines += [f"# HELP {p}_request_phase_seconds_total Time spent per request phase.",
+              f"# TYPE {p}_request_phase_seconds_total counter"]
+    for ep in data["endpoints"]:
+        for phase, seconds in sorted(ep["phase_sums"].items()):
+            lines.append(f"{p}_request_phase_seconds_total"
+                         f"{_labels(service=ep['service'], method=ep['method'], endpoint=ep['endpoint'], phase=phase)}"
+                         f" {seconds}")
+
+    lines += [f"# HELP {p}_response_bytes_total Response body bytes.",
+              f"# TYPE {p}_response_bytes_total counter"]
+    for ep in data["endpoints"]:
+        lines.append(f"{p}_response_bytes_total"
+                     f"{_labels(service=ep['service'], method=ep['method'], endpoint=ep['endpoint'])}"
+                     f" {ep['bytes_out']}")
+
+    lines += [f"# HELP {p}_events_total Cache, retry and connection events.",
+              f"# TYPE {p}_events_total counter"]
+    for ev in data["events"]:
+        lines.append(f"{p}_events_total"
+                     f"{_labels(service=ev['service'], endpoint=ev['endpoint'], event=ev['event'])}"
+                     f" {ev['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def render_summary(data: Dict[str, Any], top: int = 10) -> str:
+    """
+    Render a snapshot as a summary table.
+
+    Args:
+        data: Tracer.snapshot() output
+        top: Number of profiler leaf frames to list
+
+    Returns:
+        Table text
+    """
+    header = (f"{'endpoint':48} {'count':>6} {'err':>4} {'p50 ms':>8} {'p99 ms':>8}"
+              + "".join(f" {phase:>8}" for phase in PHASES))
+    lines = [header, "-" * len(header)]
+    for ep in data["endpoints"]:
+        name = f"{ep['service']} {ep['method']} {ep['endpoint']}"
+        count = ep["count"] or 1
+        phases = "".join(f" {ep['phase_sums'].get(phase, 0.0) / count * 1000:8.2f}" for phase in PHASES)
+        lines.append(f"{name[:48]:48} {ep['count']:6d} {ep['errors']:4d} "
+                     f"{ep['p50'] * 1000:8.2f} {ep['p99'] * 1000:8.2f}{phases}")
+    lines.append("(phase columns: mean ms per request)")
+
+    if data["events"]:
+        lines.append("")
+        lines.append("events: " + ", ".join(
+            f"{ev['service']} {ev['event']}={ev['count']:g}" for ev in _merge_events(data["events"])))
+
+    profile = data.get("profile")
+    if profile and profile["samples"]:
+        leaves: Counter = Counter()
+        for stack, count in profile["stacks"].items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        lines.append("")
+        lines.append(f"profile: {profile['samples']} samples every {profile['interval'] * 1000:g} ms")
+        for frame, count in leaves.most_common(top):
+            lines.append(f"  {count:6d}  {frame}")
+    return "\n".join(lines)
+
+
+def _merge_events(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Sum events over endpoints for the summary line."""
+    merged: Counter = Counter()
+    for ev in events:
+        merged[(ev["service"], ev["event"])] += ev["count"]
+    return [{"service": service, "event": name, "count": count}
+            for (service, name), count in sorted(merged.items())]
+
+
+def cli_tracer(profile: bool = False, out_path: Optional[str] = None,
+               sample: bool = False) -> Tracer:
+    """
+    Create a tracer for a CLI run and report it at process exit.
+
+    Args:
+        profile: Print the summary table to stderr at exit
+        out_path: Export to this path at exit (.prom/.txt for Prometheus text)
+        sample: Run the sampling profiler
+
+    Returns:
+        Tracer to pass to the client
+    """
+    tracer = Tracer(network_hooks=True)
+    if sample:
+        tracer.start_profiler()
+
+    def report() -> None:
+        tracer.close()
+        if out_path:
+            tracer.export(out_path)
+        if profile or sample:
+            print(tracer.summary(), file=sys.stderr)
+
+    atexit.register(report)
+    return tracer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Request Tracing for the Gal Skills API Clients")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    show_parser = subparsers.add_parser("show", help="Print the summary of an exported JSON trace")
+    show_parser.add_argument("trace", help="JSON trace path")
+    show_parser.add_argument("--top", type=int, default=10, help="Profiler frames to list")
+    prom_parser = subparsers.add_parser("prom", help="Convert a JSON trace to Prometheus text")
+    prom_parser.add_argument("trace", help="JSON trace path")
+    args = parser.parse_args()
+
+    with open(args.trace, encoding="utf-8") as f:
+        data = json.load(f)
+    if args.command == "show":
+        print(render_summary(data, args.top))
+    else:
+        sys.stdout.write(render_prometheus(data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Incremental JSON Array Extraction
+
+Reads a JSON document from an iterable of byte chunks and yields the items
+of one nested array (e.g. "response.games") one at a time. Only the current
+item and the unread part of the current chunk are held in memory; siblings
+of the path are skipped as they are encountered.
+
+Usage:
+    from json_stream import iter_json_items
+
+    with open("owned_games.json", "rb") as f:
+        for game in iter_json_items(iter(lambda: f.read(65536), b""), "response.games"):
+            print(game["appid"])
+"""
+
+import json
+import codecs
+from typing import Optional, Any, Iterable, Iterator, List
+
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",:]}"
+_decoder = json.JSONDecoder()
+
+
+class _ChunkReader:
+    """Text buffer over a byte-chunk iterator with JSON value decoding."""
+
+    COMPACT_THRESHOLD = 1 << 16
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Read the next chunk; return False at end of input."""
+        if self.eof:
+            return False
+        if self.pos > self.COMPACT_THRESHOLD:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        for chunk in self._chunks:
+            text = self._utf8.decode(chunk)
+            if text:
+                self.buf += text
+                return True
+        self.buf += self._utf8.decode(b"", final=True)
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of input)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def error(self, message: str) -> json.JSONDecodeError:
+        """Build a decode error at the current position."""
+        return json.JSONDecodeError(message, self.buf, self.pos)
+
+    def expect(self, char: str) -> None:
+        """Consume one structural character."""
+        next_char = self.peek()
+        if next_char != char:
+            raise self.error(f"Expected {char!r}" if next_char else "Unexpected end of JSON stream")
+        self.pos += 1
+
+    def separator(self, close: str) -> bool:
+        """Consume a "," or the closing character; return True if the container ended."""
+        char = self.peek()
+        if char == ",":
+            self.pos += 1
+            return False
+        if char == close:
+            self.pos += 1
+            return True
+        raise self.error(f"Expected ',' or {close!r}" if char else "Unexpected end of JSON stream")
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number cut by a chunk boundary ("12" of "123", "-0" of "-0.5")
+            # decodes early; only accept values followed by a delimiter.
+            if (not self.eof and (end == len(self.buf) or self.buf[end] not in DELIMITERS)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return obj
+
+
+def _descend(reader: _ChunkReader, path: List[str]) -> bool:
+    """Advance the reader to the value at path; return False if absent."""
+    for component in path:
+        char = reader.peek()
+        if char == "":
+            raise reader.error("Unexpected end of JSON stream")
+        if char != "{":
+            return False
+        reader.pos += 1
+        if reader.peek() == "}":
+            return False
+        while True:
+            key = reader.value()
+            reader.expect(":")
+            if key == component:
+                break
+            reader.value()
+            if reader.separator("}"):
+                return False
+    return True
+
+
+def iter_json_items(chunks: Iterable[bytes], path: str,
+                    fields: Optional[Iterable[str]] = None) -> Iterator[Any]:
+    """
+    Yield the items of the array at a dotted path in a streamed JSON document.
+
+    A document that ends before the array is closed raises instead of
+    looking complete, so a truncated response is never mistaken for a full
+    one:
+
+    >>> list(iter_json_items([b'{"response": {"apps": [1, ', b'2]}}'], "response.apps"))
+    [1, 2]
+    >>> list(iter_json_items([b'{"response": {"apps": [1, 2'], "response.apps"))
+    Traceback (most recent call last):
+    json.decoder.JSONDecodeError: Unexpected end of JSON stream: line 1 column 28 (char 27)
+    >>> list(iter_json_items([b'[1 2]'], ""))
+    Traceback (most recent call last):
+    json.decoder.JSONDecodeError: Expected ',' or ']': line 1 column 4 (char 3)
+
+    Args:
+        chunks: Byte chunks of a UTF-8 JSON document
+        path: Dotted object path to the array (e.g. "response.games")
+        fields: Keep only these keys of each object item (None for all)
+
+    Yields:
+        Array items, one at a time; nothing if the path is missing
+
+    Raises:
+        json.JSONDecodeError: If the document is malformed or truncated
+    """
+    reader = _ChunkReader(chunks)
+    if not _descend(reader, path.split(".") if path else []):
+        return
+    char = reader.peek()
+    if char == "":
+        raise reader.error("Unexpected end of JSON stream")
+    if char != "[":
+        return
+    reader.pos += 1
+    if reader.peek() == "]":
+        reader.pos += 1
+        return
+    keep = set(fields) if fields is not None else None
+    while True:
+        item = reader.value()
+        if keep is not None and isinstance(item, dict):
+            item = {key: value for key, value in item.items() if key in keep}
+        yield item
+        if reader.separator("]"):
+            return
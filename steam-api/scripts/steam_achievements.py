@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Steam Bulk Achievement Percentages
+
+This script refreshes GetGlobalAchievementPercentagesForApp for many apps
+concurrently and keeps the results in one compact store file.
+
+Achievement names are interned into a shared string table, and each app
+maps to a slice of parallel (name ID, float32 percent) arrays. A 64-bit
+content hash of every raw response is kept, so apps whose response is
+unchanged since the last run are not decoded or rewritten. Requests run
+over SteamAPI's pooled session behind a per-host rate ceiling.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_achievements.py refresh achievements.bin --apps-file apps.txt --rate 20
+    python steam_achievements.py show achievements.bin 440 --limit 10
+"""
+
+import os
+import sys
+import json
+import time
+import array
+import struct
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+from typing import Optional, Dict, Any, List, Tuple
+
+from steam_api_example import SteamAPI
+
+
+STORE_MAGIC = b"GALACH01"
+# magic, apps, rows, names blob size
+STORE_HEADER = struct.Struct("<8sIIQ")
+# appid, row offset, row count, content hash
+APP_ROW = struct.Struct("<IIIQ")
+
+
+class HostRateLimiter:
+    """Token bucket limiting request starts per host."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Sustained requests per second per host
+            burst: Maximum requests allowed at once (defaults to rate)
+        """
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host: str) -> None:
+        """Block until a request to host may start."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(host, (self.burst, now))
+                tokens = min(self.burst, tokens + (now - updated) * self.rate)
+                if tokens >= 1:
+                    self._buckets[host] = (tokens - 1, now)
+                    return
+                self._buckets[host] = (tokens, now)
+                wait = (1 - tokens) / self.rate
+            time.sleep(wait)
+
+
+class AchievementStore:
+    """Compact appid -> [(achievement name, percent)] store."""
+
+    def __init__(self):
+        """Create an empty store."""
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+        # appid -> (content hash, name ID array, percent array)
+        self.apps: Dict[int, Tuple[int, array.array, array.array]] = {}
+
+    def intern(self, name: str) -> int:
+        """Return the shared ID of an achievement name."""
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def put(self, appid: int, content_hash: int, achievements: List[Dict[str, Any]]) -> None:
+        """
+        Store one app's achievement percentages.
+
+        Args:
+            appid: App ID
+            content_hash: Hash of the raw response
+            achievements: Entries with "name" and "percent"
+        """
+        name_ids = array.array("I", (self.intern(a["name"]) for a in achievements))
+        percents = array.array("f", (float(a["percent"]) for a in achievements))
+        self.apps[appid] = (content_hash, name_ids, percents)
+
+    def get(self, appid: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        Read one app's achievement percentages.
+
+        Args:
+            appid: App ID
+
+        Returns:
+            List of (achievement name, percent), or None if unknown
+        """
+        entry = self.apps.get(appid)
+        if entry is None:
+            return None
+        _, name_ids, percents = entry
+        return [(self.names[i], p) for i, p in zip(name_ids, percents)]
+
+    def content_hash(self, appid: int) -> Optional[int]:
+        """Return the stored response hash for an app."""
+        entry = self.apps.get(appid)
+        return entry[0] if entry else None
+
+    def save(self, path: str) -> None:
+        """
+        Write the store atomically, dropping names no app refers to.
+
+        Args:
+            path: Store file path
+        """
+        used: Dict[int, int] = {}
+        names: List[str] = []
+        rows = 0
+        for _, name_ids, _ in self.apps.values():
+            for i in name_ids:
+                if i not in used:
+                    used[i] = len(names)
+                    names.append(self.names[i])
+            rows += len(name_ids)
+        blob = json.dumps(names, ensure_ascii=False).encode("utf-8")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(STORE_HEADER.pack(STORE_MAGIC, len(self.apps), rows, len(blob)))
+            offset = 0
+            for appid in sorted(self.apps):
+                content_hash, name_ids, _ = self.apps[appid]
+                f.write(APP_ROW.pack(appid, offset, len(name_ids), content_hash))
+                offset += len(name_ids)
+            for appid in sorted(self.apps):
+                array.array("I", (used[i] for i in self.apps[appid][1])).tofile(f)
+            for appid in sorted(self.apps):
+                self.apps[appid][2].tofile(f)
+            f.write(blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "AchievementStore":
+        """
+        Read a store written by save().
+
+        Args:
+            path: Store file path
+
+        Returns:
+            Loaded store
+        """
+        store = cls()
+        with open(path, "rb") as f:
+            magic, app_count, rows, blob_size = STORE_HEADER.unpack(f.read(STORE_HEADER.size))
+            if magic != STORE_MAGIC:
+                raise ValueError(f"Not an achievement store: {path}")
+            table = [APP_ROW.unpack(f.read(APP_ROW.size)) for _ in range(app_count)]
+            name_ids = array.array("I")
+            name_ids.fromfile(f, rows)
+            percents = array.array("f")
+            percents.fromfile(f, rows)
+            store.names = json.loads(f.read(blob_size).decode("utf-8"))
+        store._name_ids = {name: i for i, name in enumerate(store.names)}
+        for appid, offset, count, content_hash in table:
+            store.apps[appid] = (content_hash, name_ids[offset:offset + count],
+                                 percents[offset:offset + count])
+        return store
+
+
+def refresh_achievements(api: SteamAPI, store: AchievementStore, appids: List[int],
+                         rate: float = 20, max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS
+                         ) -> Dict[str, int]:
+    """
+    Refresh achievement percentages for many apps.
+
+    Args:
+        api: Steam API client
+        store: Store updated in place
+        appids: App IDs to refresh
+        rate: Maximum requests per second to the API host
+        max_workers: Maximum number of concurrent requests
+
+    Returns:
+        Counters for updated, unchanged and failed apps
+    """
+    limiter = HostRateLimiter(rate)
+    host = urlparse(api.BASE_URL).netloc
+
+    def fetch(appid: int) -> bytes:
+        started = time.monotonic()
+        limiter.acquire(host)
+        if api.tracer is not None:
+            api.tracer.record_wait("steam", "/ISteamUserStats/GetGlobalAchievementPercentagesForApp/v2",
+                                   time.monotonic() - started)
+        return api.request_raw("ISteamUserStats", "GetGlobalAchievementPercentagesForApp",
+                               "v2", {"gameid": appid})
+
+    stats = {"updated": 0, "unchanged": 0, "failed": 0}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, appid): appid for appid in dict.fromkeys(appids)}
+        for future in as_completed(futures):
+            appid = futures[future]
+            try:
+                body = future.result()
+            except Exception:
+                stats["failed"] += 1
+                continue
+            content_hash = int.from_bytes(hashlib.blake2b(body, digest_size=8).digest(), "little")
+            if store.content_hash(appid) == content_hash:
+                stats["unchanged"] += 1
+                continue
+            try:
+                data = json.loads(body)
+            except ValueError:
+                stats["failed"] += 1
+                continue
+            store.put(appid, content_hash,
+                      data.get("achievementpercentages", {}).get("achievements", []))
+            stats["updated"] += 1
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam Bulk Achievement Percentages")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Refresh achievement percentages")
+    refresh_parser.add_argument("store", help="Store file path")
+    refresh_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    refresh_parser.add_argument("--apps", help="Comma-separated app IDs")
+    refresh_parser.add_argument("--apps-file", help="File with one app ID per line")
+    refresh_parser.add_argument("--rate", type=float, default=20,
+                                help="Maximum requests per second")
+    refresh_parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                                help="Maximum concurrent requests")
+
+    show_parser = subparsers.add_parser("show", help="Show stored percentages for an app")
+    show_parser.add_argument("store", help="Store file path")
+    show_parser.add_argument("appid", type=int, help="App ID")
+    show_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "show":
+        entries = AchievementStore.load(args.store).get(args.appid)
+        if entries is None:
+            print(f"App {args.appid} not in store")
+            sys.exit(1)
+        for name, percent in sorted(entries, key=lambda e: -e[1])[:args.limit]:
+            print(f"{percent:6.2f}%  {name}")
+        return
+
+    api_key = args.key or os.environ.get("STEAM_API_KEY")
+    if not api_key:
+        print("Error: Steam API key is required.")
+        print("Get one at: https://steamcommunity.com/dev/apikey")
+        sys.exit(1)
+    appids = [int(a) for a in args.apps.split(",") if a.strip()] if args.apps else []
+    if args.apps_file:
+        with open(args.apps_file, encoding="utf-8") as f:
+            appids.extend(int(line) for line in f if line.strip())
+    if not appids:
+        parser.error("no app IDs given (use --apps or --apps-file)")
+
+    store = AchievementStore.load(args.store) if os.path.exists(args.store) else AchievementStore()
+    api = SteamAPI(api_key, pool_size=max(args.workers, SteamAPI.DEFAULT_POOL_SIZE))
+    started = time.monotonic()
+    stats = refresh_achievements(api, store, appids, rate=args.rate, max_workers=args.workers)
+    store.save(args.store)
+    print(f"{stats['updated']} updated, {stats['unchanged']} unchanged, {stats['failed']} failed "
+          f"in {time.monotonic() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,44 +11,222 @@ Usage:
 
 Or pass the API key as an argument:
     python steam_api_example.py --key "your_api_key_here"
+
+Print per-request timings at exit:
+    python steam_api_example.py --profile --trace-out trace.prom
+
+Adapt concurrency to the host's responses (see gal-throttle):
+    controller = AIMDController()
+    steam = SteamAPI(api_key, concurrency=controller)
 """
 
 import os
 import sys
 import argparse
-import requests
-from typing import Optional, Dict, Any
+import threading
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Optional, Dict, Any, Callable, Iterable, Iterator, List
+
+if TYPE_CHECKING:
+    import requests
+    from steam_cache import ResponseCache
+    from request_trace import Span, Tracer
+    from adaptive_concurrency import AIMDController, Permit
+
+
+# Request tracing lives in the sibling gal-trace skill (see load_tracer)
+TRACE_SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+                             "gal-trace", "scripts")
+
+
+@dataclass
+class BatchResult:
+    """Merged result of a batch call, keyed by Steam ID."""
+    results: Dict[str, Any] = field(default_factory=dict)
+    failed: Dict[str, str] = field(default_factory=dict)
+
+
+def _unique_ids(steamids: Iterable[str]) -> List[str]:
+    """Normalize Steam IDs to unique strings, preserving order."""
+    if isinstance(steamids, str):
+        steamids = steamids.split(",")
+    seen = {}
+    for steamid in steamids:
+        steamid = str(steamid).strip()
+        if steamid:
+            seen.setdefault(steamid, None)
+    return list(seen)
 
 
 class SteamAPI:
     """Steam Web API client."""
 
     BASE_URL = "https://api.steampowered.com"
-
-    def __init__(self, api_key: str):
+    MAX_STEAMIDS_PER_CALL = 100
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_POOL_SIZE = 16
+    RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, api_key: str, pool_size: int = DEFAULT_POOL_SIZE,
+                 max_retries: int = 3, backoff_factor: float = 0.5,
+                 cache: Optional["ResponseCache"] = None, tracer: Optional["Tracer"] = None,
+                 concurrency: Optional["AIMDController"] = None):
         """
         Initialize Steam API client.
 
         Args:
             api_key: Steam Web API key from https://steamcommunity.com/dev/apikey
+            pool_size: Maximum number of pooled keep-alive connections per host
+            max_retries: Retries on connection errors, 429 and 5xx responses
+            backoff_factor: Base delay in seconds for exponential backoff
+            cache: Optional response cache (see steam_cache.py)
+            tracer: Optional request tracer (see gal-trace/scripts/request_trace.py)
+            concurrency: Optional per-host concurrency controller
+                (see gal-throttle/scripts/adaptive_concurrency.py); batch calls
+                then treat max_workers as a ceiling and the controller decides
+                how many requests are actually in flight
         """
         if not api_key:
             raise ValueError("API key is required. Get one at https://steamcommunity.com/dev/apikey")
         self.api_key = api_key
+        self.cache = cache
+        self.tracer = tracer
+        self.concurrency = concurrency
+        self._session_options = (pool_size, max_retries, backoff_factor)
+        self._session: Optional["requests.Session"] = None
+        self._session_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {"requests": 0, "retries": 0, "retried_requests": 0}
+
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled HTTP session, created (and requests imported) on first use."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._build_session(*self._session_options)
+        return self._session
+
+    def _build_session(self, pool_size: int, max_retries: int,
+                       backoff_factor: float) -> "requests.Session":
+        """
+        Build a pooled session with retry and backoff.
 
-    def _make_request(self, interface: str, method: str, version: str = "v1",
-                      params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        Retry-After headers on 429/503 responses take precedence over the
+        computed backoff delay.
+
+        Args:
+            pool_size: Maximum number of pooled connections per host
+            max_retries: Total number of retries per request
+            backoff_factor: Base delay in seconds for exponential backoff
+
+        Returns:
+            Configured requests session
         """
-        Make a request to the Steam Web API.
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                              max_retries=retry, pool_block=True)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _record_response(self, response: "requests.Response", span: Optional["Span"] = None,
+                         permit: Optional["Permit"] = None) -> None:
+        """Update request and retry counters from a finished response."""
+        retries = getattr(response.raw, "retries", None)
+        retried = len(retries.history) if retries is not None else 0
+        if permit is not None:
+            # A retried 429/5xx is congestion even if the last attempt succeeded
+            permit.report(response.status_code,
+                          [attempt.status for attempt in retries.history] if retried else ())
+        if span is not None:
+            span.event("retry", retried)
+        with self._stats_lock:
+            self._stats["requests"] += 1
+            self._stats["retries"] += retried
+            if retried:
+                self._stats["retried_requests"] += 1
+
+    def get_transport_stats(self) -> Dict[str, Any]:
+        """
+        Get connection-reuse and retry metrics for this client.
+
+        Returns:
+            Counters for requests, retries, and new vs reused connections,
+            plus the current concurrency window when a controller is set
+        """
+        new_connections = 0
+        pooled_requests = 0
+        adapters = self._session.adapters.values() if self._session is not None else []
+        for adapter in set(adapters):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    new_connections += pool.num_connections
+                    pooled_requests += pool.num_requests
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["new_connections"] = new_connections
+        stats["reused_connections"] = max(pooled_requests - new_connections, 0)
+        if self.concurrency is not None:
+            from urllib.parse import urlsplit
+            stats["concurrency_window"] = self.concurrency.window(urlsplit(self.BASE_URL).netloc)
+        return stats
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None:
+            self._session.close()
+
+    def _trace(self, interface: str, method: str, version: str):
+        """Start a tracer span for a request (a null context without a tracer)."""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.start_span("steam", "GET", f"/{interface}/{method}/{version}")
+
+    def _acquire(self, span: Optional["Span"] = None):
+        """Wait for a request slot to the API host (a null context without a controller)."""
+        if self.concurrency is None:
+            return nullcontext()
+        from urllib.parse import urlsplit
+        permit = self.concurrency.acquire(urlsplit(self.BASE_URL).netloc)
+        if span is not None:
+            span.mark("wait")
+        return permit
+
+    def _send(self, interface: str, method: str, version: str,
+              params: Optional[Dict[str, Any]], stream: bool = False,
+              span: Optional["Span"] = None,
+              permit: Optional["Permit"] = None) -> "requests.Response":
+        """
+        Send a GET request and check its status.
 
         Args:
             interface: API interface (e.g., "ISteamUser")
             method: API method (e.g., "GetPlayerSummaries")
-            version: API version (default: "v1")
+            version: API version
             params: Additional query parameters
+            stream: Defer reading the body
+            span: Tracer span to record phases on
+            permit: Concurrency permit to report the status on
 
         Returns:
-            JSON response as dictionary
+            Successful response
         """
         url = f"{self.BASE_URL}/{interface}/{method}/{version}/"
 
@@ -57,14 +235,183 @@ class SteamAPI:
         if params:
             request_params.update(params)
 
+        session = self.session
+        from requests.exceptions import RequestException
         try:
-            response = requests.get(url, params=request_params, timeout=30)
+            response = session.get(url, params=request_params, timeout=30, stream=stream)
+            self._record_response(response, span, permit)
+            if span is not None:
+                # elapsed ends when the headers are parsed; without stream
+                # the body has been read by now as well.
+                span.mark("server", response.elapsed.total_seconds())
+                span.set(status=response.status_code)
+                if not stream:
+                    span.mark("transfer")
+                    span.set(bytes_out=len(response.content))
             response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            return response
+        except RequestException as e:
             print(f"Error making request: {e}")
             raise
 
+    def _make_request(self, interface: str, method: str, version: str = "v1",
+                      params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Make a request to the Steam Web API.
+
+        Args:
+            interface: API interface (e.g., "ISteamUser")
+            method: API method (e.g., "GetPlayerSummaries")
+            version: API version (default: "v1")
+            params: Additional query parameters
+
+        Returns:
+            JSON response as dictionary
+        """
+        if self.cache is not None:
+            cached = self.cache.get(interface, method, version, params)
+            if self.tracer is not None and self.cache.policy(interface, method) is not None:
+                self.tracer.event("cache_hit" if cached is not None else "cache_miss",
+                                  "steam", f"/{interface}/{method}/{version}")
+            if cached is not None:
+                return cached
+
+        from requests.exceptions import RequestException
+        with self._trace(interface, method, version) as span, self._acquire(span) as permit:
+            response = self._send(interface, method, version, params, span=span, permit=permit)
+            try:
+                data = response.json()
+            except RequestException as e:
+                print(f"Error making request: {e}")
+                raise
+            if span is not None:
+                span.mark("decode")
+
+        if self.cache is not None:
+            self.cache.put(interface, method, version, params, data)
+        return data
+
+    def request_raw(self, interface: str, method: str, version: str = "v1",
+                    params: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Make a request and return the undecoded response body.
+
+        Useful for hashing or archiving responses without parsing them.
+        The response cache is bypassed.
+
+        Args:
+            interface: API interface (e.g., "ISteamUserStats")
+            method: API method
+            version: API version (default: "v1")
+            params: Additional query parameters
+
+        Returns:
+            Raw response body
+        """
+        with self._trace(interface, method, version) as span, self._acquire(span) as permit:
+            return self._send(interface, method, version, params, span=span, permit=permit).content
+
+    def _stream_request(self, interface: str, method: str, version: str,
+                        params: Optional[Dict[str, Any]], path: str,
+                        fields: Optional[Iterable[str]] = None) -> Iterator[Any]:
+        """
+        Make a request and yield the items of one array in the response.
+
+        The body is read in chunks and decoded item by item, so memory use
+        does not grow with the response size. The response cache is bypassed.
+
+        Args:
+            interface: API interface (e.g., "IPlayerService")
+            method: API method (e.g., "GetOwnedGames")
+            version: API version
+            params: Additional query parameters
+            path: Dotted path to the array (e.g., "response.games")
+            fields: Keep only these keys of each item (None for all)
+
+        Yields:
+            Array items, one at a time
+        """
+        from json_stream import iter_json_items
+
+        with self._trace(interface, method, version) as span, self._acquire(span) as permit:
+            with self._send(interface, method, version, params, stream=True, span=span,
+                            permit=permit) as response:
+                yield from iter_json_items(response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE),
+                                           path, fields)
+                if span is not None:
+                    # Reading and decoding overlap when streaming
+                    span.mark("transfer")
+
+    def iter_owned_games(self, steamid: str, include_appinfo: bool = True,
+                         fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream the games owned by a user one at a time.
+
+        Args:
+            steamid: Steam ID of the user
+            include_appinfo: Whether to include game info
+            fields: Keep only these keys of each game (None for all)
+
+        Yields:
+            Owned game entries
+        """
+        return self._stream_request(
+            "IPlayerService",
+            "GetOwnedGames",
+            "v1",
+            {
+                "steamid": steamid,
+                "include_appinfo": str(include_appinfo).lower(),
+                "include_played_free_games": "true"
+            },
+            "response.games",
+            fields
+        )
+
+    def iter_global_achievement_percentages(self, gameid: int,
+                                            fields: Optional[Iterable[str]] = None
+                                            ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream global achievement percentages for a game one at a time.
+
+        Args:
+            gameid: App ID of the game
+            fields: Keep only these keys of each achievement (None for all)
+
+        Yields:
+            Achievement entries with "name" and "percent"
+        """
+        return self._stream_request(
+            "ISteamUserStats",
+            "GetGlobalAchievementPercentagesForApp",
+            "v2",
+            {"gameid": gameid},
+            "achievementpercentages.achievements",
+            fields
+        )
+
+    def iter_friend_list(self, steamid: str, relationship: str = "friend",
+                         fields: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream a user's friend list one entry at a time.
+
+        Args:
+            steamid: Steam ID of the user
+            relationship: Relationship filter ("all" or "friend")
+            fields: Keep only these keys of each friend (None for all)
+
+        Yields:
+            Friend entries
+        """
+        return self._stream_request(
+            "ISteamUser",
+            "GetFriendList",
+            "v1",
+            {"steamid": steamid, "relationship": relationship},
+            "friendslist.friends",
+            fields
+        )
+
     def get_player_summaries(self, steamids: str) -> Dict[str, Any]:
         """
         Get player summaries for given Steam IDs.
@@ -225,7 +572,8 @@ class SteamAPI:
             {"appid": appid}
         )
 
-    def get_news_for_app(self, appid: int, count: int = 5, maxlength: int = 300) -> Dict[str, Any]:
+    def get_news_for_app(self, appid: int, count: int = 5, maxlength: int = 300,
+                         enddate: Optional[int] = None) -> Dict[str, Any]:
         """
         Get news for an app.
 
@@ -233,22 +581,233 @@ class SteamAPI:
             appid: App ID
             count: Number of news items
             maxlength: Maximum length of content
+            enddate: Unix time; only return items posted at or before it
 
         Returns:
             News data
         """
+        params = {"appid": appid, "count": count, "maxlength": maxlength}
+        if enddate is not None:
+            params["enddate"] = enddate
         return self._make_request(
             "ISteamNews",
             "GetNewsForApp",
             "v2",
-            {"appid": appid, "count": count, "maxlength": maxlength}
+            params
         )
 
+    def get_app_list(self, last_appid: int = 0, max_results: int = 50000,
+                     if_modified_since: Optional[int] = None, include_games: bool = True,
+                     include_dlc: bool = False, include_software: bool = False,
+                     include_videos: bool = False, include_hardware: bool = False) -> Dict[str, Any]:
+        """
+        Get one page of the Steam store app catalog.
+
+        Args:
+            last_appid: App ID to continue after (0 for the first page)
+            max_results: Page size (max 50000)
+            if_modified_since: Unix time; only return apps modified since then
+            include_games: Include games
+            include_dlc: Include DLC
+            include_software: Include software
+            include_videos: Include videos
+            include_hardware: Include hardware
+
+        Returns:
+            App list page with "apps", "have_more_results" and "last_appid"
+        """
+        params = {
+            "last_appid": last_appid,
+            "max_results": max_results,
+            "include_games": str(include_games).lower(),
+            "include_dlc": str(include_dlc).lower(),
+            "include_software": str(include_software).lower(),
+            "include_videos": str(include_videos).lower(),
+            "include_hardware": str(include_hardware).lower()
+        }
+        if if_modified_since:
+            params["if_modified_since"] = if_modified_since
+        return self._make_request("IStoreService", "GetAppList", "v1", params)
+
+    def _chunked_batch(self, fetch: Callable[[str], Dict[str, Any]], steamids: Iterable[str],
+                       list_key: str, id_key: str, max_workers: int) -> BatchResult:
+        """
+        Run a multi-ID endpoint over 100-ID chunks concurrently.
+
+        Args:
+            fetch: Bound method taking a comma-separated ID string
+            steamids: Steam IDs to query
+            list_key: Key of the player list in the response
+            id_key: Key holding the Steam ID of each player entry
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult keyed by Steam ID
+        """
+        ids = _unique_ids(steamids)
+        size = self.MAX_STEAMIDS_PER_CALL
+        chunks = [ids[i:i + size] for i in range(0, len(ids), size)]
+        batch = BatchResult()
+
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, ",".join(chunk)): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    batch.failed.update((steamid, str(e)) for steamid in chunk)
+                    continue
+                body = data.get("response", data)
+                for entry in body.get(list_key, []):
+                    batch.results[str(entry.get(id_key))] = entry
+                for steamid in chunk:
+                    if steamid not in batch.results:
+                        batch.failed[steamid] = "not returned"
+        return batch
+
+    def _fan_out(self, fetch: Callable[..., Dict[str, Any]], steamids: Iterable[str],
+                 max_workers: int, **kwargs) -> BatchResult:
+        """
+        Run a single-ID endpoint for each Steam ID concurrently.
+
+        Args:
+            fetch: Bound method taking a single Steam ID
+            steamids: Steam IDs to query
+            max_workers: Maximum number of concurrent requests
+            **kwargs: Extra arguments forwarded to fetch
+
+        Returns:
+            BatchResult keyed by Steam ID
+        """
+        batch = BatchResult()
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(fetch, steamid, **kwargs): steamid
+                       for steamid in _unique_ids(steamids)}
+            for future in as_completed(futures):
+                steamid = futures[future]
+                try:
+                    batch.results[steamid] = future.result()
+                except Exception as e:
+                    batch.failed[steamid] = str(e)
+        return batch
+
+    def get_player_summaries_batch(self, steamids: Iterable[str],
+                                   max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get player summaries for any number of Steam IDs.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to player summary
+        """
+        return self._chunked_batch(self.get_player_summaries, steamids,
+                                   "players", "steamid", max_workers)
+
+    def get_player_bans_batch(self, steamids: Iterable[str],
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get ban status for any number of Steam IDs.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to ban entry
+        """
+        return self._chunked_batch(self.get_player_bans, steamids,
+                                   "players", "SteamId", max_workers)
+
+    def get_owned_games_batch(self, steamids: Iterable[str], include_appinfo: bool = True,
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get owned games for many users.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            include_appinfo: Whether to include game info
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to owned games data
+        """
+        return self._fan_out(self.get_owned_games, steamids, max_workers,
+                             include_appinfo=include_appinfo)
+
+    def get_recently_played_games_batch(self, steamids: Iterable[str], count: int = 5,
+                                        max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get recently played games for many users.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            count: Number of games to return per user
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to recently played games data
+        """
+        return self._fan_out(self.get_recently_played_games, steamids, max_workers, count=count)
+
+    def get_steam_level_batch(self, steamids: Iterable[str],
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get Steam levels for many users.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to Steam level data
+        """
+        return self._fan_out(self.get_steam_level, steamids, max_workers)
+
+    def get_friend_list_batch(self, steamids: Iterable[str], relationship: str = "friend",
+                              max_workers: int = DEFAULT_MAX_WORKERS) -> BatchResult:
+        """
+        Get friend lists for many users.
+
+        Args:
+            steamids: Steam IDs (list or comma-separated string)
+            relationship: Relationship filter ("all" or "friend")
+            max_workers: Maximum number of concurrent requests
+
+        Returns:
+            BatchResult mapping Steam ID to friend list data
+        """
+        return self._fan_out(self.get_friend_list, steamids, max_workers,
+                             relationship=relationship)
+
+
+def load_tracer(profile: bool, trace_out: Optional[str], sample: bool) -> "Tracer":
+    """Create a CLI request tracer from the sibling gal-trace skill."""
+    if TRACE_SCRIPTS not in sys.path:
+        sys.path.append(TRACE_SCRIPTS)
+    try:
+        from request_trace import cli_tracer
+    except ImportError:
+        print("Error: Tracing requires the gal-trace skill next to steam-api")
+        sys.exit(1)
+    return cli_tracer(profile=profile, out_path=trace_out, sample=sample)
+
 
 def main():
     parser = argparse.ArgumentParser(description="Steam Web API Example")
     parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
     parser.add_argument("--steamid", help="Steam ID to query", default="76561197960361544")
+    parser.add_argument("--profile", action="store_true", help="Print request timings at exit")
+    parser.add_argument("--trace-out", help="Export request timings (JSON, or Prometheus text for .prom)")
+    parser.add_argument("--profile-sample", action="store_true",
+                        help="Also run the sampling profiler")
     args = parser.parse_args()
 
     # Get API key from argument or environment
@@ -264,8 +823,12 @@ def main():
         print("  python steam_api_example.py --key 'your_key' --steamid '76561197960361544'")
         sys.exit(1)
 
+    tracer = None
+    if args.profile or args.trace_out or args.profile_sample:
+        tracer = load_tracer(args.profile, args.trace_out, args.profile_sample)
+
     # Initialize API client
-    steam = SteamAPI(api_key)
+    steam = SteamAPI(api_key, tracer=tracer)
 
     # Example: Get player summary
     print("=" * 50)
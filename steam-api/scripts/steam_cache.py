@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Steam API Response Cache
+
+Pluggable response cache for SteamAPI._make_request. An in-process LRU sits
+in front of an optional persistent store (SQLite by default). Which
+interface/method pairs are cached, and for how long, is set per method by
+CachePolicy entries; "no match" results can be cached with their own,
+usually shorter, TTL. The API key is never part of a cache key.
+
+Usage:
+    from steam_api_example import SteamAPI
+    from steam_cache import ResponseCache, SQLiteCacheStore
+
+    cache = ResponseCache(SQLiteCacheStore("steam_cache.db"))
+    steam = SteamAPI(api_key, cache=cache)
+    steam.resolve_vanity_url("gaben")   # network
+    steam.resolve_vanity_url("gaben")   # memory hit
+    print(cache.stats())
+
+    python steam_cache.py stats steam_cache.db
+    python steam_cache.py purge steam_cache.db
+"""
+
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from urllib.parse import urlencode
+from typing import Optional, Dict, Any, Callable, Tuple
+
+
+@dataclass
+class CachePolicy:
+    """Caching rule for one interface/method."""
+    ttl: float
+    negative_ttl: Optional[float] = None
+    is_negative: Optional[Callable[[Dict[str, Any]], bool]] = None
+
+    def ttl_for(self, data: Dict[str, Any]) -> float:
+        """Return the TTL to apply to a response."""
+        if self.is_negative is not None and self.is_negative(data):
+            return self.ttl if self.negative_ttl is None else self.negative_ttl
+        return self.ttl
+
+
+DAY = 86400
+DEFAULT_POLICIES: Dict[Tuple[str, str], CachePolicy] = {
+    ("ISteamUser", "ResolveVanityURL"): CachePolicy(
+        ttl=30 * DAY, negative_ttl=DAY,
+        is_negative=lambda data: data.get("response", {}).get("success") != 1),
+    ("ISteamUserStats", "GetGlobalAchievementPercentagesForApp"): CachePolicy(ttl=DAY),
+    ("ISteamUserStats", "GetSchemaForGame"): CachePolicy(ttl=7 * DAY),
+}
+
+
+class SQLiteCacheStore:
+    """Persistent cache store backed by SQLite."""
+
+    def __init__(self, path: str):
+        """
+        Open or create a cache database.
+
+        Args:
+            path: SQLite database path
+        """
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache "
+                         "(key TEXT PRIMARY KEY, expires REAL NOT NULL, body TEXT NOT NULL)")
+        self._db.commit()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, str]]:
+        """Return (expires, body) for a key, or None."""
+        with self._lock:
+            return self._db.execute("SELECT expires, body FROM cache WHERE key = ?",
+                                    (key,)).fetchone()
+
+    def set(self, key: str, expires: float, body: str) -> None:
+        """Store a body with its expiry time."""
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO cache (key, expires, body) VALUES (?, ?, ?)",
+                             (key, expires, body))
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """Delete expired entries and return how many were removed."""
+        with self._lock, self._db:
+            return self._db.execute("DELETE FROM cache WHERE expires <= ?",
+                                    (now or time.time(),)).rowcount
+
+    def count(self) -> int:
+        """Return the number of stored entries."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self) -> None:
+        """Close the database."""
+        self._db.close()
+
+
+class ResponseCache:
+    """In-process LRU in front of an optional persistent store."""
+
+    def __init__(self, store: Optional[SQLiteCacheStore] = None,
+                 policies: Optional[Dict[Tuple[str, str], CachePolicy]] = None,
+                 max_entries: int = 4096):
+        """
+        Initialize the cache.
+
+        Args:
+            store: Persistent store (None for memory only)
+            policies: Per (interface, method) policies; defaults to DEFAULT_POLICIES
+            max_entries: Maximum entries kept in the in-process LRU
+        """
+        self.store = store
+        self.policies = dict(DEFAULT_POLICIES if policies is None else policies)
+        self.max_entries = max_entries
+        self._lru: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "store_hits": 0, "misses": 0,
+                       "negative_hits": 0, "stores": 0}
+
+    def policy(self, interface: str, method: str) -> Optional[CachePolicy]:
+        """Return the policy for an interface/method, or None if uncached."""
+        return self.policies.get((interface, method))
+
+    @staticmethod
+    def make_key(interface: str, method: str, version: str,
+                 params: Optional[Dict[str, Any]]) -> str:
+        """Build a cache key from the request, excluding the API key."""
+        items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "key")
+        return f"{interface}/{method}/{version}?{urlencode(items)}"
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+    def _remember(self, key: str, expires: float, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self._lru[key] = (expires, data)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_entries:
+                self._lru.popitem(last=False)
+
+    def get(self, interface: str, method: str, version: str,
+            params: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Args:
+            interface: API interface
+            method: API method
+            version: API version
+            params: Query parameters (the "key" entry is ignored)
+
+        Returns:
+            Cached JSON response, or None on a miss
+        """
+        policy = self.policy(interface, method)
+        if policy is None:
+            return None
+        key = self.make_key(interface, method, version, params)
+        now = time.time()
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and entry[0] > now:
+                self._lru.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                data = entry[1]
+            else:
+                data = None
+        if data is None and self.store is not None:
+            row = self.store.get(key)
+            if row is not None and row[0] > now:
+                data = json.loads(row[1])
+                self._remember(key, row[0], data)
+                self._count("store_hits")
+        if data is None:
+            self._count("misses")
+        elif policy.is_negative is not None and policy.is_negative(data):
+            self._count("negative_hits")
+        return data
+
+    def put(self, interface: str, method: str, version: str,
+            params: Optional[Dict[str, Any]], data: Dict[str, Any]) -> None:
+        """
+        Cache a response according to its method's policy.
+
+        Args:
+            interface: API interface
+            method: API method
+            version: API version
+            params: Query parameters (the "key" entry is ignored)
+            data: JSON response
+        """
+        policy = self.policy(interface, method)
+        if policy is None:
+            return
+        ttl = policy.ttl_for(data)
+        if ttl <= 0:
+            return
+        key = self.make_key(interface, method, version, params)
+        expires = time.time() + ttl
+        self._remember(key, expires, data)
+        if self.store is not None:
+            self.store.set(key, expires, json.dumps(data, ensure_ascii=False))
+        self._count("stores")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Counters plus overall hit ratio and current LRU size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._lru)
+        lookups = stats["memory_hits"] + stats["store_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["store_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam API Response Cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stats_parser = subparsers.add_parser("stats", help="Show cache database size")
+    stats_parser.add_argument("db", help="SQLite cache path")
+    purge_parser = subparsers.add_parser("purge", help="Delete expired entries")
+    purge_parser.add_argument("db", help="SQLite cache path")
+    args = parser.parse_args()
+
+    store = SQLiteCacheStore(args.db)
+    if args.command == "stats":
+        print(f"Entries: {store.count()}")
+    elif args.command == "purge":
+        print(f"Removed {store.purge_expired()} expired entries")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
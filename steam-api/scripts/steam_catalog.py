@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Steam App Catalog Sync
+
+This script syncs the full Steam store catalog via IStoreService/GetAppList
+and builds a compact, memory-mapped appid -> name lookup index.
+
+The index file holds a sorted appid array, a name offset array, a UTF-8
+string table and a name-sorted permutation for prefix search. Lookups
+binary-search the mapped arrays directly, so nothing is loaded into dicts.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_catalog.py sync catalog.idx            # Full or incremental sync
+    python steam_catalog.py sync catalog.idx --full     # Force a full resync
+    python steam_catalog.py lookup catalog.idx 730      # appid -> name
+    python steam_catalog.py prefix catalog.idx "Counter"  # Name prefix search
+"""
+
+import os
+import sys
+import mmap
+import array
+import struct
+import argparse
+from typing import Optional, Dict, Any, Iterator, List, Tuple
+
+from steam_api_example import SteamAPI
+
+
+MAGIC = b"GALCAT01"
+# magic, byte order, count, max last_modified, names offset, strings offset, strings size
+HEADER = struct.Struct("<8sBxxxIIQQQ")
+MAX_PAGE_SIZE = 50000
+
+
+def fetch_app_list(api: SteamAPI, if_modified_since: Optional[int] = None,
+                   max_results: int = MAX_PAGE_SIZE, **include) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the Steam app catalog, following last_appid continuations.
+
+    Args:
+        api: Steam API client
+        if_modified_since: Unix time; only return apps modified since then
+        max_results: Page size (max 50000)
+        **include: include_games/include_dlc/... flags for get_app_list
+
+    Yields:
+        App entries with "appid", "name" and "last_modified"
+    """
+    last_appid = 0
+    while True:
+        page = api.get_app_list(last_appid=last_appid,
+                                max_results=min(max_results, MAX_PAGE_SIZE),
+                                if_modified_since=if_modified_since, **include)
+        body = page.get("response", {})
+        yield from body.get("apps", [])
+        if not body.get("have_more_results"):
+            break
+        last_appid = body.get("last_appid", 0)
+
+
+def _name_key(name: str) -> str:
+    """Normalize a name for prefix comparison."""
+    return name.casefold()
+
+
+def build_index(path: str, apps: Dict[int, str], last_modified: int = 0) -> None:
+    """
+    Write a catalog index file atomically.
+
+    Args:
+        path: Output index path
+        apps: Mapping of appid to name
+        last_modified: Newest last_modified seen, used for incremental syncs
+    """
+    appids = array.array("I", sorted(apps))
+    offsets = array.array("I", [0])
+    strings = bytearray()
+    for appid in appids:
+        strings += apps[appid].encode("utf-8")
+        offsets.append(len(strings))
+    by_name = array.array("I", sorted(range(len(appids)),
+                                      key=lambda row: _name_key(apps[appids[row]])))
+
+    count = len(appids)
+    names_offset = HEADER.size + 4 * count
+    strings_offset = names_offset + 4 * (count + 1)
+    header = HEADER.pack(MAGIC, sys.byteorder == "little", count, last_modified,
+                         names_offset, strings_offset, len(strings))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        appids.tofile(f)
+        offsets.tofile(f)
+        f.write(strings)
+        f.write(b"\0" * (-len(strings) % 4))
+        by_name.tofile(f)
+    os.replace(tmp_path, path)
+
+
+class CatalogIndex:
+    """Memory-mapped appid -> name index."""
+
+    def __init__(self, path: str):
+        """
+        Open a catalog index file.
+
+        Args:
+            path: Index file written by build_index
+        """
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, little, self.count, self.last_modified, names_offset,
+         strings_offset, strings_size) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"Not a catalog index: {path}")
+        if bool(little) != (sys.byteorder == "little"):
+            raise ValueError("Catalog index was written on a host with different byte order")
+
+        view = memoryview(self._mmap)
+        count = self.count
+        self._appids = view[HEADER.size:names_offset].cast("I")
+        self._offsets = view[names_offset:strings_offset].cast("I")
+        self._strings = view[strings_offset:strings_offset + strings_size]
+        by_name_offset = strings_offset + strings_size + (-strings_size % 4)
+        self._by_name = view[by_name_offset:by_name_offset + 4 * count].cast("I")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "CatalogIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Release the memory map."""
+        for view in (self._appids, self._offsets, self._strings, self._by_name):
+            view.release()
+        self._mmap.close()
+
+    def _name_at(self, row: int) -> str:
+        """Decode the name stored at a row."""
+        return str(self._strings[self._offsets[row]:self._offsets[row + 1]], "utf-8")
+
+    def _find_row(self, appid: int) -> int:
+        """Binary-search the appid array; return -1 if absent."""
+        lo, hi = 0, self.count
+        appids = self._appids
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if appids[mid] < appid:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.count and appids[lo] == appid else -1
+
+    def __contains__(self, appid: int) -> bool:
+        return self._find_row(appid) >= 0
+
+    def get_name(self, appid: int) -> Optional[str]:
+        """
+        Look up an app name.
+
+        Args:
+            appid: App ID
+
+        Returns:
+            App name, or None if the appid is not in the catalog
+        """
+        row = self._find_row(appid)
+        return self._name_at(row) if row >= 0 else None
+
+    def search_prefix(self, prefix: str, limit: int = 20) -> List[Tuple[int, str]]:
+        """
+        Find apps whose name starts with a prefix (case-insensitive).
+
+        Args:
+            prefix: Name prefix
+            limit: Maximum number of matches
+
+        Returns:
+            List of (appid, name) tuples in name order
+        """
+        key = _name_key(prefix)
+        by_name = self._by_name
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _name_key(self._name_at(by_name[mid])) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        matches = []
+        for pos in range(lo, self.count):
+            row = by_name[pos]
+            name = self._name_at(row)
+            if not _name_key(name).startswith(key) or len(matches) >= limit:
+                break
+            matches.append((self._appids[row], name))
+        return matches
+
+    def items(self) -> Iterator[Tuple[int, str]]:
+        """Iterate over (appid, name) in appid order."""
+        for row in range(self.count):
+            yield self._appids[row], self._name_at(row)
+
+
+def sync_catalog(api: SteamAPI, path: str, full: bool = False, **include) -> int:
+    """
+    Sync the app catalog into an index file.
+
+    An existing index is refreshed incrementally with if_modified_since set
+    to the newest last_modified it has seen.
+
+    Args:
+        api: Steam API client
+        path: Index file path
+        full: Ignore any existing index and fetch the whole catalog
+        **include: include_games/include_dlc/... flags for get_app_list
+
+    Returns:
+        Number of apps added or updated
+    """
+    apps: Dict[int, str] = {}
+    since = None
+    last_modified = 0
+    if not full and os.path.exists(path):
+        with CatalogIndex(path) as index:
+            apps.update(index.items())
+            last_modified = index.last_modified
+        since = last_modified or None
+
+    changed = 0
+    for app in fetch_app_list(api, if_modified_since=since, **include):
+        apps[int(app["appid"])] = app.get("name", "")
+        last_modified = max(last_modified, int(app.get("last_modified", 0)))
+        changed += 1
+
+    if changed or not os.path.exists(path):
+        build_index(path, apps, last_modified)
+    return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam App Catalog Sync")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Sync the catalog index")
+    sync_parser.add_argument("index", help="Index file path")
+    sync_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    sync_parser.add_argument("--full", action="store_true", help="Force a full resync")
+    sync_parser.add_argument("--dlc", action="store_true", help="Include DLC")
+    sync_parser.add_argument("--software", action="store_true", help="Include software")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Look up names by appid")
+    lookup_parser.add_argument("index", help="Index file path")
+    lookup_parser.add_argument("appids", nargs="+", type=int, help="App IDs")
+
+    prefix_parser = subparsers.add_parser("prefix", help="Search names by prefix")
+    prefix_parser.add_argument("index", help="Index file path")
+    prefix_parser.add_argument("prefix", help="Name prefix")
+    prefix_parser.add_argument("--limit", type=int, default=20, help="Maximum matches")
+    args = parser.parse_args()
+
+    if args.command == "sync":
+        api_key = args.key or os.environ.get("STEAM_API_KEY")
+        if not api_key:
+            print("Error: Steam API key is required.")
+            print("Get one at: https://steamcommunity.com/dev/apikey")
+            sys.exit(1)
+        changed = sync_catalog(SteamAPI(api_key), args.index, full=args.full,
+                               include_dlc=args.dlc, include_software=args.software)
+        with CatalogIndex(args.index) as index:
+            print(f"Updated {changed} apps, {len(index)} in catalog")
+
+    elif args.command == "lookup":
+        with CatalogIndex(args.index) as index:
+            for appid in args.appids:
+                print(f"{appid}\t{index.get_name(appid) or '(not found)'}")
+
+    elif args.command == "prefix":
+        with CatalogIndex(args.index) as index:
+            for appid, name in index.search_prefix(args.prefix, args.limit):
+                print(f"{appid}\t{name}")
+
+
+if __name__ == "__main__":
+    main()
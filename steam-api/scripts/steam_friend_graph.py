@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+"""
+Steam Friend Graph Crawler
+
+This script crawls the Steam friend graph breadth-first from one or more
+seed accounts using SteamAPI batch calls.
+
+Each level is processed in chunks: newly discovered IDs are summarized in
+100-ID GetPlayerSummaries calls, private profiles are skipped without a
+GetFriendList call, and public profiles are expanded concurrently. Nodes
+and edges are streamed to NDJSON files.
+
+The crawl state lives in a SQLite table with one row per discovered
+account (its depth and whether it was expanded), so large graphs do not
+have to fit in memory. The frontier of a level is read from the table in
+Steam ID order; after every chunk, the new rows and the position in the
+frontier are committed in one transaction, so an interrupted crawl can be
+resumed. Accounts whose summary or friend list could not be fetched are
+retried in extra passes over the level before the crawl moves on; those
+still failing are counted and reported.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_friend_graph.py 76561197960361544 --depth 2 --out graph/
+    python steam_friend_graph.py --resume --out graph/
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+from steam_api_example import SteamAPI
+
+
+PUBLIC_VISIBILITY = 3
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    steamid INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    failures INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS accounts_frontier ON accounts (depth, steamid);
+CREATE TABLE IF NOT EXISTS crawl (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    depth INTEGER NOT NULL,
+    max_depth INTEGER NOT NULL,
+    attempt INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    nodes_offset INTEGER NOT NULL,
+    edges_offset INTEGER NOT NULL
+);
+"""
+# IDs per "IN (...)" lookup (SQLite allows 999 parameters by default)
+LOOKUP_CHUNK = 500
+# Account states: discovered, summary written, friend list written
+NEW, SUMMARIZED, EXPANDED = 0, 1, 2
+# GetFriendList answers 401 for public profiles with a private friend list
+PRIVATE_FRIEND_LIST = "401 "
+
+
+class FriendGraphCrawler:
+    """Breadth-first friend graph crawler with NDJSON output and checkpoints."""
+
+    NODES_FILE = "nodes.ndjson"
+    EDGES_FILE = "edges.ndjson"
+    STATE_FILE = "crawl_state.db"
+
+    def __init__(self, api: SteamAPI, out_dir: str, max_depth: int = 2,
+                 chunk_size: int = 500, max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS,
+                 fields: Optional[List[str]] = None, retries: int = 2):
+        """
+        Initialize the crawler.
+
+        Args:
+            api: Steam API client
+            out_dir: Directory for NDJSON output and the crawl state
+            max_depth: Number of friend hops to expand from the seeds
+            chunk_size: Frontier IDs processed between commits of the state
+            max_workers: Maximum number of concurrent requests
+            fields: Summary fields written per node (None for all)
+            retries: Extra passes over a level for accounts that failed
+        """
+        self.api = api
+        self.out_dir = out_dir
+        self.max_depth = max_depth
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.fields = fields
+        self.retries = retries
+
+        self.depth = 0
+        # 0 for the first pass over a level, then the retry pass number
+        self.attempt = 0
+        # Last Steam ID of the current level that was processed
+        self.position = -1
+        self._offsets = (0, 0)
+        os.makedirs(out_dir, exist_ok=True)
+        self.db = sqlite3.connect(self._path(self.STATE_FILE))
+        self.db.executescript(SCHEMA)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.out_dir, name)
+
+    def close(self) -> None:
+        """Close the state database."""
+        self.db.close()
+
+    def seed(self, steamids: Iterable[str]) -> None:
+        """
+        Start a new crawl from seed Steam IDs, discarding any previous state.
+
+        Args:
+            steamids: Seed Steam IDs
+        """
+        with self.db:
+            self.db.execute("DELETE FROM accounts")
+            self.db.executemany("INSERT OR IGNORE INTO accounts (steamid, depth) VALUES (?, 0)",
+                                ((int(steamid),) for steamid in steamids))
+        for name in (self.NODES_FILE, self.EDGES_FILE):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self.depth, self.attempt, self.position, self._offsets = 0, 0, -1, (0, 0)
+        self.save_checkpoint()
+
+    def save_checkpoint(self) -> None:
+        """Record the crawl position; commits with the rows of the current chunk."""
+        with self.db:
+            self.db.execute("INSERT OR REPLACE INTO crawl VALUES (0, ?, ?, ?, ?, ?, ?)",
+                            (self.depth, self.max_depth, self.attempt, self.position, *self._offsets))
+
+    def load_checkpoint(self) -> bool:
+        """
+        Restore the crawl position, if a crawl was started.
+
+        Output written after the last commit is truncated so a resumed crawl
+        does not duplicate records.
+
+        Returns:
+            True if a crawl position was loaded
+        """
+        row = self.db.execute("SELECT depth, max_depth, attempt, position, nodes_offset, edges_offset "
+                              "FROM crawl").fetchone()
+        if row is None:
+            return False
+        self.depth, self.max_depth, self.attempt, self.position, nodes_offset, edges_offset = row
+        self._offsets = (nodes_offset, edges_offset)
+        for name, offset in ((self.NODES_FILE, nodes_offset), (self.EDGES_FILE, edges_offset)):
+            if os.path.exists(self._path(name)):
+                with open(self._path(name), "r+b") as f:
+                    f.truncate(offset)
+        return True
+
+    def _next_chunk(self) -> List[Tuple[int, int]]:
+        """Read the next (steamid, state) rows of the current pass over the level."""
+        if self.attempt == 0:
+            rows = self.db.execute("SELECT steamid, state FROM accounts WHERE depth = ? AND steamid > ? "
+                                   "ORDER BY steamid LIMIT ?", (self.depth, self.position, self.chunk_size))
+        else:
+            # Rows that failed in the previous pass
+            rows = self.db.execute("SELECT steamid, state FROM accounts WHERE depth = ? AND failures = ? "
+                                   "AND steamid > ? ORDER BY steamid LIMIT ?",
+                                   (self.depth, self.attempt, self.position, self.chunk_size))
+        return rows.fetchall()
+
+    def _has_failures(self) -> bool:
+        """Return True if the current pass left accounts to retry."""
+        return self.db.execute("SELECT 1 FROM accounts WHERE depth = ? AND failures = ? LIMIT 1",
+                               (self.depth, self.attempt + 1)).fetchone() is not None
+
+    def _expanded_among(self, steamids: List[int]) -> set:
+        """Return which of the given accounts already had their friend list written."""
+        found = set()
+        for start in range(0, len(steamids), LOOKUP_CHUNK):
+            part = steamids[start:start + LOOKUP_CHUNK]
+            found.update(steamid for steamid, in self.db.execute(
+                f"SELECT steamid FROM accounts WHERE state = {EXPANDED} "
+                f"AND steamid IN ({', '.join('?' * len(part))})", part))
+        return found
+
+    def _project(self, player: Dict[str, Any]) -> Dict[str, Any]:
+        if self.fields is None:
+            return player
+        return {key: player[key] for key in self.fields if key in player}
+
+    def _crawl_chunk(self, chunk: List[Tuple[int, int]], nodes, edges) -> None:
+        """Summarize a chunk of frontier IDs and expand the public ones."""
+        settled: List[Tuple[int, int]] = []
+        failed: List[Tuple[int, int]] = []
+        # Accounts already summarized are public ones whose friend list failed
+        expandable = [str(steamid) for steamid, state in chunk if state == SUMMARIZED]
+        pending = [steamid for steamid, state in chunk if state == NEW]
+        if pending:
+            summaries = self.api.get_player_summaries_batch([str(i) for i in pending],
+                                                            max_workers=self.max_workers)
+            for steamid in pending:
+                player = summaries.results.get(str(steamid))
+                if player is None:
+                    # "not returned" means the account no longer exists
+                    if summaries.failed.get(str(steamid)) != "not returned":
+                        failed.append((NEW, steamid))
+                    continue
+                node = self._project(player)
+                node["steamid"] = str(steamid)
+                node["depth"] = self.depth
+                nodes.write(json.dumps(node, ensure_ascii=False) + "\n")
+                if (self.depth < self.max_depth
+                        and player.get("communityvisibilitystate") == PUBLIC_VISIBILITY):
+                    expandable.append(str(steamid))
+                else:
+                    settled.append((SUMMARIZED, steamid))
+
+        if expandable:
+            friend_lists = self.api.get_friend_list_batch(expandable, max_workers=self.max_workers)
+            friends = {steamid: data.get("friendslist", {}).get("friends", [])
+                       for steamid, data in friend_lists.results.items()}
+            expanded = self._expanded_among(sorted({int(friend["steamid"])
+                                                    for found in friends.values() for friend in found}))
+            for steamid in expandable:
+                if steamid not in friends:
+                    error = friend_lists.failed.get(steamid, "")
+                    if error.startswith(PRIVATE_FRIEND_LIST):
+                        settled.append((SUMMARIZED, int(steamid)))
+                    else:
+                        failed.append((SUMMARIZED, int(steamid)))
+                    continue
+                for friend in friends[steamid]:
+                    if int(friend["steamid"]) not in expanded:
+                        edges.write(json.dumps({"src": steamid, "dst": friend["steamid"],
+                                                "friend_since": friend.get("friend_since")}) + "\n")
+                # Accounts already discovered keep their depth
+                self.db.executemany("INSERT OR IGNORE INTO accounts (steamid, depth) VALUES (?, ?)",
+                                    ((int(friend["steamid"]), self.depth + 1) for friend in friends[steamid]))
+                settled.append((EXPANDED, int(steamid)))
+                expanded.add(int(steamid))
+
+        self.db.executemany("UPDATE accounts SET state = ?, failures = 0 WHERE steamid = ?", settled)
+        # A failed row moves on to the next retry pass
+        self.db.executemany("UPDATE accounts SET state = ?, failures = failures + 1 WHERE steamid = ?",
+                            failed)
+
+    def crawl(self) -> Tuple[int, int, int]:
+        """
+        Run the crawl until the frontier is exhausted or max_depth is reached.
+
+        Returns:
+            Tuple of (nodes visited, nodes expanded, nodes that still failed
+            after all retries; their friends are missing from the graph)
+        """
+        with open(self._path(self.NODES_FILE), "a", encoding="utf-8") as nodes, \
+                open(self._path(self.EDGES_FILE), "a", encoding="utf-8") as edges:
+            while True:
+                chunk = self._next_chunk()
+                while chunk:
+                    self._crawl_chunk(chunk, nodes, edges)
+                    nodes.flush()
+                    edges.flush()
+                    self.position = chunk[-1][0]
+                    self._offsets = (nodes.tell(), edges.tell())
+                    self.save_checkpoint()
+                    chunk = self._next_chunk()
+                if self.attempt < self.retries and self._has_failures():
+                    self.attempt += 1
+                    self.position = -1
+                    self.save_checkpoint()
+                    continue
+                if self.depth >= self.max_depth:
+                    break
+                self.depth += 1
+                self.attempt = 0
+                self.position = -1
+                self.save_checkpoint()
+                if not self.db.execute("SELECT 1 FROM accounts WHERE depth = ? LIMIT 1",
+                                       (self.depth,)).fetchone():
+                    break
+        return self.db.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(state = {EXPANDED}), 0), COALESCE(SUM(failures > 0), 0) "
+            f"FROM accounts").fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam Friend Graph Crawler")
+    parser.add_argument("seeds", nargs="*", help="Seed Steam IDs")
+    parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    parser.add_argument("--out", default="friend_graph", help="Output directory")
+    parser.add_argument("--depth", type=int, default=2, help="Friend hops to expand")
+    parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                        help="Maximum concurrent requests")
+    parser.add_argument("--chunk-size", type=int, default=500,
+                        help="Frontier IDs processed between commits of the crawl state")
+    parser.add_argument("--fields", help="Comma-separated summary fields to keep per node")
+    parser.add_argument("--retries", type=int, default=2,
+                        help="Extra passes per level over accounts whose requests failed")
+    parser.add_argument("--resume", action="store_true", help="Resume from the saved crawl state")
+    args = parser.parse_args()
+
+    api_key = args.key or os.environ.get("STEAM_API_KEY")
+    if not api_key:
+        print("Error: Steam API key is required.")
+        print("Get one at: https://steamcommunity.com/dev/apikey")
+        sys.exit(1)
+
+    fields = args.fields.split(",") if args.fields else None
+    crawler = FriendGraphCrawler(SteamAPI(api_key), args.out, max_depth=args.depth,
+                                 chunk_size=args.chunk_size, max_workers=args.workers,
+                                 fields=fields, retries=args.retries)
+    if args.resume:
+        if not crawler.load_checkpoint():
+            print(f"Error: no crawl state found in {args.out}")
+            sys.exit(1)
+    elif args.seeds:
+        crawler.seed(args.seeds)
+    else:
+        parser.error("seed Steam IDs are required unless --resume is given")
+
+    visited, expanded, failed = crawler.crawl()
+    crawler.close()
+    print(f"Visited {visited} accounts, expanded {expanded} friend lists")
+    if failed:
+        print(f"Warning: {failed} accounts failed after {args.retries} retries; "
+              f"their friends are missing from the graph")
+
+
+if __name__ == "__main__":
+    main()
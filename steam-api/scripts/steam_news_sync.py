@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Steam News Incremental Sync
+
+This script keeps a local SQLite copy of GetNewsForApp items for many apps
+and only downloads posts it has not seen before.
+
+Each cycle first asks every app for its single newest item with a one
+character body. Apps whose newest gid matches the stored one cost nothing
+more. Apps with new posts are paged backwards with enddate until a known
+gid or an older date is reached, and items are deduplicated by gid.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_news_sync.py sync news.db --apps 730,570 --workers 16
+    python steam_news_sync.py sync news.db --apps-file apps.txt --interval 900
+    python steam_news_sync.py latest news.db 730 --limit 5
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Tuple
+
+from steam_api_example import SteamAPI
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    gid TEXT PRIMARY KEY,
+    appid INTEGER NOT NULL,
+    date INTEGER NOT NULL,
+    title TEXT,
+    url TEXT,
+    author TEXT,
+    feedlabel TEXT,
+    feedname TEXT,
+    contents TEXT
+);
+CREATE INDEX IF NOT EXISTS news_app_date ON news (appid, date);
+CREATE TABLE IF NOT EXISTS app_state (
+    appid INTEGER PRIMARY KEY,
+    newest_gid TEXT,
+    newest_date INTEGER,
+    checked_at INTEGER
+);
+"""
+NEWS_COLUMNS = ("gid", "appid", "date", "title", "url", "author", "feedlabel", "feedname", "contents")
+
+
+def open_db(db_path: str) -> sqlite3.Connection:
+    """Open the news database, creating tables if needed."""
+    db = sqlite3.connect(db_path)
+    db.executescript(SCHEMA)
+    return db
+
+
+def latest_news(db: sqlite3.Connection, appid: int, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Read the newest stored items for an app.
+
+    Args:
+        db: News database connection
+        appid: App ID
+        limit: Maximum number of items
+
+    Returns:
+        News items, newest first
+    """
+    rows = db.execute(
+        f"SELECT {', '.join(NEWS_COLUMNS)} FROM news WHERE appid = ? "
+        "ORDER BY date DESC LIMIT ?", (appid, limit))
+    return [dict(zip(NEWS_COLUMNS, row)) for row in rows]
+
+
+class NewsSync:
+    """Incremental GetNewsForApp sync into SQLite."""
+
+    def __init__(self, api: SteamAPI, db_path: str, page_size: int = 20,
+                 maxlength: int = 0, initial_items: int = 20,
+                 max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS):
+        """
+        Initialize the sync.
+
+        Args:
+            api: Steam API client
+            db_path: SQLite database path
+            page_size: Items per backwards page
+            maxlength: Maximum content length stored (0 for full contents)
+            initial_items: Items fetched for an app seen for the first time
+            max_workers: Maximum number of concurrent requests
+        """
+        self.api = api
+        self.page_size = page_size
+        self.maxlength = maxlength
+        self.initial_items = initial_items
+        self.max_workers = max_workers
+        self.db = open_db(db_path)
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+    def _state(self) -> Dict[int, Tuple[str, int]]:
+        """Load the newest known (gid, date) for every app."""
+        rows = self.db.execute("SELECT appid, newest_gid, newest_date FROM app_state")
+        return {appid: (gid, date) for appid, gid, date in rows}
+
+    def _fetch_new(self, appid: int, known: Optional[Tuple[str, int]]) -> List[Dict[str, Any]]:
+        """
+        Fetch the items newer than the known newest item.
+
+        Args:
+            appid: App ID
+            known: Stored (gid, date) of the newest item, or None
+
+        Returns:
+            New news items, newest first
+        """
+        probe = self.api.get_news_for_app(appid, count=1, maxlength=1)
+        head = probe.get("appnews", {}).get("newsitems", [])
+        if not head or (known and head[0]["gid"] == known[0]):
+            return []
+
+        known_gid, known_date = known if known else (None, None)
+        limit = None if known else self.initial_items
+        items: List[Dict[str, Any]] = []
+        seen = set()
+        enddate = None
+        while True:
+            page = self.api.get_news_for_app(appid, count=self.page_size,
+                                             maxlength=self.maxlength, enddate=enddate)
+            news = page.get("appnews", {}).get("newsitems", [])
+            reached_known = False
+            for item in news:
+                if item["gid"] == known_gid or (known_date is not None and item["date"] < known_date):
+                    reached_known = True
+                    break
+                if item["gid"] not in seen:
+                    seen.add(item["gid"])
+                    items.append(item)
+            if reached_known or len(news) < self.page_size or (limit and len(items) >= limit):
+                break
+            oldest = news[-1]["date"]
+            # Items sharing the boundary timestamp are re-sent and deduplicated;
+            # step past it if a whole page shares one timestamp.
+            enddate = oldest if enddate != oldest else oldest - 1
+        return items[:limit] if limit else items
+
+    def _store(self, appid: int, items: List[Dict[str, Any]], checked_at: int) -> None:
+        """Insert new items and advance the app's newest marker."""
+        rows = [(item["gid"], appid, item["date"], item.get("title"), item.get("url"),
+                 item.get("author"), item.get("feedlabel"), item.get("feedname"),
+                 item.get("contents")) for item in items]
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR IGNORE INTO news ({', '.join(NEWS_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(NEWS_COLUMNS))})", rows)
+            if items:
+                newest = max(items, key=lambda item: item["date"])
+                self.db.execute(
+                    "INSERT INTO app_state (appid, newest_gid, newest_date, checked_at) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT(appid) DO UPDATE SET "
+                    "newest_gid = excluded.newest_gid, newest_date = excluded.newest_date, "
+                    "checked_at = excluded.checked_at",
+                    (appid, newest["gid"], newest["date"], checked_at))
+            else:
+                self.db.execute("UPDATE app_state SET checked_at = ? WHERE appid = ?",
+                                (checked_at, appid))
+
+    def sync(self, appids: List[int]) -> Dict[str, int]:
+        """
+        Run one sync cycle over many apps concurrently.
+
+        Args:
+            appids: App IDs to sync
+
+        Returns:
+            Counters for apps checked, apps updated, new items and failures
+        """
+        state = self._state()
+        checked_at = int(time.time())
+        stats = {"apps": len(appids), "updated": 0, "new_items": 0, "failed": 0}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._fetch_new, appid, state.get(appid)): appid
+                       for appid in appids}
+            for future in as_completed(futures):
+                appid = futures[future]
+                try:
+                    items = future.result()
+                except Exception:
+                    stats["failed"] += 1
+                    continue
+                self._store(appid, items, checked_at)
+                if items:
+                    stats["updated"] += 1
+                    stats["new_items"] += len(items)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam News Incremental Sync")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sync_parser = subparsers.add_parser("sync", help="Fetch new posts for many apps")
+    sync_parser.add_argument("db", help="SQLite database path")
+    sync_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    sync_parser.add_argument("--apps", help="Comma-separated app IDs")
+    sync_parser.add_argument("--apps-file", help="File with one app ID per line")
+    sync_parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                             help="Maximum concurrent requests")
+    sync_parser.add_argument("--interval", type=float,
+                             help="Repeat every N seconds instead of running once")
+
+    latest_parser = subparsers.add_parser("latest", help="Show stored posts for an app")
+    latest_parser.add_argument("db", help="SQLite database path")
+    latest_parser.add_argument("appid", type=int, help="App ID")
+    latest_parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    if args.command == "latest":
+        db = open_db(args.db)
+        for item in latest_news(db, args.appid, args.limit):
+            stamp = time.strftime("%Y-%m-%d", time.localtime(item["date"]))
+            print(f"{stamp}  {item['title']}  {item['url']}")
+        db.close()
+        return
+
+    api_key = args.key or os.environ.get("STEAM_API_KEY")
+    if not api_key:
+        print("Error: Steam API key is required.")
+        print("Get one at: https://steamcommunity.com/dev/apikey")
+        sys.exit(1)
+    appids = [int(a) for a in args.apps.split(",") if a.strip()] if args.apps else []
+    if args.apps_file:
+        with open(args.apps_file, encoding="utf-8") as f:
+            appids.extend(int(line) for line in f if line.strip())
+    if not appids:
+        parser.error("no app IDs given (use --apps or --apps-file)")
+
+    sync = NewsSync(SteamAPI(api_key), args.db, max_workers=args.workers)
+    try:
+        while True:
+            stats = sync.sync(list(dict.fromkeys(appids)))
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {stats['updated']}/{stats['apps']} apps "
+                  f"updated, {stats['new_items']} new items, {stats['failed']} failed")
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sync.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Steam Concurrent-Player Poller
+
+This script polls GetNumberOfCurrentPlayers for a list of apps at a fixed
+cadence and stores (timestamp, appid, count) samples in a fixed-size,
+memory-mapped ring buffer file.
+
+The file holds three uint32 columns of equal capacity. Once full, the
+oldest samples are overwritten, so storage never grows. Range and
+downsampling queries are vectorised with NumPy when it is installed and
+fall back to plain Python otherwise.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_player_poller.py poll players.ring --apps 730,570 --interval 300
+    python steam_player_poller.py poll players.ring --apps-file apps.txt --workers 16
+    python steam_player_poller.py query players.ring 730 --since 86400 --bucket 3600
+"""
+
+import os
+import sys
+import mmap
+import time
+import random
+import struct
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from steam_api_example import SteamAPI
+
+
+RING_MAGIC = b"GALRING1"
+# magic, capacity, total samples written
+RING_HEADER = struct.Struct("<8sQQ")
+DEFAULT_CAPACITY = 1_000_000
+
+
+class PlayerCountRing:
+    """Memory-mapped ring buffer of (timestamp, appid, count) samples."""
+
+    def __init__(self, path: str, capacity: int = DEFAULT_CAPACITY):
+        """
+        Open or create a ring buffer file.
+
+        Args:
+            path: Ring buffer file path
+            capacity: Number of samples kept (only used when creating)
+        """
+        if not os.path.exists(path):
+            with open(path, "wb") as f:
+                f.write(RING_HEADER.pack(RING_MAGIC, capacity, 0))
+                f.truncate(RING_HEADER.size + 12 * capacity)
+
+        self._file = open(path, "r+b")
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, self.capacity, self.written = RING_HEADER.unpack_from(self._mmap)
+        if magic != RING_MAGIC:
+            raise ValueError(f"Not a player count ring buffer: {path}")
+
+        size = 4 * self.capacity
+        offsets = [RING_HEADER.size + i * size for i in range(3)]
+        if np is not None:
+            self._columns = [np.frombuffer(self._mmap, dtype="<u4", count=self.capacity,
+                                           offset=offset) for offset in offsets]
+        else:
+            view = memoryview(self._mmap)
+            self._columns = [view[offset:offset + size].cast("I") for offset in offsets]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def __enter__(self) -> "PlayerCountRing":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Flush and release the memory map."""
+        self._mmap.flush()
+        if np is None:
+            for column in self._columns:
+                column.release()
+        self._columns = []
+        self._mmap.close()
+        self._file.close()
+
+    def append(self, samples: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Append samples, overwriting the oldest once the buffer is full.
+
+        Args:
+            samples: (timestamp, appid, count) tuples
+        """
+        with self._lock:
+            written = self.written
+            for sample in samples:
+                slot = written % self.capacity
+                for column, value in zip(self._columns, sample):
+                    column[slot] = value
+                written += 1
+            self.written = written
+            struct.pack_into("<Q", self._mmap, 16, written)
+
+    def _ordered(self) -> List[Any]:
+        """Return the three columns in write order."""
+        n = len(self)
+        head = self.written % self.capacity
+        if self.written <= self.capacity:
+            return [column[:n] for column in self._columns]
+        if np is not None:
+            return [np.concatenate((column[head:], column[:head])) for column in self._columns]
+        return [list(column[head:]) + list(column[:head]) for column in self._columns]
+
+    def range(self, appid: Optional[int] = None, start: Optional[int] = None,
+              end: Optional[int] = None) -> Tuple[Any, Any, Any]:
+        """
+        Select samples by app and time window.
+
+        Args:
+            appid: Only return samples for this app (None for all)
+            start: Inclusive start Unix time
+            end: Exclusive end Unix time
+
+        Returns:
+            Tuple of (timestamps, appids, counts) in write order; NumPy
+            arrays when NumPy is installed, lists otherwise
+        """
+        ts, apps, counts = self._ordered()
+        if np is not None:
+            mask = np.ones(len(ts), dtype=bool)
+            if appid is not None:
+                mask &= apps == appid
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts < end
+            return ts[mask], apps[mask], counts[mask]
+
+        rows = [i for i in range(len(ts))
+                if (appid is None or apps[i] == appid)
+                and (start is None or ts[i] >= start)
+                and (end is None or ts[i] < end)]
+        return [ts[i] for i in rows], [apps[i] for i in rows], [counts[i] for i in rows]
+
+    def downsample(self, appid: int, bucket_seconds: int, start: Optional[int] = None,
+                   end: Optional[int] = None, agg: str = "mean") -> List[Tuple[int, float]]:
+        """
+        Aggregate one app's samples into fixed time buckets.
+
+        Args:
+            appid: App ID
+            bucket_seconds: Bucket width in seconds
+            start: Inclusive start Unix time
+            end: Exclusive end Unix time
+            agg: "mean", "min" or "max"
+
+        Returns:
+            List of (bucket start, aggregated count) in time order
+        """
+        if agg not in ("mean", "min", "max"):
+            raise ValueError(f"Unsupported aggregation: {agg}")
+        ts, _, counts = self.range(appid, start, end)
+        if len(ts) == 0:
+            return []
+
+        if np is not None:
+            buckets = (ts // bucket_seconds) * bucket_seconds
+            keys, inverse = np.unique(buckets, return_inverse=True)
+            values = counts.astype(np.float64)
+            if agg == "mean":
+                result = (np.bincount(inverse, weights=values)
+                          / np.bincount(inverse))
+            else:
+                result = np.full(len(keys), np.inf if agg == "min" else -np.inf)
+                (np.minimum if agg == "min" else np.maximum).at(result, inverse, values)
+            return list(zip(keys.tolist(), result.tolist()))
+
+        grouped: Dict[int, List[int]] = {}
+        for timestamp, count in zip(ts, counts):
+            grouped.setdefault(timestamp // bucket_seconds * bucket_seconds, []).append(count)
+        reducer = {"mean": lambda v: sum(v) / len(v), "min": min, "max": max}[agg]
+        return [(key, float(reducer(grouped[key]))) for key in sorted(grouped)]
+
+
+class PlayerCountPoller:
+    """Fixed-cadence concurrent-player poller."""
+
+    def __init__(self, api: SteamAPI, ring: PlayerCountRing, appids: List[int],
+                 interval: float = 300, jitter: float = 0.1,
+                 max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS):
+        """
+        Initialize the poller.
+
+        Args:
+            api: Steam API client
+            ring: Sample store
+            appids: App IDs to poll
+            interval: Seconds between cycle starts
+            jitter: Random start offset as a fraction of the interval
+            max_workers: Maximum number of concurrent requests
+        """
+        self.api = api
+        self.ring = ring
+        self.appids = appids
+        self.interval = interval
+        self.jitter = jitter
+        self.max_workers = max_workers
+
+    def _fetch(self, appid: int) -> Optional[int]:
+        """Fetch one app's player count, or None on failure."""
+        try:
+            data = self.api.get_number_of_current_players(appid).get("response", {})
+        except Exception:
+            return None
+        if data.get("result") != 1:
+            return None
+        return data.get("player_count")
+
+    def poll_once(self, executor: ThreadPoolExecutor) -> Tuple[int, int]:
+        """
+        Poll every app once and store the samples.
+
+        Args:
+            executor: Executor bounding request parallelism
+
+        Returns:
+            Tuple of (samples stored, apps failed)
+        """
+        timestamp = int(time.time())
+        counts = list(executor.map(self._fetch, self.appids))
+        samples = [(timestamp, appid, count)
+                   for appid, count in zip(self.appids, counts) if count is not None]
+        self.ring.append(samples)
+        return len(samples), len(self.appids) - len(samples)
+
+    def run(self, cycles: Optional[int] = None) -> None:
+        """
+        Poll at a fixed cadence.
+
+        Cycle starts are anchored to the schedule rather than to the end of
+        the previous cycle, so slow cycles do not cause drift.
+
+        Args:
+            cycles: Number of cycles to run (None to run forever)
+        """
+        next_start = time.monotonic()
+        cycle = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while cycles is None or cycle < cycles:
+                delay = next_start + random.uniform(0, self.jitter * self.interval) - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                stored, failed = self.poll_once(executor)
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] stored {stored} samples, {failed} failed")
+                cycle += 1
+                next_start += self.interval
+                if next_start < time.monotonic():
+                    next_start = time.monotonic()
+
+
+def _load_appids(apps: Optional[str], apps_file: Optional[str]) -> List[int]:
+    """Collect app IDs from a comma-separated list and/or a file."""
+    appids = [int(a) for a in apps.split(",") if a.strip()] if apps else []
+    if apps_file:
+        with open(apps_file, encoding="utf-8") as f:
+            appids.extend(int(line) for line in f if line.strip())
+    return list(dict.fromkeys(appids))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam Concurrent-Player Poller")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    poll_parser = subparsers.add_parser("poll", help="Poll player counts into a ring buffer")
+    poll_parser.add_argument("ring", help="Ring buffer file path")
+    poll_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    poll_parser.add_argument("--apps", help="Comma-separated app IDs")
+    poll_parser.add_argument("--apps-file", help="File with one app ID per line")
+    poll_parser.add_argument("--interval", type=float, default=300, help="Seconds between polls")
+    poll_parser.add_argument("--jitter", type=float, default=0.1,
+                             help="Start jitter as a fraction of the interval")
+    poll_parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                             help="Maximum concurrent requests")
+    poll_parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                             help="Samples kept when creating a new ring buffer")
+    poll_parser.add_argument("--cycles", type=int, help="Stop after this many cycles")
+
+    query_parser = subparsers.add_parser("query", help="Query stored player counts")
+    query_parser.add_argument("ring", help="Ring buffer file path")
+    query_parser.add_argument("appid", type=int, help="App ID")
+    query_parser.add_argument("--since", type=int, default=86400, help="Window in seconds")
+    query_parser.add_argument("--bucket", type=int, default=3600, help="Bucket width in seconds")
+    query_parser.add_argument("--agg", choices=["mean", "min", "max"], default="mean")
+    args = parser.parse_args()
+
+    if args.command == "poll":
+        api_key = args.key or os.environ.get("STEAM_API_KEY")
+        if not api_key:
+            print("Error: Steam API key is required.")
+            print("Get one at: https://steamcommunity.com/dev/apikey")
+            sys.exit(1)
+        appids = _load_appids(args.apps, args.apps_file)
+        if not appids:
+            parser.error("no app IDs given (use --apps or --apps-file)")
+        with PlayerCountRing(args.ring, args.capacity) as ring:
+            poller = PlayerCountPoller(SteamAPI(api_key), ring, appids, args.interval,
+                                       args.jitter, args.workers)
+            try:
+                poller.run(args.cycles)
+            except KeyboardInterrupt:
+                pass
+
+    elif args.command == "query":
+        with PlayerCountRing(args.ring) as ring:
+            start = int(time.time()) - args.since
+            for bucket, value in ring.downsample(args.appid, args.bucket, start=start, agg=args.agg):
+                stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(bucket))
+                print(f"{stamp}\t{value:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
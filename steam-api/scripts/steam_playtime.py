@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Steam Playtime Analytics
+
+This script ingests GetOwnedGames responses for many users into columnar
+typed arrays and runs aggregate queries over them.
+
+Each owned game becomes one row of four uint32 columns (user index, appid,
+playtime_forever, rtime_last_played). App names and icon hashes are kept
+once per app in a shared table instead of once per user. Aggregations use
+NumPy when it is installed and fall back to plain Python otherwise.
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_playtime.py ingest playtime.bin --steamids-file ids.txt --workers 16
+    python steam_playtime.py top playtime.bin --by playtime --limit 20
+    python steam_playtime.py percentiles playtime.bin 730 570
+    python steam_playtime.py coowned playtime.bin 730
+"""
+
+import os
+import sys
+import json
+import array
+import struct
+import argparse
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from steam_api_example import SteamAPI
+
+
+STORE_MAGIC = b"GALPT001"
+# magic, rows, metadata size
+STORE_HEADER = struct.Struct("<8sQQ")
+COLUMNS = ("user", "appid", "playtime_forever", "rtime_last_played")
+GAME_FIELDS = ("appid", "playtime_forever", "rtime_last_played", "name", "img_icon_url")
+
+
+class PlaytimeTable:
+    """Columnar store of owned-games rows for many users."""
+
+    def __init__(self):
+        """Create an empty table."""
+        self.users: List[str] = []
+        self.apps: Dict[int, Dict[str, str]] = {}
+        self.columns = {name: array.array("I") for name in COLUMNS}
+        self._user_index: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["appid"])
+
+    def add_response(self, steamid: str, data: Dict[str, Any]) -> int:
+        """
+        Append one user's GetOwnedGames response.
+
+        Args:
+            steamid: Steam ID of the user
+            data: GetOwnedGames response
+
+        Returns:
+            Number of rows added
+        """
+        games = data.get("response", {}).get("games", [])
+        user = self._user_index.get(steamid)
+        if user is None:
+            user = self._user_index[steamid] = len(self.users)
+            self.users.append(steamid)
+
+        cols = self.columns
+        for game in games:
+            appid = game["appid"]
+            if appid not in self.apps and "name" in game:
+                self.apps[appid] = {"name": game["name"],
+                                    "img_icon_url": game.get("img_icon_url", "")}
+            cols["user"].append(user)
+            cols["appid"].append(appid)
+            cols["playtime_forever"].append(game.get("playtime_forever", 0))
+            cols["rtime_last_played"].append(game.get("rtime_last_played", 0))
+        return len(games)
+
+    def _fetch_games(self, api: SteamAPI, steamid: str) -> Tuple[Tuple[array.array, ...],
+                                                                 Dict[int, Dict[str, str]]]:
+        """
+        Stream one user's owned games into typed columns.
+
+        Runs in a worker thread; names and icons are only kept for apps
+        not yet in the shared table.
+
+        Returns:
+            ((appid, playtime_forever, rtime_last_played) arrays, new app info)
+        """
+        appids, playtime, last_played = array.array("I"), array.array("I"), array.array("I")
+        apps: Dict[int, Dict[str, str]] = {}
+        for game in api.iter_owned_games(steamid, include_appinfo=True, fields=GAME_FIELDS):
+            appid = game["appid"]
+            appids.append(appid)
+            playtime.append(game.get("playtime_forever", 0))
+            last_played.append(game.get("rtime_last_played", 0))
+            if appid not in self.apps and appid not in apps and "name" in game:
+                apps[appid] = {"name": game["name"], "img_icon_url": game.get("img_icon_url", "")}
+        return (appids, playtime, last_played), apps
+
+    def ingest(self, api: SteamAPI, steamids: Iterable[str],
+               max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS,
+               chunk_size: int = 1000) -> Dict[str, str]:
+        """
+        Fetch and ingest owned games for many users.
+
+        Responses are streamed and decoded game by game straight into typed
+        columns, so per-game dicts are never held for a whole response.
+        Users are fetched in chunks so only one chunk of columns is pending
+        at a time. Users already in the table are skipped.
+
+        Args:
+            api: Steam API client
+            steamids: Steam IDs to ingest
+            max_workers: Maximum number of concurrent requests
+            chunk_size: Users fetched per chunk
+
+        Returns:
+            Mapping of failed Steam ID to error message
+        """
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
+        steamids = [s for s in dict.fromkeys(steamids) if s not in self._user_index]
+        failed: Dict[str, str] = {}
+        cols = self.columns
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for i in range(0, len(steamids), chunk_size):
+                futures = {executor.submit(self._fetch_games, api, steamid): steamid
+                           for steamid in steamids[i:i + chunk_size]}
+                for future in as_completed(futures):
+                    steamid = futures[future]
+                    try:
+                        (appids, playtime, last_played), apps = future.result()
+                    except Exception as e:
+                        failed[steamid] = str(e)
+                        continue
+                    user = self._user_index[steamid] = len(self.users)
+                    self.users.append(steamid)
+                    for appid, info in apps.items():
+                        self.apps.setdefault(appid, info)
+                    cols["user"].extend(array.array("I", [user]) * len(appids))
+                    cols["appid"].extend(appids)
+                    cols["playtime_forever"].extend(playtime)
+                    cols["rtime_last_played"].extend(last_played)
+        return failed
+
+    def save(self, path: str) -> None:
+        """
+        Write the table to a file.
+
+        Args:
+            path: Output file path
+        """
+        meta = json.dumps({"users": self.users,
+                           "apps": {str(k): v for k, v in self.apps.items()}},
+                          ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(STORE_HEADER.pack(STORE_MAGIC, len(self), len(meta)))
+            for name in COLUMNS:
+                self.columns[name].tofile(f)
+            f.write(meta)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "PlaytimeTable":
+        """
+        Read a table written by save().
+
+        Args:
+            path: Table file path
+
+        Returns:
+            Loaded table
+        """
+        table = cls()
+        with open(path, "rb") as f:
+            magic, rows, meta_size = STORE_HEADER.unpack(f.read(STORE_HEADER.size))
+            if magic != STORE_MAGIC:
+                raise ValueError(f"Not a playtime table: {path}")
+            for name in COLUMNS:
+                table.columns[name].fromfile(f, rows)
+            meta = json.loads(f.read(meta_size).decode("utf-8"))
+        table.users = meta["users"]
+        table.apps = {int(k): v for k, v in meta["apps"].items()}
+        table._user_index = {steamid: i for i, steamid in enumerate(table.users)}
+        return table
+
+    def _np(self, name: str):
+        """View a column as a NumPy array without copying."""
+        return np.frombuffer(self.columns[name], dtype=np.uint32)
+
+    def top_apps(self, limit: int = 10, by: str = "owners") -> List[Tuple[int, str, int, int]]:
+        """
+        Rank apps by owner count or total playtime.
+
+        Args:
+            limit: Number of apps to return
+            by: "owners" or "playtime"
+
+        Returns:
+            List of (appid, name, owners, total playtime minutes)
+        """
+        if by not in ("owners", "playtime"):
+            raise ValueError(f"Unsupported ranking: {by}")
+        if np is not None:
+            appids, inverse = np.unique(self._np("appid"), return_inverse=True)
+            owners = np.bincount(inverse)
+            playtime = np.bincount(inverse, weights=self._np("playtime_forever")).astype(np.int64)
+            order = np.argsort(-(owners if by == "owners" else playtime), kind="stable")[:limit]
+            rows = [(int(appids[i]), int(owners[i]), int(playtime[i])) for i in order]
+        else:
+            totals: Dict[int, List[int]] = {}
+            for appid, minutes in zip(self.columns["appid"], self.columns["playtime_forever"]):
+                entry = totals.setdefault(appid, [0, 0])
+                entry[0] += 1
+                entry[1] += minutes
+            ranked = sorted(totals.items(), key=lambda kv: (-kv[1][0 if by == "owners" else 1], kv[0]))
+            rows = [(appid, owners, minutes) for appid, (owners, minutes) in ranked[:limit]]
+        return [(appid, self.apps.get(appid, {}).get("name", ""), owners, minutes)
+                for appid, owners, minutes in rows]
+
+    def playtime_percentiles(self, appids: Optional[Iterable[int]] = None,
+                             q: Tuple[float, ...] = (50, 90, 99),
+                             played_only: bool = True) -> Dict[int, List[float]]:
+        """
+        Compute per-app playtime percentiles.
+
+        Args:
+            appids: Apps to include (None for all)
+            q: Percentiles to compute (0-100)
+            played_only: Ignore owners with zero playtime
+
+        Returns:
+            Mapping of appid to percentile values in minutes
+        """
+        wanted = set(appids) if appids is not None else None
+        if np is not None:
+            apps, minutes = self._np("appid"), self._np("playtime_forever")
+            mask = minutes > 0 if played_only else np.ones(len(apps), dtype=bool)
+            if wanted is not None:
+                mask &= np.isin(apps, list(wanted))
+            apps, minutes = apps[mask], minutes[mask]
+            order = np.lexsort((minutes, apps))
+            apps, minutes = apps[order], minutes[order]
+            keys, starts = np.unique(apps, return_index=True)
+            groups = np.split(minutes, starts[1:])
+            return {int(appid): np.percentile(group, q).tolist()
+                    for appid, group in zip(keys, groups)}
+
+        grouped: Dict[int, List[int]] = {}
+        for appid, value in zip(self.columns["appid"], self.columns["playtime_forever"]):
+            if (wanted is None or appid in wanted) and (value > 0 or not played_only):
+                grouped.setdefault(appid, []).append(value)
+        return {appid: [_percentile(sorted(values), p) for p in q]
+                for appid, values in grouped.items()}
+
+    def co_owned_with(self, appid: int, limit: int = 10) -> List[Tuple[int, str, int]]:
+        """
+        Find the apps most often owned together with an app.
+
+        Args:
+            appid: App ID
+            limit: Number of apps to return
+
+        Returns:
+            List of (appid, name, co-owner count)
+        """
+        if np is not None:
+            users, apps = self._np("user"), self._np("appid")
+            owners = np.zeros(len(self.users), dtype=bool)
+            owners[users[apps == appid]] = True
+            others = apps[owners[users] & (apps != appid)]
+            keys, counts = np.unique(others, return_counts=True)
+            order = np.argsort(-counts, kind="stable")[:limit]
+            rows = [(int(keys[i]), int(counts[i])) for i in order]
+        else:
+            owners = {u for u, a in zip(self.columns["user"], self.columns["appid"]) if a == appid}
+            counts: Dict[int, int] = {}
+            for user, other in zip(self.columns["user"], self.columns["appid"]):
+                if user in owners and other != appid:
+                    counts[other] = counts.get(other, 0) + 1
+            rows = sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+        return [(other, self.apps.get(other, {}).get("name", ""), count) for other, count in rows]
+
+    def co_ownership_matrix(self, appids: List[int]) -> List[List[int]]:
+        """
+        Count owners shared by every pair of the given apps.
+
+        Args:
+            appids: App IDs (matrix rows and columns, in this order)
+
+        Returns:
+            Square matrix of shared owner counts; the diagonal is owner count
+        """
+        if np is not None:
+            users, apps = self._np("user"), self._np("appid")
+            owned = np.zeros((len(appids), len(self.users)), dtype=np.float32)
+            for row, appid in enumerate(appids):
+                owned[row, users[apps == appid]] = 1
+            return (owned @ owned.T).astype(np.int64).tolist()
+
+        owner_sets = {appid: set() for appid in appids}
+        for user, appid in zip(self.columns["user"], self.columns["appid"]):
+            if appid in owner_sets:
+                owner_sets[appid].add(user)
+        return [[len(owner_sets[a] & owner_sets[b]) for b in appids] for a in appids]
+
+
+def _percentile(values: List[int], p: float) -> float:
+    """Linear-interpolation percentile of a sorted list (NumPy's default)."""
+    if not values:
+        return 0.0
+    pos = (len(values) - 1) * p / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam Playtime Analytics")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Fetch owned games into a table")
+    ingest_parser.add_argument("table", help="Table file path (appended to if it exists)")
+    ingest_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    ingest_parser.add_argument("--steamids", help="Comma-separated Steam IDs")
+    ingest_parser.add_argument("--steamids-file", help="File with one Steam ID per line")
+    ingest_parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                               help="Maximum concurrent requests")
+
+    top_parser = subparsers.add_parser("top", help="Top apps by owners or playtime")
+    top_parser.add_argument("table", help="Table file path")
+    top_parser.add_argument("--by", choices=["owners", "playtime"], default="owners")
+    top_parser.add_argument("--limit", type=int, default=20)
+
+    pct_parser = subparsers.add_parser("percentiles", help="Per-app playtime percentiles")
+    pct_parser.add_argument("table", help="Table file path")
+    pct_parser.add_argument("appids", nargs="+", type=int, help="App IDs")
+
+    co_parser = subparsers.add_parser("coowned", help="Apps most often co-owned with an app")
+    co_parser.add_argument("table", help="Table file path")
+    co_parser.add_argument("appid", type=int, help="App ID")
+    co_parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "ingest":
+        api_key = args.key or os.environ.get("STEAM_API_KEY")
+        if not api_key:
+            print("Error: Steam API key is required.")
+            print("Get one at: https://steamcommunity.com/dev/apikey")
+            sys.exit(1)
+        steamids = args.steamids.split(",") if args.steamids else []
+        if args.steamids_file:
+            with open(args.steamids_file, encoding="utf-8") as f:
+                steamids.extend(line.strip() for line in f if line.strip())
+        table = PlaytimeTable.load(args.table) if os.path.exists(args.table) else PlaytimeTable()
+        failed = table.ingest(SteamAPI(api_key), steamids, max_workers=args.workers)
+        table.save(args.table)
+        print(f"{len(table.users)} users, {len(table)} rows, {len(table.apps)} apps "
+              f"({len(failed)} users failed)")
+        return
+
+    table = PlaytimeTable.load(args.table)
+    if args.command == "top":
+        for appid, name, owners, minutes in table.top_apps(args.limit, args.by):
+            print(f"{appid}\t{owners}\t{minutes / 60:,.0f}h\t{name}")
+
+    elif args.command == "percentiles":
+        for appid, values in table.playtime_percentiles(args.appids).items():
+            print(f"{appid}\t" + "\t".join(f"{v / 60:,.1f}h" for v in values))
+
+    elif args.command == "coowned":
+        for appid, name, count in table.co_owned_with(args.appid, args.limit):
+            print(f"{appid}\t{count}\t{name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Steam Profile Change-Data Capture
+
+This script polls GetPlayerSummaries and GetPlayerBans for a watch list and
+writes only the profiles that changed since the previous poll to an NDJSON
+change stream, with field-level diffs.
+
+Each (Steam ID, kind) keeps a 64-bit fingerprint of its last-seen record
+in SQLite, next to the record itself. A poll reads the fingerprints of one
+chunk of IDs at a time and hashes each fresh record; the stored record is
+only read, and a row only written, when the fingerprints differ. Presence
+fields that change all the time (online state, current game, last logoff,
+days since the last ban) are left out of the fingerprint unless
+--include-presence is given.
+
+Change records:
+    {"time": 1700000000, "steamid": "7656...", "kind": "summary", "op": "insert", "record": {...}}
+    {"time": 1700000600, "steamid": "7656...", "kind": "summary", "op": "update",
+     "changes": {"personaname": ["old", "new"]}}
+    {"time": 1700001200, "steamid": "7656...", "kind": "bans", "op": "delete"}
+
+Usage:
+    export STEAM_API_KEY="your_api_key_here"
+    python steam_profile_cdc.py poll profiles.db --steamids-file ids.txt --out changes.ndjson
+    python steam_profile_cdc.py poll profiles.db --steamids-file ids.txt --interval 600 --kinds summary
+    python steam_profile_cdc.py show profiles.db 76561197960287930
+    python steam_profile_cdc.py stats profiles.db
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+from typing import Optional, Dict, Any, IO, Iterable, List, Tuple
+
+from steam_api_example import SteamAPI
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profile_state (
+    steamid INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    record TEXT NOT NULL,
+    changed_at INTEGER NOT NULL,
+    PRIMARY KEY (steamid, kind)
+) WITHOUT ROWID;
+"""
+KINDS = ("summary", "bans")
+# Fields that change between most polls without the profile changing
+VOLATILE_FIELDS = {
+    "summary": ("lastlogoff", "personastate", "personastateflags", "gameid", "gameextrainfo",
+                "gameserverip", "gameserversteamid", "lobbysteamid"),
+    "bans": ("DaysSinceLastBan",),
+}
+# Rows read per fingerprint lookup (SQLite allows 999 parameters by default)
+LOOKUP_CHUNK = 500
+
+
+def parse_steamid(steamid: Any) -> Optional[int]:
+    """Return a Steam ID as a positive 64-bit integer, or None if it is not one."""
+    steamid = str(steamid).strip()
+    number = int(steamid) if steamid.isascii() and steamid.isdigit() else 0
+    return number if 0 < number < 1 << 63 else None
+
+
+def fingerprint(text: str) -> int:
+    """Return a signed 64-bit hash of a canonical record, as SQLite stores it."""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(),
+                          "little", signed=True)
+
+
+def diff_fields(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, List[Any]]:
+    """
+    Compare two records field by field.
+
+    Args:
+        old: Previous record
+        new: Current record
+
+    Returns:
+        Field -> [old value, new value] for changed, added (old None) and
+        removed (new None) fields
+    """
+    return {field: [old.get(field), new.get(field)]
+            for field in sorted(old.keys() | new.keys()) if old.get(field) != new.get(field)}
+
+
+class ProfileCDC:
+    """Change-data capture for player summaries and bans, with state in SQLite."""
+
+    def __init__(self, api: Optional[SteamAPI], db_path: str, kinds: Iterable[str] = KINDS,
+                 include_presence: bool = False, emit_inserts: bool = True,
+                 max_workers: int = SteamAPI.DEFAULT_MAX_WORKERS):
+        """
+        Initialize the capture.
+
+        Args:
+            api: Steam API client (None when only reading the state)
+            db_path: SQLite state database path
+            kinds: "summary" and/or "bans"
+            include_presence: Also track the fields in VOLATILE_FIELDS
+            emit_inserts: Emit profiles seen for the first time (they are
+                stored either way)
+            max_workers: Maximum number of concurrent requests
+        """
+        self.api = api
+        self.kinds = tuple(kinds)
+        unknown = [kind for kind in self.kinds if kind not in KINDS]
+        if unknown:
+            raise ValueError(f"Unknown kinds: {', '.join(unknown)}")
+        self.ignored = {kind: () if include_presence else VOLATILE_FIELDS[kind] for kind in KINDS}
+        self.emit_inserts = emit_inserts
+        self.max_workers = max_workers
+        self.db = sqlite3.connect(db_path)
+        self.db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+    def _fetch(self, kind: str, steamids: List[str]):
+        """Fetch one kind of record for a chunk of Steam IDs."""
+        if kind == "summary":
+            return self.api.get_player_summaries_batch(steamids, max_workers=self.max_workers)
+        return self.api.get_player_bans_batch(steamids, max_workers=self.max_workers)
+
+    def _tracked(self, kind: str, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """Return the tracked fields of an entry and their canonical JSON."""
+        ignored = self.ignored[kind]
+        tracked = {field: value for field, value in entry.items() if field not in ignored}
+        return tracked, json.dumps(tracked, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+    def _known(self, kind: str, steamids: List[str]) -> Dict[int, int]:
+        """Load stored fingerprints for a chunk of normalized Steam IDs."""
+        numbers = [int(steamid) for steamid in steamids]
+        rows = self.db.execute(
+            f"SELECT steamid, fingerprint FROM profile_state WHERE kind = ? "
+            f"AND steamid IN ({', '.join('?' * len(numbers))})", [kind] + numbers)
+        return dict(rows)
+
+    def poll(self, steamids: Iterable[str], out: IO[str]) -> Dict[str, int]:
+        """
+        Run one poll and write the changes to a stream.
+
+        Args:
+            steamids: Watched Steam IDs
+            out: Text stream receiving one JSON change per line
+
+        Returns:
+            Counters for records fetched, unchanged, inserted, updated,
+            deleted and failed; IDs that are not valid Steam IDs count as
+            failed for every kind
+        """
+        valid: Dict[str, None] = {}
+        invalid = set()
+        for steamid in steamids:
+            steamid = str(steamid).strip()
+            if not steamid:
+                continue
+            number = parse_steamid(steamid)
+            if number is not None:
+                valid[str(number)] = None
+            else:
+                invalid.add(steamid)
+        ids = list(valid)
+        stats = {"watched": len(ids) + len(invalid), "fetched": 0, "unchanged": 0, "inserted": 0,
+                 "updated": 0, "deleted": 0, "failed": len(invalid) * len(self.kinds)}
+        for kind in self.kinds:
+            for start in range(0, len(ids), LOOKUP_CHUNK):
+                chunk = ids[start:start + LOOKUP_CHUNK]
+                batch = self._fetch(kind, chunk)
+                now = int(time.time())
+                known = self._known(kind, chunk)
+                upserts: List[Tuple[int, str, int, str, int]] = []
+                deletes: List[Tuple[int, str]] = []
+                for steamid in chunk:
+                    number = int(steamid)
+                    entry = batch.results.get(steamid)
+                    if entry is None:
+                        # Only a successful response that leaves the ID out means it is gone
+                        if batch.failed.get(steamid) == "not returned" and number in known:
+                            deletes.append((number, kind))
+                            self._emit(out, now, steamid, kind, "delete")
+                            stats["deleted"] += 1
+                        elif batch.failed.get(steamid) != "not returned":
+                            stats["failed"] += 1
+                        continue
+
+                    stats["fetched"] += 1
+                    tracked, text = self._tracked(kind, entry)
+                    new_fingerprint = fingerprint(text)
+                    old_fingerprint = known.get(number)
+                    if old_fingerprint == new_fingerprint:
+                        stats["unchanged"] += 1
+                        continue
+                    if old_fingerprint is None:
+                        if self.emit_inserts:
+                            self._emit(out, now, steamid, kind, "insert", record=tracked)
+                        stats["inserted"] += 1
+                    else:
+                        old_text = self.db.execute(
+                            "SELECT record FROM profile_state WHERE steamid = ? AND kind = ?",
+                            (number, kind)).fetchone()[0]
+                        self._emit(out, now, steamid, kind, "update",
+                                   changes=diff_fields(json.loads(old_text), tracked))
+                        stats["updated"] += 1
+                    upserts.append((number, kind, new_fingerprint, text, now))
+
+                if upserts or deletes:
+                    with self.db:
+                        self.db.executemany(
+                            "INSERT OR REPLACE INTO profile_state "
+                            "(steamid, kind, fingerprint, record, changed_at) VALUES (?, ?, ?, ?, ?)",
+                            upserts)
+                        self.db.executemany("DELETE FROM profile_state WHERE steamid = ? AND kind = ?",
+                                            deletes)
+        out.flush()
+        return stats
+
+    @staticmethod
+    def _emit(out: IO[str], now: int, steamid: str, kind: str, op: str, **fields: Any) -> None:
+        """Write one change record."""
+        change = {"time": now, "steamid": steamid, "kind": kind, "op": op}
+        change.update(fields)
+        out.write(json.dumps(change, ensure_ascii=False) + "\n")
+
+    def records(self, steamid: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Read the stored records of one Steam ID.
+
+        Args:
+            steamid: Steam ID
+
+        Returns:
+            Kind -> {"changed_at": timestamp, "record": last-seen tracked fields}
+
+        Raises:
+            ValueError: If steamid is not a valid Steam ID
+        """
+        number = parse_steamid(steamid)
+        if number is None:
+            raise ValueError(f"Invalid Steam ID: {steamid}")
+        rows = self.db.execute("SELECT kind, changed_at, record FROM profile_state WHERE steamid = ?",
+                               (number,))
+        return {kind: {"changed_at": changed_at, "record": json.loads(record)}
+                for kind, changed_at, record in rows}
+
+    def counts(self) -> Dict[str, int]:
+        """Return the number of stored profiles per kind."""
+        return dict(self.db.execute("SELECT kind, COUNT(*) FROM profile_state GROUP BY kind"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steam Profile Change-Data Capture")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    poll_parser = subparsers.add_parser("poll", help="Poll the watch list and write changes")
+    poll_parser.add_argument("db", help="SQLite state database path")
+    poll_parser.add_argument("--key", help="Steam API key (or set STEAM_API_KEY env var)")
+    poll_parser.add_argument("--steamids", help="Comma-separated Steam IDs")
+    poll_parser.add_argument("--steamids-file", help="File with one Steam ID per line")
+    poll_parser.add_argument("--kinds", default=",".join(KINDS), help="summary, bans or both")
+    poll_parser.add_argument("--out", default="-", help="NDJSON change stream to append to (- for stdout)")
+    poll_parser.add_argument("--include-presence", action="store_true",
+                             help="Also track online state, current game and similar fields")
+    poll_parser.add_argument("--no-initial", action="store_true",
+                             help="Do not emit profiles seen for the first time")
+    poll_parser.add_argument("--workers", type=int, default=SteamAPI.DEFAULT_MAX_WORKERS,
+                             help="Maximum concurrent requests")
+    poll_parser.add_argument("--interval", type=float,
+                             help="Repeat every N seconds instead of running once")
+
+    show_parser = subparsers.add_parser("show", help="Show the stored records of a Steam ID")
+    show_parser.add_argument("db", help="SQLite state database path")
+    show_parser.add_argument("steamid")
+
+    stats_parser = subparsers.add_parser("stats", help="Show stored profile counts")
+    stats_parser.add_argument("db", help="SQLite state database path")
+    args = parser.parse_args()
+
+    if args.command == "show" and parse_steamid(args.steamid) is None:
+        print(f"Error: invalid Steam ID: {args.steamid}")
+        sys.exit(1)
+    if args.command in ("show", "stats"):
+        cdc = ProfileCDC(None, args.db)
+        result = cdc.records(args.steamid) if args.command == "show" else cdc.counts()
+        cdc.close()
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return
+
+    api_key = args.key or os.environ.get("STEAM_API_KEY")
+    if not api_key:
+        print("Error: Steam API key is required.")
+        print("Get one at: https://steamcommunity.com/dev/apikey")
+        sys.exit(1)
+    steamids = [s for s in args.steamids.split(",") if s.strip()] if args.steamids else []
+    if args.steamids_file:
+        with open(args.steamids_file, encoding="utf-8") as f:
+            steamids.extend(line.strip() for line in f if line.strip())
+    if not steamids:
+        parser.error("no Steam IDs given (use --steamids or --steamids-file)")
+
+    try:
+        cdc = ProfileCDC(SteamAPI(api_key), args.db, kinds=[k for k in args.kinds.split(",") if k],
+                         include_presence=args.include_presence, emit_inserts=not args.no_initial,
+                         max_workers=args.workers)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    out = sys.stdout if args.out == "-" else open(args.out, "a", encoding="utf-8")
+    try:
+        while True:
+            stats = cdc.poll(steamids, out)
+            # The change stream may be stdout, so progress goes to stderr
+            print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {stats['watched']} watched, "
+                  f"{stats['unchanged']} unchanged, {stats['inserted']} new, {stats['updated']} "
+                  f"changed, {stats['deleted']} gone, {stats['failed']} failed", file=sys.stderr)
+            if not args.interval:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        cdc.close()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
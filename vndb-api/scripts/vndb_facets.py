@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+VNDB Facet Index
+
+Local faceted filtering over VN tags and character traits.
+
+VNs (with their tags, tag spoiler levels and tag ratings) and characters
+(with their traits) are bulk-fetched once into an index file. Queries use
+VNDB's own filter syntax and are answered locally, so they cost no API
+requests and no share of the server's execution-time budget.
+
+Each tag and trait keeps a sorted posting list of the entries it applies
+to; rare tags take a few bytes. A query turns the postings it needs into
+bitsets (Python ints, one bit per entry, cached per tag, spoiler level and
+minimum rating) and combines them with &, | and ~, which run in C over
+whole machine words. Facet counts are popcounts of the result ANDed with
+every tag, or, for small results, a pass over the tags of each match.
+
+Usage:
+    python vndb_facets.py build facets.idx
+    python vndb_facets.py build facets.idx --vn-filters '["olang", "=", "ja"]' --no-characters
+    python vndb_facets.py query facets.idx vn \\
+        '["and", ["tag", "=", "g7"], ["tag", "=", "g12"], ["tag", "!=", "g33"], ["rating", ">", 80]]'
+    python vndb_facets.py query facets.idx character \\
+        '["or", ["trait", "=", "i7"], ["trait", "=", "i12"]]' --facets 10
+    python vndb_facets.py info facets.idx
+
+Or through vndb_query.py:
+    python vndb_query.py facet_index facets.idx
+    python vndb_query.py facet facets.idx vn '["tag", "=", ["g7", 1, 2]]' rating 20 10
+"""
+
+import os
+import sys
+import json
+import time
+import array
+import heapq
+import struct
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Tuple
+
+from vndb_query import VNDBClient, iter_entries
+
+
+INDEX_MAGIC = b"GALFCT01"
+# magic, directory size
+INDEX_HEADER = struct.Struct("<8sQ")
+
+# entity -> tag-like filter name, ID prefix, entry field and fields to fetch
+COLLECTIONS = {
+    "vn": {"link": "tag", "prefix": "g", "field": "tags",
+           "fetch": "title,rating,votecount,length_minutes,released,"
+                    "tags.name,tags.rating,tags.spoiler,tags.lie"},
+    "character": {"link": "trait", "prefix": "i", "field": "traits",
+                  "fetch": "name,height,weight,age,"
+                           "traits.name,traits.group_name,traits.spoiler,traits.lie"},
+}
+NUMERIC_FIELDS = {
+    "vn": ("rating", "votecount", "length_minutes", "released"),
+    "character": ("height", "weight", "age"),
+}
+MAX_SPOILER = 2
+NAN = float("nan")
+
+if hasattr(int, "bit_count"):
+    _popcount = int.bit_count
+else:  # Python < 3.10
+    def _popcount(bits: int) -> int:
+        return bin(bits).count("1")
+
+
+def _date_number(value: Any) -> float:
+    """Turn a VNDB release date into YYYYMMDD, with unknown parts as 99 like VNDB does."""
+    text = time.strftime("%Y-%m-%d") if value == "today" else str(value)
+    parts = text.split("-")
+    if not all(part.isdigit() for part in parts) or len(parts) > 3:
+        return NAN  # "TBA", "unknown"
+    year, month, day = (int(part) for part in parts + ["99"] * (3 - len(parts)))
+    return float(year * 10000 + month * 100 + day)
+
+
+def _numeric_value(field: str, value: Any) -> float:
+    """Convert a field value to a float, NaN when unknown."""
+    if value is None:
+        return NAN
+    if field == "released":
+        return _date_number(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _format_value(field: str, value: float) -> Any:
+    """Convert a stored float back to the value VNDB would return."""
+    if value != value:
+        return None
+    if field == "released":
+        number = int(value)
+        parts = [f"{number // 10000:04d}", f"{number // 100 % 100:02d}", f"{number % 100:02d}"]
+        return "-".join(part for part in parts if part != "99")
+    return value if field == "rating" else int(value)
+
+
+def _bits_from_docs(docs: Iterable[int], size: int) -> int:
+    """Build a bitset with the given entry ordinals set."""
+    buf = bytearray((size + 7) // 8)
+    for doc in docs:
+        buf[doc >> 3] |= 1 << (doc & 7)
+    return int.from_bytes(buf, "little")
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Yield the ordinals set in a bitset, in increasing order."""
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for index, byte in enumerate(data):
+        if byte:
+            base = index << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+
+class FacetCollection:
+    """Tag or trait postings and numeric fields of one VNDB entity type."""
+
+    ARRAYS = (("doc_offsets", "I"), ("doc_keys", "I"), ("doc_spoiler", "B"), ("doc_rating", "f"),
+              ("key_offsets", "I"), ("post_docs", "I"), ("post_spoiler", "B"), ("post_rating", "f"))
+
+    def __init__(self, kind: str):
+        """
+        Create an empty collection.
+
+        Args:
+            kind: "vn" or "character"
+        """
+        self.kind = kind
+        self.link = COLLECTIONS[kind]["link"]
+        self.ids: List[str] = []
+        self.labels: List[str] = []
+        self.keys: List[str] = []
+        self.key_names: List[str] = []
+        self.numeric: Dict[str, array.array] = {name: array.array("d") for name in NUMERIC_FIELDS[kind]}
+        # Entry -> (key, spoiler, rating) and key -> (entry, spoiler, rating), in CSR form
+        self.doc_offsets = array.array("I", [0])
+        self.doc_keys = array.array("I")
+        self.doc_spoiler = array.array("B")
+        self.doc_rating = array.array("f")
+        self.key_offsets = array.array("I", [0])
+        self.post_docs = array.array("I")
+        self.post_spoiler = array.array("B")
+        self.post_rating = array.array("f")
+        self._key_index: Dict[str, int] = {}
+        self._bits: Dict[Tuple[Any, ...], int] = {}
+        self._sorted: Dict[str, Tuple[array.array, array.array]] = {}
+        # (max spoiler, min rating) levels whose key bitsets are all cached
+        self._warm: Set[Tuple[int, float]] = set()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def universe(self) -> int:
+        """Bitset of every entry."""
+        return (1 << len(self.ids)) - 1
+
+    def add(self, entry: Dict[str, Any]) -> None:
+        """
+        Add one API entry. Call finish() after the last one.
+
+        Tags and traits voted as lies are left out, as VNDB's own filters do.
+
+        Args:
+            entry: VN or character as returned by the API
+        """
+        self.ids.append(entry["id"])
+        self.labels.append(entry.get("title") or entry.get("name") or "")
+        for name, values in self.numeric.items():
+            values.append(_numeric_value(name, entry.get(name)))
+        for link in entry.get(COLLECTIONS[self.kind]["field"]) or []:
+            if link.get("lie"):
+                continue
+            key = self._key_index.get(link["id"])
+            if key is None:
+                key = self._key_index[link["id"]] = len(self.keys)
+                self.keys.append(link["id"])
+                group = link.get("group_name")
+                self.key_names.append(f"{group} / {link.get('name')}" if group else link.get("name") or "")
+            self.doc_keys.append(key)
+            self.doc_spoiler.append(min(int(link.get("spoiler") or 0), MAX_SPOILER))
+            self.doc_rating.append(float(link.get("rating") or 0))
+        self.doc_offsets.append(len(self.doc_keys))
+
+    def finish(self) -> None:
+        """Build the per-key postings from the per-entry links."""
+        counts = [0] * len(self.keys)
+        for key in self.doc_keys:
+            counts[key] += 1
+        offsets = array.array("I", [0])
+        for count in counts:
+            offsets.append(offsets[-1] + count)
+        total = len(self.doc_keys)
+        post_docs = array.array("I", bytes(4 * total))
+        post_spoiler = array.array("B", bytes(total))
+        post_rating = array.array("f", bytes(4 * total))
+        cursor = list(offsets[:-1])
+        # Entries are visited in order, so every posting list comes out sorted
+        for doc in range(len(self.ids)):
+            for i in range(self.doc_offsets[doc], self.doc_offsets[doc + 1]):
+                key = self.doc_keys[i]
+                position = cursor[key]
+                cursor[key] += 1
+                post_docs[position] = doc
+                post_spoiler[position] = self.doc_spoiler[i]
+                post_rating[position] = self.doc_rating[i]
+        self.key_offsets, self.post_docs = offsets, post_docs
+        self.post_spoiler, self.post_rating = post_spoiler, post_rating
+        self._bits.clear()
+        self._sorted.clear()
+        self._warm.clear()
+
+    def key_bits(self, key: int, max_spoiler: int = 0, min_rating: float = 0) -> int:
+        """
+        Get the entries having one tag or trait as a bitset.
+
+        Args:
+            key: Key ordinal
+            max_spoiler: Highest spoiler level to include (0-2)
+            min_rating: Lowest tag rating to include (0-3; traits have none)
+
+        Returns:
+            Bitset of entry ordinals
+        """
+        cache_key = (key, max_spoiler, min_rating)
+        bits = self._bits.get(cache_key)
+        if bits is None:
+            start, end = self.key_offsets[key], self.key_offsets[key + 1]
+            docs: Iterable[int] = self.post_docs[start:end]
+            if max_spoiler < MAX_SPOILER or min_rating > 0:
+                docs = [doc for doc, spoiler, rating in zip(docs, self.post_spoiler[start:end],
+                                                            self.post_rating[start:end])
+                        if spoiler <= max_spoiler and rating >= min_rating]
+            bits = self._bits[cache_key] = _bits_from_docs(docs, len(self.ids))
+        return bits
+
+    def _link_bits(self, value: Any) -> int:
+        """Bitset for a tag/trait filter value: "g7" or [id, max spoiler, min rating]."""
+        if isinstance(value, list):
+            if not 1 <= len(value) <= 3:
+                raise ValueError(f"Invalid {self.link} value: {json.dumps(value)}")
+            key_id, max_spoiler, min_rating = (value + [0, 0])[:3]
+        else:
+            key_id, max_spoiler, min_rating = value, 0, 0
+        key_id = str(key_id)
+        prefix = COLLECTIONS[self.kind]["prefix"]
+        if not key_id.startswith(prefix):
+            key_id = prefix + key_id
+        key = self._key_index.get(key_id)
+        if key is None:
+            return 0
+        return self.key_bits(key, int(max_spoiler), float(min_rating))
+
+    def _range_bits(self, name: str, op: str, value: Any) -> int:
+        """Bitset for a comparison on a numeric field; unknown values never match."""
+        if name not in self.numeric:
+            raise ValueError(f"Unknown {self.kind} filter: {name}")
+        target = _numeric_value(name, value)
+        if target != target:
+            raise ValueError(f"Invalid value for {name}: {json.dumps(value)}")
+        cache_key = (name, op, target)
+        bits = self._bits.get(cache_key)
+        if bits is not None:
+            return bits
+
+        ordered = self._sorted.get(name)
+        if ordered is None:
+            pairs = sorted((v, doc) for doc, v in enumerate(self.numeric[name]) if v == v)
+            ordered = self._sorted[name] = (array.array("d", (v for v, _ in pairs)),
+                                            array.array("I", (doc for _, doc in pairs)))
+        values, docs = ordered
+        if op == "!=":
+            bits = self._range_bits(name, ">", value) | self._range_bits(name, "<", value)
+        else:
+            start, end = {
+                "=": (bisect_left(values, target), bisect_right(values, target)),
+                ">": (bisect_right(values, target), len(values)),
+                ">=": (bisect_left(values, target), len(values)),
+                "<": (0, bisect_left(values, target)),
+                "<=": (0, bisect_right(values, target)),
+            }[op]
+            bits = _bits_from_docs(docs[start:end], len(self.ids))
+        self._bits[cache_key] = bits
+        return bits
+
+    def evaluate(self, filters: Optional[List[Any]]) -> int:
+        """
+        Evaluate a VNDB filter locally.
+
+        Supports "and"/"or" with any nesting, "tag"/"trait" with "=" and "!="
+        (value "g7" or ["g7", max spoiler, min rating], defaults 0 and 0 as in
+        VNDB), and numeric comparisons on the fields in NUMERIC_FIELDS.
+        Unlike VNDB, a tag filter does not match the tag's child tags.
+
+        Args:
+            filters: Filter array, or None for every entry
+
+        Returns:
+            Bitset of matching entry ordinals
+
+        Raises:
+            ValueError: On a filter the index cannot answer
+        """
+        if not filters:
+            return self.universe
+        if filters[0] in ("and", "or"):
+            if filters[0] == "or":
+                bits = 0
+                for child in filters[1:]:
+                    bits |= self.evaluate(child)
+                return bits
+            bits = self.universe
+            for child in filters[1:]:
+                bits &= self.evaluate(child)
+                if not bits:
+                    break
+            return bits
+        if len(filters) != 3:
+            raise ValueError(f"Invalid filter: {json.dumps(filters, ensure_ascii=False)}")
+
+        name, op, value = filters
+        if op not in ("=", "!=", ">", ">=", "<", "<="):
+            raise ValueError(f"Unknown operator: {op}")
+        if name == self.link:
+            if op not in ("=", "!="):
+                raise ValueError(f"{name} only supports = and !=")
+            bits = self._link_bits(value)
+            return bits if op == "=" else self.universe & ~bits
+        return self._range_bits(name, op, value)
+
+    def entries(self, bits: int, limit: int = 10, sort: str = "id") -> List[Dict[str, Any]]:
+        """
+        Get matching entries with their numeric fields.
+
+        Args:
+            bits: Bitset from evaluate()
+            limit: Maximum number of entries
+            sort: "id", or a numeric field to sort by in descending order
+
+        Returns:
+            Entry dictionaries
+        """
+        if sort == "id":
+            docs: List[int] = []
+            for doc in iter_bits(bits):
+                if len(docs) >= limit:
+                    break
+                docs.append(doc)
+        elif sort in self.numeric:
+            values = self.numeric[sort]
+            docs = heapq.nlargest(limit, iter_bits(bits),
+                                  key=lambda doc: values[doc] if values[doc] == values[doc] else float("-inf"))
+        else:
+            raise ValueError(f"Cannot sort {self.kind} by {sort}")
+
+        label = "title" if self.kind == "vn" else "name"
+        results = []
+        for doc in docs:
+            entry: Dict[str, Any] = {"id": self.ids[doc], label: self.labels[doc]}
+            for name, values in self.numeric.items():
+                entry[name] = _format_value(name, values[doc])
+            results.append(entry)
+        return results
+
+    def facet_counts(self, bits: int, top: int = 10, max_spoiler: int = 0,
+                     min_rating: float = 0) -> List[Dict[str, Any]]:
+        """
+        Count the tags or traits among matching entries.
+
+        Args:
+            bits: Bitset from evaluate()
+            top: Number of most frequent tags/traits to return
+            max_spoiler: Highest spoiler level to count
+            min_rating: Lowest tag rating to count
+
+        Returns:
+            Dictionaries with id, name and count, most frequent first
+        """
+        counts: Dict[int, int] = Counter()
+        matches = _popcount(bits)
+        # Walking the links of each match costs about as much per link as one
+        # AND over a key's bitset costs per 8 keys, and building the bitsets
+        # in the first place costs about a third per posting; pick the cheaper side
+        per_key_cost = 8 * len(self.keys)
+        if (max_spoiler, min_rating) not in self._warm:
+            per_key_cost += len(self.post_docs) // 3
+        if matches * len(self.doc_keys) < per_key_cost * len(self.ids):
+            for doc in iter_bits(bits):
+                for i in range(self.doc_offsets[doc], self.doc_offsets[doc + 1]):
+                    if self.doc_spoiler[i] <= max_spoiler and self.doc_rating[i] >= min_rating:
+                        counts[self.doc_keys[i]] += 1
+        elif matches:
+            for key in range(len(self.keys)):
+                count = _popcount(bits & self.key_bits(key, max_spoiler, min_rating))
+                if count:
+                    counts[key] = count
+            self._warm.add((max_spoiler, min_rating))
+        best = heapq.nlargest(top, counts.items(), key=lambda item: (item[1], -item[0]))
+        return [{"id": self.keys[key], "name": self.key_names[key], "count": count}
+                for key, count in best]
+
+    def directory(self) -> Dict[str, Any]:
+        """Describe the collection for the index file header."""
+        arrays = [(f"numeric.{name}", "d", len(values)) for name, values in self.numeric.items()]
+        arrays += [(name, typecode, len(getattr(self, name))) for name, typecode in self.ARRAYS]
+        return {"ids": self.ids, "labels": self.labels, "keys": self.keys,
+                "key_names": self.key_names, "arrays": arrays}
+
+    def arrays(self) -> Iterator[array.array]:
+        """Yield the arrays in directory() order."""
+        yield from self.numeric.values()
+        for name, _ in self.ARRAYS:
+            yield getattr(self, name)
+
+    @classmethod
+    def from_directory(cls, kind: str, directory: Dict[str, Any], data: memoryview,
+                       offset: int) -> Tuple["FacetCollection", int]:
+        """
+        Restore a collection from the index file.
+
+        Args:
+            kind: "vn" or "character"
+            directory: Output of directory()
+            data: Array section of the file
+            offset: Where this collection's arrays start
+
+        Returns:
+            Collection and the offset after its arrays
+        """
+        collection = cls(kind)
+        collection.ids = directory["ids"]
+        collection.labels = directory["labels"]
+        collection.keys = directory["keys"]
+        collection.key_names = directory["key_names"]
+        collection._key_index = {key_id: i for i, key_id in enumerate(collection.keys)}
+        for name, typecode, length in directory["arrays"]:
+            values = array.array(typecode)
+            size = values.itemsize * length
+            values.frombytes(data[offset:offset + size])
+            offset += size
+            if name.startswith("numeric."):
+                collection.numeric[name[len("numeric."):]] = values
+            else:
+                setattr(collection, name, values)
+        return collection, offset
+
+
+class FacetIndex:
+    """Facet collections for VNs and characters, stored in one file."""
+
+    def __init__(self):
+        """Create an empty index."""
+        self.collections: Dict[str, FacetCollection] = {}
+        self.meta: Dict[str, Any] = {}
+
+    def collection(self, kind: str) -> FacetCollection:
+        """Return the collection for "vn" or "character"."""
+        collection = self.collections.get(kind)
+        if collection is None:
+            raise ValueError(f"The index has no {kind} data (available: {', '.join(self.collections)})")
+        return collection
+
+    def query(self, kind: str, filters: Optional[List[Any]], results: int = 10, sort: str = "id",
+              facets: int = 0, max_spoiler: int = 0, min_rating: float = 0) -> Dict[str, Any]:
+        """
+        Answer a filter query locally.
+
+        Args:
+            kind: "vn" or "character"
+            filters: VNDB filter array (see FacetCollection.evaluate)
+            results: Maximum number of entries to return
+            sort: "id", or a numeric field to sort by in descending order
+            facets: Number of tag/trait counts to return (0 for none)
+            max_spoiler: Highest spoiler level for the facet counts
+            min_rating: Lowest tag rating for the facet counts
+
+        Returns:
+            {"results": [...], "count": N, "facets": [...]} like a VNDB response
+        """
+        collection = self.collection(kind)
+        bits = collection.evaluate(filters)
+        response: Dict[str, Any] = {"results": collection.entries(bits, results, sort),
+                                    "count": _popcount(bits)}
+        if facets:
+            response["facets"] = collection.facet_counts(bits, facets, max_spoiler, min_rating)
+        return response
+
+    def save(self, path: str) -> None:
+        """
+        Write the index atomically.
+
+        Args:
+            path: Index file path
+        """
+        directory = json.dumps({"meta": self.meta,
+                                "collections": {kind: c.directory() for kind, c in self.collections.items()}},
+                               ensure_ascii=False).encode("utf-8")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, len(directory)))
+            f.write(directory)
+            for collection in self.collections.values():
+                for values in collection.arrays():
+                    values.tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FacetIndex":
+        """
+        Read an index written by save().
+
+        Args:
+            path: Index file path
+
+        Returns:
+            Loaded index
+        """
+        with open(path, "rb") as f:
+            magic, directory_size = INDEX_HEADER.unpack(f.read(INDEX_HEADER.size))
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"Not a facet index: {path}")
+            directory = json.loads(f.read(directory_size).decode("utf-8"))
+            data = memoryview(f.read())
+        index = cls()
+        index.meta = directory["meta"]
+        offset = 0
+        for kind, entry in directory["collections"].items():
+            index.collections[kind], offset = FacetCollection.from_directory(kind, entry, data, offset)
+        return index
+
+
+def build_index(client: VNDBClient, vn_filters: Optional[List[Any]] = None,
+                character_filters: Optional[List[Any]] = None,
+                characters: bool = True) -> FacetIndex:
+    """
+    Bulk-fetch VNs and characters into a new index.
+
+    This pages through the whole endpoint (100 entries per request), so a
+    full build takes many requests; narrow it with filters where possible.
+
+    Args:
+        client: VNDB API client instance
+        vn_filters: Optional filter selecting the VNs to index
+        character_filters: Optional filter selecting the characters to index
+        characters: Also index characters and their traits
+
+    Returns:
+        Built index
+    """
+    index = FacetIndex()
+    index.meta = {"built": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                  "filters": {"vn": vn_filters, "character": character_filters}}
+    kinds = [("vn", vn_filters)] + ([("character", character_filters)] if characters else [])
+    for kind, filters in kinds:
+        collection = FacetCollection(kind)
+        for entry in iter_entries(client, kind, COLLECTIONS[kind]["fetch"], filters):
+            collection.add(entry)
+        collection.finish()
+        index.collections[kind] = collection
+    return index
+
+
+def _parse_filters(text: Optional[str]) -> Optional[List[Any]]:
+    """Parse a filter argument given as JSON."""
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        print(f"Error: Invalid filter JSON: {text}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VNDB Facet Index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Bulk-fetch VNs and characters into an index")
+    build_parser.add_argument("index", help="Index file to write")
+    build_parser.add_argument("--vn-filters", help="JSON filter selecting the VNs to index")
+    build_parser.add_argument("--character-filters", help="JSON filter selecting the characters to index")
+    build_parser.add_argument("--no-characters", action="store_true", help="Index VNs only")
+
+    query_parser = subparsers.add_parser("query", help="Answer a filter query from the index")
+    query_parser.add_argument("index", help="Index file")
+    query_parser.add_argument("endpoint", choices=list(COLLECTIONS))
+    query_parser.add_argument("filters", help="VNDB filter JSON")
+    query_parser.add_argument("--sort", default="id", help="id, or a numeric field (descending)")
+    query_parser.add_argument("--results", type=int, default=10)
+    query_parser.add_argument("--facets", type=int, default=0, help="Number of tag/trait counts to show")
+    query_parser.add_argument("--spoiler", type=int, default=0, choices=[0, 1, 2],
+                              help="Highest spoiler level in facet counts")
+    query_parser.add_argument("--min-rating", type=float, default=0, help="Lowest tag rating in facet counts")
+
+    info_parser = subparsers.add_parser("info", help="Show index contents")
+    info_parser.add_argument("index", help="Index file")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.monotonic()
+        index = build_index(VNDBClient(), _parse_filters(args.vn_filters),
+                            _parse_filters(args.character_filters), not args.no_characters)
+        index.save(args.index)
+        for kind, collection in index.collections.items():
+            print(f"{kind}: {len(collection)} entries, {len(collection.keys)} "
+                  f"{collection.link}s, {len(collection.post_docs)} links")
+        print(f"Index written to {args.index} in {time.monotonic() - started:.1f}s")
+        return
+
+    try:
+        index = FacetIndex.load(args.index)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    if args.command == "info":
+        print(json.dumps(index.meta, indent=2, ensure_ascii=False))
+        for kind, collection in index.collections.items():
+            print(f"{kind}: {len(collection)} entries, {len(collection.keys)} "
+                  f"{collection.link}s, {len(collection.post_docs)} links")
+        return
+
+    try:
+        response = index.query(args.endpoint, _parse_filters(args.filters), args.results, args.sort,
+                               args.facets, args.spoiler, args.min_rating)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    print(json.dumps(response, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
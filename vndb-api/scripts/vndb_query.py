@@ -18,6 +18,22 @@ Quick Commands:
 Advanced Usage:
     python vndb_query.py query <endpoint> <filters> <fields> [sort] [results]
 
+Random Samples (uniform, about one request per 100 entries):
+    python vndb_query.py sample <endpoint> <count> [fields] [seed]
+
+Local Facet Queries (no API requests, see vndb_facets.py):
+    python vndb_query.py facet_index <index> [vn_filters]  # Bulk-fetch tags and traits once
+    python vndb_query.py facet <index> <endpoint> <filters> [sort] [results] [facets]
+
+Tracing:
+    python vndb_query.py --profile vn "Steins;Gate"       # Print request timings
+    python vndb_query.py --trace-out trace.prom stats     # Export timings
+
+Sharing the rate limit between crawls and lookups (see vndb_scheduler.py):
+    scheduler = RequestScheduler()
+    crawler = VNDBClient(scheduler=scheduler, priority="bulk")
+    frontend = VNDBClient(scheduler=scheduler, priority="interactive")
+
 Examples:
     python vndb_query.py character "美雪"
     python vndb_query.py vn "Steins;Gate"
@@ -27,18 +43,25 @@ Examples:
     python vndb_query.py user "yorhel"
 """
 
+import os
 import sys
 import json
-import urllib.request
-import urllib.error
-from typing import Optional, Dict, Any, List
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, Set, Tuple
 from dataclasses import dataclass
 from urllib.parse import urlencode
 
+if TYPE_CHECKING:
+    from request_trace import Span, Tracer
+    from vndb_scheduler import RequestScheduler
+
 
 # API Configuration
 API_BASE_URL = "https://api.vndb.org/kana"
 DEFAULT_TIMEOUT = 30  # seconds
+# Request tracing lives in the sibling gal-trace skill (see load_tracer)
+TRACE_SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir,
+                             "gal-trace", "scripts")
 
 
 # Color codes for terminal output
@@ -76,32 +99,58 @@ class APIResponse:
 class VNDBClient:
     """HTTP client for VNDB API v2 (Kana)."""
     
-    def __init__(self, base_url: str = API_BASE_URL, timeout: int = DEFAULT_TIMEOUT):
+    # Attempts of a request answered with 429 when a scheduler is set
+    THROTTLE_RETRIES = 3
+    
+    def __init__(self, base_url: str = API_BASE_URL, timeout: int = DEFAULT_TIMEOUT,
+                 tracer: Optional["Tracer"] = None, scheduler: Optional["RequestScheduler"] = None,
+                 priority: str = "normal"):
         """
         Initialize the VNDB API client.
         
         Args:
             base_url: The base URL for the VNDB API
             timeout: Request timeout in seconds
+            tracer: Optional request tracer (see gal-trace/scripts/request_trace.py)
+            scheduler: Optional priority scheduler for the rate limit, which
+                may be shared by several clients (see vndb_scheduler.py)
+            priority: Default priority class: "interactive", "normal" or "bulk"
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
+        self.tracer = tracer
+        self.scheduler = scheduler
+        self.priority = priority
+    
+    def _acquire(self, priority: str, span: Optional["Span"] = None):
+        """Wait for the scheduler to admit a request (a null context without one)."""
+        if self.scheduler is None:
+            return nullcontext()
+        ticket = self.scheduler.acquire(priority)
+        if span is not None:
+            span.mark("wait")
+        return ticket
     
     def _make_request(
         self, 
         endpoint: str, 
         method: str = "GET", 
         data: Optional[Dict[str, Any]] = None,
-        params: Optional[Dict[str, str]] = None
+        params: Optional[Dict[str, str]] = None,
+        priority: Optional[str] = None
     ) -> APIResponse:
         """
         Make an HTTP request to the API.
         
+        With a scheduler, the request waits for admission in its priority
+        class, and a 429 is retried after the pause it causes.
+        
         Args:
             endpoint: API endpoint path
             method: HTTP method (GET or POST)
             data: JSON payload for POST requests
             params: Query parameters for GET requests
+            priority: Priority class (default: the client's)
             
         Returns:
             APIResponse containing parsed JSON data and status code
@@ -109,6 +158,11 @@ class VNDBClient:
         Raises:
             SystemExit: On network or API errors
         """
+        # urllib.request costs ~30 ms to import; only pay for it when a request is made
+        import time
+        import urllib.request
+        import urllib.error
+
         # Build URL with query parameters for GET requests
         url = f"{self.base_url}/{endpoint}"
         if params:
@@ -132,30 +186,320 @@ class VNDBClient:
             method=method
         )
         
-        try:
-            with urllib.request.urlopen(request, timeout=self.timeout) as response:
-                response_data = json.loads(response.read().decode('utf-8'))
-                return APIResponse(data=response_data, status_code=response.getcode())
-        
-        except urllib.error.HTTPError as e:
-            error(f"HTTP {e.code}: {e.reason}")
-        except urllib.error.URLError as e:
-            error(f"Network error: {e.reason}")
-        except json.JSONDecodeError as e:
-            error(f"Failed to parse JSON response: {e}")
-        except TimeoutError:
-            error(f"Request timed out after {self.timeout} seconds")
+        for attempt in range(self.THROTTLE_RETRIES + 1):
+            span_context = (self.tracer.start_span("vndb", method, f"/{endpoint}")
+                            if self.tracer is not None else nullcontext())
+            with span_context as span, self._acquire(priority or self.priority, span) as ticket:
+                sent = time.monotonic()
+                try:
+                    with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                        if ticket is not None:
+                            ticket.report(response.getcode(), time.monotonic() - sent)
+                        if span is not None:
+                            span.mark("server")
+                        body = response.read()
+                        if span is not None:
+                            span.mark("transfer")
+                            span.set(status=response.getcode(), bytes_in=len(encoded_data or b""),
+                                     bytes_out=len(body))
+                        response_data = json.loads(body.decode('utf-8'))
+                        if span is not None:
+                            span.mark("decode")
+                        return APIResponse(data=response_data, status_code=response.getcode())
+                
+                except urllib.error.HTTPError as e:
+                    if span is not None:
+                        span.set(status=e.code)
+                    if ticket is not None:
+                        retry_after = e.headers.get("Retry-After", "")
+                        ticket.report(e.code, time.monotonic() - sent,
+                                      float(retry_after) if retry_after.isdigit() else None)
+                        if e.code == 429 and attempt < self.THROTTLE_RETRIES:
+                            continue
+                    error(f"HTTP {e.code}: {e.reason}")
+                except urllib.error.URLError as e:
+                    error(f"Network error: {e.reason}")
+                except json.JSONDecodeError as e:
+                    error(f"Failed to parse JSON response: {e}")
+                except TimeoutError:
+                    error(f"Request timed out after {self.timeout} seconds")
         
         # This line should never be reached due to error() calls above
         return APIResponse(data={}, status_code=0)
     
-    def post(self, endpoint: str, data: Dict[str, Any]) -> APIResponse:
+    def post(self, endpoint: str, data: Dict[str, Any], priority: Optional[str] = None) -> APIResponse:
         """Send a POST request to the API."""
-        return self._make_request(endpoint, method="POST", data=data)
+        return self._make_request(endpoint, method="POST", data=data, priority=priority)
     
-    def get(self, endpoint: str, params: Optional[Dict[str, str]] = None) -> APIResponse:
+    def get(self, endpoint: str, params: Optional[Dict[str, str]] = None,
+            priority: Optional[str] = None) -> APIResponse:
         """Send a GET request to the API."""
-        return self._make_request(endpoint, method="GET", params=params)
+        return self._make_request(endpoint, method="GET", params=params, priority=priority)
+
+
+def iter_entries(
+    client: VNDBClient,
+    endpoint: str,
+    fields: str,
+    filters: Optional[List[Any]] = None,
+    page_size: int = 100
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over every entry matching a filter, paginating by ID.
+    
+    Args:
+        client: VNDB API client instance
+        endpoint: API endpoint name (e.g., "vn", "release")
+        fields: Comma-separated list of fields to return
+        filters: Optional filter array
+        page_size: Results per request (max 100)
+        
+    Yields:
+        Entry dictionaries in ID order
+    """
+    last_id = None
+    while True:
+        page_filter = filters
+        if last_id is not None:
+            id_filter = ["id", ">", last_id]
+            page_filter = ["and", filters, id_filter] if filters else id_filter
+        payload = {"fields": fields, "sort": "id", "results": page_size}
+        if page_filter:
+            payload["filters"] = page_filter
+        
+        response = client.post(endpoint, payload)
+        results = response.data.get("results", [])
+        yield from results
+        if not response.data.get("more") or not results:
+            break
+        last_id = results[-1]["id"]
+
+
+# ID prefix and /stats key per sampleable endpoint
+SAMPLE_ENDPOINTS = {
+    "vn": ("v", "vn"),
+    "character": ("c", "chars"),
+    "release": ("r", "releases"),
+    "producer": ("p", "producers"),
+    "staff": ("s", "staff"),
+    "tag": ("g", "tags"),
+    "trait": ("i", "traits"),
+}
+ID_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "vndb_query", "max_ids.json")
+ID_CACHE_TTL = 86400  # seconds
+PAGE_SIZE = 100
+# Use one ">=" page instead of "or" filters when at least this many
+# candidates are expected inside the page
+PAGE_MIN_CANDIDATES = 20
+
+
+@dataclass
+class SampleResult:
+    """Entries drawn by sample_entries, with the cost of drawing them."""
+    entries: List[Dict[str, Any]]
+    requests: int
+    candidates: int
+
+
+def get_id_range(
+    client: VNDBClient,
+    endpoint: str,
+    cache_path: Optional[str] = ID_CACHE_PATH,
+    max_age: float = ID_CACHE_TTL
+) -> Dict[str, Any]:
+    """
+    Get the highest ID and entry count of an endpoint, cached on disk.
+    
+    Args:
+        client: VNDB API client instance
+        endpoint: Endpoint in SAMPLE_ENDPOINTS
+        cache_path: JSON cache file (None to always ask the API)
+        max_age: Seconds a cached value stays valid
+        
+    Returns:
+        {"max_id": int, "count": int, "checked": timestamp, "requests": API requests made}
+    """
+    import time
+    
+    cache: Dict[str, Any] = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            cache = {}
+    entry = cache.get(endpoint)
+    if entry is not None and time.time() - entry["checked"] < max_age:
+        return dict(entry, requests=0)
+    
+    prefix, stats_key = SAMPLE_ENDPOINTS[endpoint]
+    response = client.post(endpoint, {"fields": "id", "sort": "id", "reverse": True, "results": 1})
+    results = response.data.get("results", [])
+    max_id = int(results[0]["id"][len(prefix):]) if results else 0
+    count = client.get("stats").data.get(stats_key) or max_id
+    entry = {"max_id": max_id, "count": count, "checked": time.time()}
+    
+    if cache_path:
+        cache[endpoint] = entry
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            warn(f"Could not cache ID range: {e}")
+    return dict(entry, requests=2)
+
+
+def _resolve_candidates(
+    client: VNDBClient,
+    endpoint: str,
+    fields: str,
+    candidates: List[int],
+    max_id: int,
+    density: float
+) -> Tuple[Dict[int, Optional[Dict[str, Any]]], int]:
+    """
+    Look up which candidate IDs exist, in as few requests as possible.
+    
+    Runs of candidates close enough together are read with one page sorted
+    by ID starting at the first of them. A page of 100 entries covers about
+    100 / density IDs, and every candidate in that range either comes back
+    or does not exist. Remaining candidates are looked up 100 at a time
+    with "or" filters.
+    
+    Args:
+        client: VNDB API client instance
+        endpoint: Endpoint in SAMPLE_ENDPOINTS
+        fields: Fields to return for each entry
+        candidates: Numeric IDs to look up
+        max_id: Highest ID of the endpoint
+        density: Estimated share of IDs in use (0-1)
+        
+    Returns:
+        (numeric ID -> entry or None for IDs that do not exist, requests made).
+        IDs past the end of a page are left out; every page resolves at
+        least its first candidate.
+    """
+    from bisect import bisect_left
+    
+    prefix = SAMPLE_ENDPOINTS[endpoint][0]
+    resolved: Dict[int, Optional[Dict[str, Any]]] = {}
+    ordered = sorted(candidates)
+    span = int(PAGE_SIZE / density)
+    singles: List[int] = []
+    requests = 0
+    
+    i = 0
+    while i < len(ordered):
+        j = bisect_left(ordered, ordered[i] + span, i)
+        if j - i < PAGE_MIN_CANDIDATES:
+            singles.append(ordered[i])
+            i += 1
+            continue
+        response = client.post(endpoint, {"fields": fields, "sort": "id", "results": PAGE_SIZE,
+                                          "filters": ["id", ">=", f"{prefix}{ordered[i]}"]})
+        requests += 1
+        page = {int(entry["id"][len(prefix):]): entry for entry in response.data.get("results", [])}
+        covered_to = max(page) if response.data.get("more") and page else max_id
+        while i < len(ordered) and ordered[i] <= covered_to:
+            resolved[ordered[i]] = page.get(ordered[i])
+            i += 1
+    
+    for start in range(0, len(singles), PAGE_SIZE):
+        batch = singles[start:start + PAGE_SIZE]
+        predicates = [["id", "=", f"{prefix}{number}"] for number in batch]
+        response = client.post(endpoint, {"fields": fields, "results": PAGE_SIZE,
+                                          "filters": ["or"] + predicates if len(batch) > 1 else predicates[0]})
+        requests += 1
+        found = {int(entry["id"][len(prefix):]): entry for entry in response.data.get("results", [])}
+        for number in batch:
+            resolved[number] = found.get(number)
+    return resolved, requests
+
+
+def _draw_ids(rng: Any, max_id: int, tried: Set[int], wanted: int) -> List[int]:
+    """Draw up to wanted distinct IDs from 1..max_id that are not in tried, and add them to it."""
+    wanted = min(wanted, max_id - len(tried))
+    if len(tried) + wanted > max_id // 2:
+        # Rejecting repeats gets slow once most IDs are taken
+        draws = rng.sample([number for number in range(1, max_id + 1) if number not in tried], wanted)
+    else:
+        draws = []
+        while len(draws) < wanted:
+            number = rng.randint(1, max_id)
+            if number not in tried:
+                tried.add(number)
+                draws.append(number)
+    tried.update(draws)
+    return draws
+
+
+def sample_entries(
+    client: VNDBClient,
+    endpoint: str,
+    count: int,
+    fields: str = "id",
+    seed: Optional[int] = None,
+    cache_path: Optional[str] = ID_CACHE_PATH
+) -> SampleResult:
+    """
+    Draw distinct entries uniformly at random, in batched requests.
+    
+    IDs are drawn uniformly from 1..highest ID without repeats, and IDs
+    that turn out not to exist (deleted or merged entries) are rejected and
+    replaced by new draws. Every existing entry is therefore equally likely,
+    unlike picking a random ID and taking the next entry with ">=", which
+    favours entries after gaps. Existence is checked for many draws per
+    request (see _resolve_candidates), so a sample costs roughly
+    count / 100 requests instead of count.
+    
+    Entries created after the cached highest ID was read cannot be drawn
+    until the cache expires (see get_id_range).
+    
+    Args:
+        client: VNDB API client instance
+        endpoint: Endpoint in SAMPLE_ENDPOINTS
+        count: Number of entries to draw
+        fields: Fields to return for each entry
+        seed: Random seed, for reproducible samples
+        cache_path: Cache file for the highest ID (None to disable)
+        
+    Returns:
+        SampleResult with entries in random order
+    """
+    import random
+    
+    if endpoint not in SAMPLE_ENDPOINTS:
+        raise ValueError(f"Cannot sample {endpoint}; use one of: {', '.join(SAMPLE_ENDPOINTS)}")
+    rng = random.Random(seed)
+    id_range = get_id_range(client, endpoint, cache_path)
+    max_id = id_range["max_id"]
+    density = min(1.0, max(0.01, id_range["count"] / max_id)) if max_id else 1.0
+    requests = id_range["requests"]
+    
+    tried: Set[int] = set()
+    accepted: List[Dict[str, Any]] = []
+    candidates = 0
+    while len(accepted) < count and len(tried) < max_id:
+        # Over-draw a little so most samples take a single round
+        draws = _draw_ids(rng, max_id, tried, int((count - len(accepted)) / density * 1.1) + 1)
+        candidates += len(draws)
+        resolved: Dict[int, Optional[Dict[str, Any]]] = {}
+        while len(resolved) < len(draws):
+            found, made = _resolve_candidates(client, endpoint, fields,
+                                              [number for number in draws if number not in resolved],
+                                              max_id, density)
+            resolved.update(found)
+            requests += made
+        
+        # Keep draw order, so truncating to count keeps the sample uniform
+        hits = [resolved[number] for number in draws if resolved[number] is not None]
+        density = max(0.01, len(hits) / len(draws)) if hits else max(0.01, density / 2)
+        accepted.extend(hits)
+    
+    return SampleResult(entries=accepted[:count], requests=requests, candidates=candidates)
 
 
 def format_json(data: Dict[str, Any]) -> str:
@@ -320,6 +664,29 @@ def get_schema(client: VNDBClient) -> None:
     print(format_json(response.data))
 
 
+def parse_filters(filters: str) -> Any:
+    """
+    Parse a filter argument.
+    
+    Args:
+        filters: Filter specification (JSON string or key:value)
+        
+    Returns:
+        Filter array
+    """
+    if "[" in filters:
+        # Already in JSON format
+        try:
+            return json.loads(filters)
+        except json.JSONDecodeError:
+            error(f"Invalid filter JSON: {filters}")
+    # Simple key:value format
+    if ":" not in filters:
+        error(f"Invalid filter format. Use 'key:value' or JSON array")
+    key, val = filters.split(":", 1)
+    return [key.strip(), "=", val.strip()]
+
+
 def query_endpoint(
     client: VNDBClient,
     endpoint: str,
@@ -339,21 +706,7 @@ def query_endpoint(
         sort: Field to sort by
         results: Maximum number of results
     """
-    # Parse filter string into proper format
-    if "[" in filters:
-        # Already in JSON format
-        try:
-            filter_json = json.loads(filters)
-        except json.JSONDecodeError:
-            error(f"Invalid filter JSON: {filters}")
-            return
-    else:
-        # Simple key:value format
-        if ":" not in filters:
-            error(f"Invalid filter format. Use 'key:value' or JSON array")
-            return
-        key, val = filters.split(":", 1)
-        filter_json = [key.strip(), "=", val.strip()]
+    filter_json = parse_filters(filters)
     
     payload = {
         "filters": filter_json,
@@ -369,6 +722,85 @@ def query_endpoint(
     print(format_json(response.data))
 
 
+def sample_command(
+    client: VNDBClient,
+    endpoint: str,
+    count: int,
+    fields: str = "title",
+    seed: Optional[int] = None
+) -> None:
+    """
+    Print uniformly random entries of an endpoint.
+    
+    Args:
+        client: VNDB API client instance
+        endpoint: Endpoint in SAMPLE_ENDPOINTS
+        count: Number of entries
+        fields: Comma-separated list of fields to return
+        seed: Random seed, for reproducible samples
+    """
+    print(f"Sampling {count} random {endpoint} entries...")
+    try:
+        result = sample_entries(client, endpoint, count, fields, seed)
+    except ValueError as e:
+        error(str(e))
+        return
+    print(format_json({"results": result.entries, "requests": result.requests,
+                       "candidates": result.candidates}))
+
+
+def build_facet_index(
+    client: VNDBClient,
+    index_path: str,
+    vn_filters: Optional[str] = None
+) -> None:
+    """
+    Bulk-fetch VN tags and character traits into a local facet index.
+    
+    Args:
+        client: VNDB API client instance
+        index_path: Index file to write
+        vn_filters: Optional filter selecting the VNs to index
+    """
+    from vndb_facets import build_index
+    
+    print(f"Building facet index: {index_path}...")
+    index = build_index(client, parse_filters(vn_filters) if vn_filters else None)
+    index.save(index_path)
+    counts = ", ".join(f"{len(c)} {kind}s" for kind, c in index.collections.items())
+    success(f"Indexed {counts}")
+
+
+def facet_query(
+    index_path: str,
+    endpoint: str,
+    filters: str,
+    sort: str = "id",
+    results: int = 10,
+    facets: int = 10
+) -> None:
+    """
+    Answer a filter query from a local facet index, without API requests.
+    
+    Args:
+        index_path: Index file written by facet_index
+        endpoint: "vn" or "character"
+        filters: Filter specification (JSON string or key:value)
+        sort: "id", or a numeric field to sort by in descending order
+        results: Maximum number of results
+        facets: Number of tag/trait counts to include
+    """
+    from vndb_facets import FacetIndex
+    
+    try:
+        index = FacetIndex.load(index_path)
+        response = index.query(endpoint, parse_filters(filters), results, sort, facets)
+    except (OSError, ValueError) as e:
+        error(str(e))
+        return
+    print(format_json(response))
+
+
 def show_help() -> None:
     """Display help message with usage instructions."""
     help_text = """
@@ -391,6 +823,22 @@ Advanced Commands:
   query <endpoint> <filters> <fields> [sort] [results]
                                            Generic query
 
+Random Samples:
+  sample <endpoint> <count> [fields] [seed]
+                                           Uniform random entries (vn, character,
+                                           release, producer, staff, tag, trait)
+
+Local Facet Commands (answered offline, no rate limit):
+  facet_index <index> [vn_filters]         Bulk-fetch VN tags and character traits
+  facet <index> <endpoint> <filters> [sort] [results] [facets]
+                                           Filter by tag/trait and numeric fields,
+                                           with tag/trait counts
+
+Tracing Options (before or after the command):
+  --profile                                Print request timings at exit
+  --trace-out <file>                       Export timings (JSON, or .prom)
+  --profile-sample                         Also sample stacks while running
+
 Examples:
   python vndb_query.py character "美雪"
   python vndb_query.py vn "Steins;Gate"
@@ -411,24 +859,15 @@ Notes:
     print(help_text)
 
 
-def main() -> None:
-    """Main entry point for the CLI application."""
-    # Check Python version
-    if sys.version_info < (3, 7):
-        error("Python 3.7 or higher is required")
-    
-    # Check command line arguments
-    if len(sys.argv) < 2:
-        show_help()
-        sys.exit(0)
-    
-    command = sys.argv[1]
-    args = sys.argv[2:]
-    
-    # Initialize API client
-    client = VNDBClient()
+def run_command(client: VNDBClient, command: str, args: List[str]) -> None:
+    """
+    Route one CLI command to its handler.
     
-    # Route commands to appropriate handlers
+    Args:
+        client: VNDB API client instance
+        command: Command name (e.g., "vn", "character", "query")
+        args: Positional arguments following the command
+    """
     if command == "character":
         if len(args) < 1:
             error("Usage: python vndb_query.py character <keyword> [fields] [count]")
@@ -468,6 +907,26 @@ def main() -> None:
                       args[3] if len(args) > 3 else "id",
                       int(args[4]) if len(args) > 4 else 10)
     
+    elif command == "sample":
+        if len(args) < 2:
+            error("Usage: python vndb_query.py sample <endpoint> <count> [fields] [seed]")
+        sample_command(client, args[0], int(args[1]),
+                      args[2] if len(args) > 2 else "title",
+                      int(args[3]) if len(args) > 3 else None)
+    
+    elif command == "facet_index":
+        if len(args) < 1:
+            error("Usage: python vndb_query.py facet_index <index> [vn_filters]")
+        build_facet_index(client, args[0], args[1] if len(args) > 1 else None)
+    
+    elif command == "facet":
+        if len(args) < 3:
+            error("Usage: python vndb_query.py facet <index> <endpoint> <filters> [sort] [results] [facets]")
+        facet_query(args[0], args[1], args[2],
+                   args[3] if len(args) > 3 else "id",
+                   int(args[4]) if len(args) > 4 else 10,
+                   int(args[5]) if len(args) > 5 else 10)
+    
     elif command in ("help", "--help", "-h"):
         show_help()
     
@@ -475,5 +934,49 @@ def main() -> None:
         error(f"Unknown command: {command}. Use 'python vndb_query.py help' for usage information")
 
 
+def load_tracer(profile: bool, trace_out: Optional[str], sample: bool) -> "Tracer":
+    """Create a CLI request tracer from the sibling gal-trace skill."""
+    if TRACE_SCRIPTS not in sys.path:
+        sys.path.append(TRACE_SCRIPTS)
+    try:
+        from request_trace import cli_tracer
+    except ImportError:
+        error("Tracing requires the gal-trace skill next to vndb-api")
+    return cli_tracer(profile=profile, out_path=trace_out, sample=sample)
+
+
+def main() -> None:
+    """Main entry point for the CLI application."""
+    # Check Python version
+    if sys.version_info < (3, 7):
+        error("Python 3.7 or higher is required")
+    
+    # Split off tracing options
+    argv = sys.argv[1:]
+    trace_out = None
+    if "--trace-out" in argv:
+        index = argv.index("--trace-out")
+        if index + 1 >= len(argv):
+            error("--trace-out requires a file path")
+        trace_out = argv[index + 1]
+        del argv[index:index + 2]
+    profile = "--profile" in argv
+    sample = "--profile-sample" in argv
+    argv = [arg for arg in argv if arg not in ("--profile", "--profile-sample")]
+    
+    # Check command line arguments
+    if len(argv) < 1:
+        show_help()
+        sys.exit(0)
+    
+    tracer = None
+    if profile or trace_out or sample:
+        tracer = load_tracer(profile, trace_out, sample)
+
+    # Initialize API client
+    client = VNDBClient(tracer=tracer)
+    run_command(client, argv[0], argv[1:])
+
+
 if __name__ == "__main__":
     main()
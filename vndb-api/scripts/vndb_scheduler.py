@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Priority Request Scheduler for the VNDB API
+
+VNDB allows 200 requests per 5 minutes and about 1 second of server
+execution time per minute, shared by everything running under one IP.
+RequestScheduler admits requests from VNDBClient within both budgets and
+orders them by priority class:
+
+- interactive: user-facing lookups; may use the whole budget
+- normal: everything else; default for VNDBClient
+- bulk: crawls and syncs; uses what the other classes leave
+
+Each class has a Reservation: a share of the request budget, of the
+execution-time budget and of the in-flight slots that lower classes may not
+touch. A waiting request of a higher class always goes first, so queued
+bulk requests stop being admitted the moment interactive work arrives, and
+the slots reserved for interactive requests are never held by bulk
+requests (requests already sent are not aborted). A 429 pauses all
+classes for its Retry-After time.
+
+Execution time is not reported by the API. It is estimated as the time to
+the response headers minus the fastest such time recently seen, which is
+roughly the network round trip.
+
+Usage:
+    from vndb_query import VNDBClient
+    from vndb_scheduler import RequestScheduler
+
+    scheduler = RequestScheduler()
+    crawler = VNDBClient(scheduler=scheduler, priority="bulk")
+    frontend = VNDBClient(scheduler=scheduler, priority="interactive")
+    frontend.post("vn", {...}, priority="normal")   # per-request override
+    print(scheduler.snapshot())
+
+    # Bulk workers and interactive arrivals against a simulated API
+    python vndb_scheduler.py simulate --duration 20 --bulk-workers 8 --interactive-rate 2
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+PRIORITIES = ("interactive", "normal", "bulk")
+
+
+@dataclass
+class Reservation:
+    """Budget shares that classes of lower priority may not use."""
+    requests: float = 0.0
+    exec_time: float = 0.0
+    slots: int = 0
+
+
+DEFAULT_RESERVATIONS: Dict[str, Reservation] = {
+    "interactive": Reservation(requests=0.2, exec_time=0.3, slots=1),
+    "normal": Reservation(requests=0.1, exec_time=0.1),
+    "bulk": Reservation(),
+}
+# Samples kept per class for wait-time percentiles
+WAIT_SAMPLES = 2048
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Return the q-quantile (0-1) of samples by nearest rank, or None if empty."""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class _ClassState:
+    """Queue and counters of one priority class."""
+
+    def __init__(self):
+        self.queue: deque = deque()
+        self.in_flight = 0
+        self.waits: deque = deque(maxlen=WAIT_SAMPLES)
+        self.stats = {"admitted": 0, "completed": 0, "throttled": 0, "wait_seconds": 0.0,
+                      "max_wait_seconds": 0.0, "exec_seconds": 0.0}
+
+
+class Ticket:
+    """Admission of one request; release it by leaving the with block."""
+
+    def __init__(self, scheduler: "RequestScheduler", priority: str, waited: float):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.waited = waited
+        self.status: Optional[int] = None
+        self.server_seconds: Optional[float] = None
+        self.retry_after: Optional[float] = None
+        self._released = False
+
+    def report(self, status: int, server_seconds: Optional[float] = None,
+               retry_after: Optional[float] = None) -> None:
+        """
+        Record the response.
+
+        Args:
+            status: HTTP status
+            server_seconds: Time from sending the request to the response headers
+            retry_after: Retry-After of a 429, in seconds
+        """
+        self.status = status
+        self.server_seconds = server_seconds
+        self.retry_after = retry_after
+
+    def release(self) -> None:
+        """Free the slot and charge the request to the budgets."""
+        if not self._released:
+            self._released = True
+            self.scheduler._release(self)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class RequestScheduler:
+    """Priority admission within VNDB's request and execution-time budgets."""
+
+    def __init__(self, max_requests: int = 200, request_window: float = 300.0,
+                 exec_budget: float = 1.0, exec_window: float = 60.0, max_in_flight: int = 4,
+                 reservations: Optional[Dict[str, Reservation]] = None,
+                 throttle_pause: float = 10.0):
+        """
+        Initialize the scheduler.
+
+        Args:
+            max_requests: Requests allowed per request window
+            request_window: Length of the request window in seconds
+            exec_budget: Server execution seconds allowed per execution window
+            exec_window: Length of the execution window in seconds
+            max_in_flight: Requests allowed in flight at once
+            reservations: Per class reservations; defaults to DEFAULT_RESERVATIONS
+            throttle_pause: Pause after a 429 without Retry-After, in seconds
+        """
+        self.max_requests = max_requests
+        self.request_window = request_window
+        self.exec_budget = exec_budget
+        self.exec_window = exec_window
+        self.max_in_flight = max_in_flight
+        self.reservations = dict(DEFAULT_RESERVATIONS if reservations is None else reservations)
+        self.throttle_pause = throttle_pause
+        unknown = set(self.reservations) - set(PRIORITIES)
+        if unknown:
+            raise ValueError(f"Unknown priority classes: {', '.join(sorted(unknown))}")
+        self._classes = {priority: _ClassState() for priority in PRIORITIES}
+        self._starts: deque = deque()
+        self._exec_log: deque = deque()
+        self._exec_used = 0.0
+        self._round_trips: deque = deque(maxlen=64)
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _reserved_above(self, priority: str) -> Reservation:
+        """Sum the reservations of the classes ranked above a class."""
+        above = [self.reservations.get(p, Reservation())
+                 for p in PRIORITIES[:PRIORITIES.index(priority)]]
+        return Reservation(requests=sum(r.requests for r in above),
+                           exec_time=sum(r.exec_time for r in above),
+                           slots=sum(r.slots for r in above))
+
+    def _expire(self, now: float) -> None:
+        while self._starts and self._starts[0] <= now - self.request_window:
+            self._starts.popleft()
+        while self._exec_log and self._exec_log[0][0] <= now - self.exec_window:
+            self._exec_used -= self._exec_log.popleft()[1]
+        if not self._exec_log:
+            self._exec_used = 0.0
+
+    def _admissible(self, priority: str, token: object, now: float) -> bool:
+        state = self._classes[priority]
+        if state.queue[0] is not token:
+            return False
+        if any(self._classes[p].queue for p in PRIORITIES[:PRIORITIES.index(priority)]):
+            return False
+        if now < self._paused_until:
+            return False
+        reserved = self._reserved_above(priority)
+        in_flight = sum(s.in_flight for s in self._classes.values())
+        return (in_flight < self.max_in_flight - reserved.slots
+                and len(self._starts) < self.max_requests * (1 - reserved.requests)
+                and self._exec_used < self.exec_budget * (1 - reserved.exec_time))
+
+    def _next_change(self, now: float) -> Optional[float]:
+        """Seconds until a budget frees up or a pause ends, if any will."""
+        moments = [self._paused_until]
+        if self._starts:
+            moments.append(self._starts[0] + self.request_window)
+        if self._exec_log:
+            moments.append(self._exec_log[0][0] + self.exec_window)
+        waits = [moment - now for moment in moments if moment > now]
+        return min(waits) if waits else None
+
+    def acquire(self, priority: str = "normal") -> Ticket:
+        """
+        Block until a request of a class may be sent.
+
+        Args:
+            priority: "interactive", "normal" or "bulk"
+
+        Returns:
+            Ticket to report the response on and release
+        """
+        if priority not in self._classes:
+            raise ValueError(f"Unknown priority: {priority} (use {', '.join(PRIORITIES)})")
+        state = self._classes[priority]
+        token = object()
+        started = time.monotonic()
+        with self._cond:
+            state.queue.append(token)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._expire(now)
+                    if self._admissible(priority, token, now):
+                        break
+                    self._cond.wait(self._next_change(now))
+            finally:
+                state.queue.remove(token)
+            state.in_flight += 1
+            self._starts.append(now)
+            waited = now - started
+            state.waits.append(waited)
+            state.stats["admitted"] += 1
+            state.stats["wait_seconds"] += waited
+            state.stats["max_wait_seconds"] = max(state.stats["max_wait_seconds"], waited)
+            # The next request in line may be admissible too
+            self._cond.notify_all()
+        return Ticket(self, priority, waited)
+
+    def _release(self, ticket: Ticket) -> None:
+        now = time.monotonic()
+        with self._cond:
+            state = self._classes[ticket.priority]
+            state.in_flight -= 1
+            state.stats["completed"] += 1
+            if ticket.server_seconds is not None:
+                self._round_trips.append(ticket.server_seconds)
+                cost = max(0.0, ticket.server_seconds - min(self._round_trips))
+                self._exec_log.append((now, cost))
+                self._exec_used += cost
+                state.stats["exec_seconds"] += cost
+            if ticket.status == 429:
+                state.stats["throttled"] += 1
+                pause = ticket.retry_after if ticket.retry_after is not None else self.throttle_pause
+                self._paused_until = max(self._paused_until, now + pause)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get budget usage and per-class queue and wait statistics.
+
+        Returns:
+            {"budget": {...}, "classes": {priority: {...}}}
+        """
+        with self._cond:
+            now = time.monotonic()
+            self._expire(now)
+            classes = {}
+            for priority, state in self._classes.items():
+                waits = list(state.waits)
+                admitted = state.stats["admitted"]
+                classes[priority] = {
+                    "queued": len(state.queue),
+                    "in_flight": state.in_flight,
+                    "admitted": admitted,
+                    "completed": state.stats["completed"],
+                    "throttled": state.stats["throttled"],
+                    "wait_avg_ms": round(1000 * state.stats["wait_seconds"] / admitted, 1) if admitted else None,
+                    "wait_p50_ms": _ms(percentile(waits, 0.5)),
+                    "wait_p99_ms": _ms(percentile(waits, 0.99)),
+                    "wait_max_ms": _ms(state.stats["max_wait_seconds"]),
+                    "exec_seconds": round(state.stats["exec_seconds"], 3),
+                }
+            budget = {
+                "requests_used": len(self._starts),
+                "max_requests": self.max_requests,
+                "exec_used": round(self._exec_used, 3),
+                "exec_budget": self.exec_budget,
+                "in_flight": sum(s.in_flight for s in self._classes.values()),
+                "paused_seconds": round(max(0.0, self._paused_until - now), 2),
+            }
+        return {"budget": budget, "classes": classes}
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def simulate(scheduler: RequestScheduler, duration: float, bulk_workers: int,
+             interactive_rate: float, latency_ms: float, exec_ms: float) -> Dict[str, Any]:
+    """
+    Run bulk workers and random interactive arrivals against a simulated API.
+
+    Each simulated request takes a network round trip of latency_ms plus a
+    random server time averaging exec_ms.
+
+    Args:
+        scheduler: Scheduler under test
+        duration: Seconds to run
+        bulk_workers: Threads sending bulk requests back to back
+        interactive_rate: Interactive requests per second (Poisson arrivals)
+        latency_ms: Network round trip per request
+        exec_ms: Mean server execution time per request
+
+    Returns:
+        Interactive end-to-end latencies and the scheduler snapshot
+    """
+    deadline = time.monotonic() + duration
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def request(priority: str) -> float:
+        started = time.monotonic()
+        with scheduler.acquire(priority) as ticket:
+            server = latency_ms / 1000 + random.expovariate(1000 / exec_ms)
+            time.sleep(server)
+            ticket.report(200, server)
+        return time.monotonic() - started
+
+    def bulk() -> None:
+        while time.monotonic() < deadline:
+            request("bulk")
+
+    def interactive() -> None:
+        with lock:
+            latencies.append(request("interactive"))
+
+    threads = [threading.Thread(target=bulk) for _ in range(bulk_workers)]
+    for thread in threads:
+        thread.start()
+    while True:
+        time.sleep(random.expovariate(interactive_rate))
+        if time.monotonic() >= deadline:
+            break
+        thread = threading.Thread(target=interactive)
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    return {"interactive_latency_ms": {"p50": _ms(percentile(latencies, 0.5)),
+                                       "p99": _ms(percentile(latencies, 0.99)),
+                                       "max": _ms(max(latencies) if latencies else None)},
+            "snapshot": scheduler.snapshot()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Priority Request Scheduler for the VNDB API")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    sim_parser = subparsers.add_parser("simulate", help="Run the scheduler against a simulated API")
+    sim_parser.add_argument("--duration", type=float, default=20.0, help="Seconds to run")
+    sim_parser.add_argument("--bulk-workers", type=int, default=8, help="Bulk threads")
+    sim_parser.add_argument("--interactive-rate", type=float, default=2.0,
+                            help="Interactive requests per second")
+    sim_parser.add_argument("--latency-ms", type=float, default=50.0, help="Network round trip")
+    sim_parser.add_argument("--exec-ms", type=float, default=10.0, help="Mean server execution time")
+    # VNDB's budgets, scaled down so a short run reaches them
+    sim_parser.add_argument("--max-requests", type=int, default=200)
+    sim_parser.add_argument("--request-window", type=float, default=10.0)
+    sim_parser.add_argument("--exec-budget", type=float, default=1.0)
+    sim_parser.add_argument("--exec-window", type=float, default=10.0)
+    sim_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    scheduler = RequestScheduler(max_requests=args.max_requests, request_window=args.request_window,
+                                 exec_budget=args.exec_budget, exec_window=args.exec_window)
+    result = simulate(scheduler, args.duration, args.bulk_workers, args.interactive_rate,
+                      args.latency_ms, args.exec_ms)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{'class':<12} {'admitted':>9} {'queued':>7} {'wait p50':>9} {'wait p99':>9} {'wait max':>9}")
+    for priority, stats in result["snapshot"]["classes"].items():
+        print(f"{priority:<12} {stats['admitted']:9} {stats['queued']:7} "
+              f"{stats['wait_p50_ms'] or 0:9.1f} {stats['wait_p99_ms'] or 0:9.1f} "
+              f"{stats['wait_max_ms'] or 0:9.1f}")
+    latency = result["interactive_latency_ms"]
+    print(f"\nInteractive latency: p50 {latency['p50']} ms, p99 {latency['p99']} ms; "
+          f"budget {args.max_requests} requests / {args.request_window:g} s, "
+          f"{args.exec_budget:g} s execution / {args.exec_window:g} s")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()